@@ -10,11 +10,13 @@ from . import utils
 from .core import (
     get_next_murcko_fragments,
     get_all_murcko_fragments,
+    iter_all_murcko_fragments,
     get_murcko_scaffold,
 )
 
 from .network import ScaffoldNetwork, HierS
-from .tree import ScaffoldTree, tree_frags_from_mol
+from .tree import ScaffoldTree, tree_frags_from_mol, iter_tree_frags
+from .builder import build_graphs
 
 __version__ = '1.0.4'
 
@@ -25,8 +27,11 @@ __all__ = [
     'ScaffoldNetwork',
     'ScaffoldTree',
     'tree_frags_from_mol',
+    'iter_tree_frags',
+    'build_graphs',
     'get_next_murcko_fragments',
     'get_all_murcko_fragments',
+    'iter_all_murcko_fragments',
     'get_murcko_scaffold',
 ]
 
@@ -0,0 +1,147 @@
+"""
+scaffoldgraph.builder
+
+Defines a builder constructing multiple scaffold graphs in a single pass.
+"""
+
+from rdkit import RDLogger
+from rdkit.Chem import Mol
+from tqdm.auto import tqdm
+
+from scaffoldgraph.core.fragment import Fragmenter, MurckoRingFragmenter, IndexedMurckoRingFragmenter
+from scaffoldgraph.core.graph import prepare_molecule
+from scaffoldgraph.core.scaffold import Scaffold
+from scaffoldgraph.utils.cache import Cache
+
+from .network import ScaffoldNetwork, HierS
+from .tree import ScaffoldTree
+
+__all__ = ['build_graphs']
+
+rdlogger = RDLogger.logger()
+
+# fragmenter types producing identical results (apart from scheme 4)
+_SHARED_FRAGMENTER_TYPES = (MurckoRingFragmenter, IndexedMurckoRingFragmenter)
+
+
+class _SharedMurckoFragmenter(Fragmenter):
+    """Private: A MurckoRingFragmenter sharing its results with other graphs.
+
+    Results are memoized in a cache shared between the fragmenters of
+    several graphs, keyed by the canonical identifier of the child scaffold.
+    Only fragmenters of the types in ``_SHARED_FRAGMENTER_TYPES``, which
+    produce identical results, are wrapped (subclasses are not).
+    As scheme 4 only modifies the fragmentation of scaffolds containing
+    epoxide/aziridine-like rings, the results of fragmenters with and
+    without scheme 4 are shared for all other scaffolds.
+
+    """
+    def __init__(self, fragmenter, shared):
+        super(_SharedMurckoFragmenter, self).__init__()
+        self.fragmenter = fragmenter
+        self.shared = shared
+
+    @property
+    def signature(self):
+        return self.fragmenter.signature
+
+    def applies_scheme_4(self, scaffold):
+        return self.fragmenter.applies_scheme_4(scaffold)
+
+    def fragment(self, scaffold):
+        if self.fragmenter.applies_scheme_4(scaffold):
+            return self.fragmenter.fragment(scaffold)
+        key = scaffold.get_canonical_identifier()
+        try:
+            parents = self.shared[key]
+        except KeyError:
+            parents = self.shared[key] = self.fragmenter.fragment(scaffold)
+        # graphs may modify parents (i.e. set the prioritization rule)
+        return [Scaffold(Mol(p.mol), p.hash_func) for p in parents]
+
+
+def build_graphs(molecules, graphs=None, ring_cutoff=10, progress=False, annotate=True,
+                 budget=None, share_fragments=True, shared_cache_size=10000):
+    """Construct multiple scaffold graphs in a single pass over a set of molecules.
+
+    Each molecule is read and prepared once (naming, ring filtering, removal
+    of stereochemistry and calculation of the Murcko scaffold and its
+    annotation) and then added to each of the graphs. The results of
+    ``MurckoRingFragmenter`` (or ``IndexedMurckoRingFragmenter``) objects
+    used by multiple graphs (i.e. a ``ScaffoldNetwork`` and a
+    ``ScaffoldTree``) are shared, except for scaffolds where the scheme 4
+    setting changes the result. Fragmenters of other types, including
+    subclasses of these, are not shared.
+
+    Parameters
+    ----------
+    molecules : iterable
+        An iterable of rdkit molecules (i.e. a supplier), it is expected
+        that each molecule will be assigned a property '_Name' serving as an
+        identifier for that molecule.
+    graphs : list, optional
+        A list of ScaffoldGraph instances (empty or existing) to which the
+        molecules are added. If None (default) a ScaffoldNetwork, HierS and
+        ScaffoldTree are constructed.
+    ring_cutoff : int, optional
+        Ignore molecules with more rings than this cutoff. The default is 10.
+    progress : bool, optional
+        If True display a progress bar to monitor construction progress.
+        The default is False.
+    annotate : bool, optional
+        If True write an annotated murcko scaffold SMILES string to each
+        molecule edge (molecule --> scaffold). The default is True.
+    budget : scaffoldgraph.core.ConstructionBudget, optional
+        A per-molecule budget, applied separately for each graph.
+        The default is None.
+    share_fragments : bool, optional
+        If True (default) share fragmentation results between graphs.
+    shared_cache_size : int, None, optional
+        The maximum number of fragmentation results held in the shared
+        cache. If None the size is unlimited. The default is 10000.
+
+    Returns
+    -------
+    list
+        The constructed graphs, in the order supplied.
+
+    Examples
+    --------
+    >>> import scaffoldgraph as sg
+    >>> from scaffoldgraph.io.sdf import read_sdf
+    >>> with open('my_file.sdf', 'rb') as sdf:
+    ...     network, hiers, tree = sg.build_graphs(read_sdf(sdf))
+
+    Notes
+    -----
+    The graphs produced are identical to those constructed separately,
+    i.e. using ``ScaffoldNetwork.from_sdf``.
+
+    """
+    if graphs is None:
+        graphs = [ScaffoldNetwork(), HierS(), ScaffoldTree()]
+    fragmenters = [g.fragmenter for g in graphs]
+    if share_fragments:
+        murcko = [g for g in graphs if type(g.fragmenter) in _SHARED_FRAGMENTER_TYPES]
+        if len(murcko) > 1:
+            shared = Cache(shared_cache_size)
+            for graph in murcko:
+                graph.fragmenter = _SharedMurckoFragmenter(graph.fragmenter, shared)
+    rdlogger.setLevel(4)  # Suppress the RDKit logs
+    try:
+        for molecule in tqdm(molecules, disable=progress is False, desc='build_graphs',
+                             miniters=1, dynamic_ncols=True):
+            if molecule is None:  # logged in suppliers
+                continue
+            prepared = prepare_molecule(molecule, ring_cutoff, annotate)
+            if prepared is None:
+                continue
+            for graph in graphs:
+                graph._add_prepared_molecule(molecule, *prepared, budget=budget)
+    finally:
+        for graph, fragmenter in zip(graphs, fragmenters):
+            graph.fragmenter = fragmenter
+            if graph.fragment_cache is not None:
+                graph.fragment_cache.flush()
+        rdlogger.setLevel(3)  # Enable the RDKit logs
+    return graphs
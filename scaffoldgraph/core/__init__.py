@@ -5,20 +5,38 @@ The core package contains core functionality for building ScaffoldGraphs.
 """
 
 from .fragment import (MurckoRingFragmenter,
+                       IndexedMurckoRingFragmenter,
                        MurckoRingSystemFragmenter,
                        get_all_murcko_fragments,
+                       iter_all_murcko_fragments,
                        get_next_murcko_fragments,
                        get_murcko_scaffold)
 
+from .budget import ConstructionBudget
+from .cache import FragmentCache, SQLiteFragmentCache
+from .frozen import FrozenScaffoldGraph
 from .graph import ScaffoldGraph
-from .scaffold import Scaffold
+from .scaffold import Scaffold, ScaffoldRecord
+from .membership import MembershipIndex
+from .reachability import ReachabilityIndex
+from .store import MoleculeStore
 
 __all__ = [
     'ScaffoldGraph',
+    'FrozenScaffoldGraph',
     'Scaffold',
+    'ScaffoldRecord',
+    'FragmentCache',
+    'ConstructionBudget',
+    'MoleculeStore',
+    'MembershipIndex',
+    'ReachabilityIndex',
+    'SQLiteFragmentCache',
     'MurckoRingFragmenter',
+    'IndexedMurckoRingFragmenter',
     'MurckoRingSystemFragmenter',
     'get_all_murcko_fragments',
+    'iter_all_murcko_fragments',
     'get_next_murcko_fragments',
     'get_murcko_scaffold',
 ]
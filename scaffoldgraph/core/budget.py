@@ -0,0 +1,122 @@
+"""
+scaffoldgraph.core.budget
+
+Defines per-molecule work budgets limiting the construction of scaffold graphs.
+"""
+
+import time
+
+from collections import namedtuple
+
+__all__ = [
+    'BudgetExceeded',
+    'BudgetReport',
+    'ConstructionBudget',
+]
+
+BudgetReport = namedtuple('BudgetReport', ['molecule', 'scaffold', 'reason'])
+
+
+class BudgetExceeded(Exception):
+    """Raised when the construction budget of a molecule is exceeded.
+
+    Attributes
+    ----------
+    reason : str
+        The budget which was exceeded, either 'max_scaffolds' or 'timeout'.
+    n_scaffolds : int
+        The number of sub-scaffolds generated before the budget was exceeded.
+    elapsed : float
+        The time (in seconds) spent before the budget was exceeded.
+
+    """
+    def __init__(self, reason, n_scaffolds, elapsed):
+        msg = f'{reason} budget exceeded after {n_scaffolds} scaffolds in {elapsed:.2f}s'
+        super(BudgetExceeded, self).__init__(msg)
+        self.reason = reason
+        self.n_scaffolds = n_scaffolds
+        self.elapsed = elapsed
+
+
+class ConstructionBudget(object):
+    """A per-molecule budget limiting the expansion of scaffold hierarchies.
+
+    The budget bounds the number of sub-scaffolds generated from a single
+    molecule and the wall-clock time spent expanding its hierarchy. Graph
+    constructors start the budget for each molecule with a new top-level
+    scaffold and check it whenever a new sub-scaffold is generated. When
+    the budget is exceeded the partial hierarchy of the molecule is either
+    kept ('keep') or removed ('skip') according to the policy, and the
+    molecule and its top-level scaffold are flagged with the node attribute
+    'budget_exceeded' (see ``ScaffoldGraph.get_budget_report``). Under the
+    'keep' policy the scaffolds of a partial hierarchy are also flagged with
+    the node attribute 'truncated', and are expanded again when reached by
+    a later molecule.
+
+    When constructing with multiple worker processes (``n_jobs`` > 1) the
+    budget is copied to each worker, and each worker expands its molecules
+    against its own partial graph. The scaffolds counted against the budget
+    of a molecule may therefore differ from a serial construction.
+
+    Examples
+    --------
+    >>> import scaffoldgraph as sg
+    >>> from scaffoldgraph.core import ConstructionBudget
+    >>> budget = ConstructionBudget(max_scaffolds=100, timeout=5, policy='skip')
+    >>> network = sg.ScaffoldNetwork.from_sdf('my_file.sdf', budget=budget)
+    >>> network.get_budget_report()
+    [BudgetReport(molecule='CHEMBL1', scaffold='c1ccc2c(c1)...', reason='max_scaffolds')]
+
+    """
+    policies = ('keep', 'skip')
+
+    def __init__(self, max_scaffolds=None, timeout=None, policy='keep'):
+        """
+        Parameters
+        ----------
+        max_scaffolds : int, None, optional
+            The maximum number of sub-scaffolds generated from a single
+            molecule. If None (default) the number is unlimited.
+        timeout : float, None, optional
+            The maximum time (in seconds) spent expanding the hierarchy of
+            a single molecule. If None (default) the time is unlimited.
+        policy : {'keep', 'skip'}, optional
+            If 'keep' (default) the partial hierarchy of a molecule exceeding
+            its budget is kept in the graph, if 'skip' it is removed leaving
+            only the molecule and its top-level scaffold.
+
+        """
+        if policy not in self.policies:
+            raise ValueError(f'policy must be one of {self.policies} not {policy}')
+        self.max_scaffolds = max_scaffolds
+        self.timeout = timeout
+        self.policy = policy
+        self._count = 0
+        self._start = None
+
+    def start(self):
+        """Reset the budget before expanding the hierarchy of a molecule."""
+        self._count = 0
+        self._start = time.monotonic()
+
+    def check(self):
+        """Consume the budget for a new sub-scaffold.
+
+        Raises
+        ------
+        BudgetExceeded
+            If generating the sub-scaffold would exceed the budget.
+
+        """
+        elapsed = time.monotonic() - self._start
+        if self.max_scaffolds is not None and self._count >= self.max_scaffolds:
+            raise BudgetExceeded('max_scaffolds', self._count, elapsed)
+        if self.timeout is not None and elapsed > self.timeout:
+            raise BudgetExceeded('timeout', self._count, elapsed)
+        self._count += 1
+
+    def __repr__(self):
+        return '<{_cls} at {address}>'.format(
+            _cls=self.__class__.__name__,
+            address=hex(id(self))
+        )
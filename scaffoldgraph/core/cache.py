@@ -0,0 +1,320 @@
+"""
+scaffoldgraph.core.cache
+
+Defines caches for memoizing scaffold fragmentation during graph construction.
+"""
+
+import sqlite3
+import os
+
+from collections import namedtuple
+
+from rdkit import __version__ as rdversion
+from rdkit.Chem import Mol
+
+from scaffoldgraph.core.scaffold import Scaffold
+from scaffoldgraph.utils.cache import Cache
+
+__all__ = [
+    'CacheInfo',
+    'FragmentCache',
+    'SQLiteFragmentCache',
+]
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class FragmentCache(Cache):
+    """An LRU cache memoizing the fragmentation of scaffolds.
+
+    The cache maps a (signature, canonical identifier) key of a child
+    scaffold to the result of its fragmentation, i.e. the list of parent
+    scaffolds produced by a ``Fragmenter`` for a ``ScaffoldNetwork`` or
+    ``HierS`` network, or a list containing the prioritized parent for a
+    ``ScaffoldTree``. The signature identifies the fragmenter (and the
+    prioritization rules) producing the result, so that a cache may be
+    shared by graphs of different types. Graph constructors consult the
+    cache before fragmenting a scaffold, so that scaffolds shared by many
+    molecules are only fragmented once.
+    Graphs constructed with ``compact_scaffolds=True`` store parents
+    as ``ScaffoldRecord`` objects, which do not hold an rdkit Mol.
+
+    Examples
+    --------
+    >>> import scaffoldgraph as sg
+    >>> from scaffoldgraph.core import FragmentCache
+    >>> cache = FragmentCache(maxsize=10000)
+    >>> network = sg.ScaffoldNetwork.from_sdf('my_file.sdf', fragment_cache=cache)
+    >>> network.cache_info()
+    CacheInfo(hits=120, misses=356, maxsize=10000, currsize=356)
+
+    """
+    def __init__(self, maxsize=None):
+        """
+        Parameters
+        ----------
+        maxsize : int, None, optional
+            Set the maximum number of scaffolds cached, if None the cache
+            has no size limitation. When full the least recently used
+            entry is evicted. The default is None.
+
+        """
+        super(FragmentCache, self).__init__(maxsize)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Return a cached fragmentation result, recording a hit or miss.
+
+        Parameters
+        ----------
+        key : tuple
+            The (signature, canonical identifier) of the child scaffold.
+        default : object, optional
+            Value returned if the key is not in the cache.
+            The default is None.
+
+        """
+        try:
+            value = self[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def info(self):
+        """CacheInfo : Return the hits, misses, maxsize and current size of the cache."""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self))
+
+    def clear(self):
+        """Empty the cache and reset the hit/miss statistics."""
+        super(FragmentCache, self).clear()
+        self.hits = 0
+        self.misses = 0
+
+    def flush(self):
+        """Write pending entries to storage (no-op for an in-memory cache)."""
+        pass
+
+    def fork(self):
+        """FragmentCache : Return an empty cache of the same size for a worker process."""
+        return FragmentCache(self.maxsize)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scaffolds (
+    namespace TEXT NOT NULL,
+    child TEXT NOT NULL,
+    PRIMARY KEY (namespace, child)
+);
+CREATE TABLE IF NOT EXISTS parents (
+    namespace TEXT NOT NULL,
+    child TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    parent TEXT NOT NULL,
+    removed_ring_idx INTEGER,
+    prioritization_rule TEXT,
+    mol BLOB NOT NULL,
+    PRIMARY KEY (namespace, child, position)
+);
+"""
+
+
+class SQLiteFragmentCache(object):
+    """A persistent fragment cache stored in an SQLite database.
+
+    The cache provides the same interface as the ``FragmentCache``, but
+    entries are stored on disk and persist between runs, such that when
+    rebuilding a graph from a slightly modified library only new scaffolds
+    are fragmented.
+
+    For each child scaffold (keyed by a fragmenter/prioritization rule
+    signature and its canonical identifier) the database stores the
+    canonical identifiers, ``removed_ring_idx`` and ``prioritization_rule``
+    of its parent scaffolds, along with their binary representation,
+    from which the parent scaffolds are recreated.
+
+    The database is stamped with the cache schema, scaffoldgraph and RDKit
+    versions. If any of these differ from the stamps found when opening an
+    existing database, its contents are discarded. As the signature of
+    a fragmenter or ruleset is part of each key, changing fragmenter
+    options or prioritization rules will not produce stale results.
+
+    Entries are committed in batches of ``commit_interval``, and on calls
+    to ``flush`` or ``close``. Graph constructors flush the cache when
+    construction is complete.
+
+    Examples
+    --------
+    >>> import scaffoldgraph as sg
+    >>> from scaffoldgraph.core import SQLiteFragmentCache
+    >>> cache = SQLiteFragmentCache('fragments.db')
+    >>> network = sg.ScaffoldNetwork.from_sdf('my_file.sdf', fragment_cache=cache)
+    >>> network.cache_info()
+    CacheInfo(hits=0, misses=356, maxsize=None, currsize=356)
+
+    A warm rebuild then only fragments scaffolds which are not cached:
+
+    >>> network = sg.ScaffoldNetwork.from_sdf('my_file.sdf', fragment_cache=cache)
+    >>> network.cache_info()
+    CacheInfo(hits=356, misses=356, maxsize=None, currsize=356)
+
+    """
+    schema_version = 1
+
+    def __init__(self, path, commit_interval=1000):
+        """
+        Parameters
+        ----------
+        path : str, pathlib.Path
+            Path to the database file, which is created if it does not
+            exist.
+        commit_interval : int, optional
+            Number of entries written between commits. The default is 1000.
+
+        """
+        self.path = str(path)
+        self.commit_interval = commit_interval
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._pid = None
+        self._pending = 0
+
+    @property
+    def maxsize(self):
+        """None : The cache has no size limitation."""
+        return None
+
+    @classmethod
+    def version_stamps(cls):
+        """dict : Return the version stamps written to the database."""
+        from scaffoldgraph import __version__
+        return {
+            'schema': str(cls.schema_version),
+            'scaffoldgraph': __version__,
+            'rdkit': rdversion,
+        }
+
+    def _connection(self):
+        """Private: Return a connection to the database, opened per process."""
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = self._connect()
+            self._pid = os.getpid()
+            self._pending = 0
+        return self._conn
+
+    def _connect(self):
+        """Private: Open the database, discarding its contents if stale."""
+        conn = sqlite3.connect(self.path, timeout=60)
+        conn.execute('PRAGMA journal_mode=WAL')
+        with conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            stamps = self.version_stamps()
+            if dict(conn.execute('SELECT key, value FROM meta')) != stamps:
+                conn.execute('DROP TABLE IF EXISTS scaffolds')
+                conn.execute('DROP TABLE IF EXISTS parents')
+                conn.execute('DELETE FROM meta')
+                conn.executemany('INSERT INTO meta VALUES (?, ?)', stamps.items())
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def get(self, key, default=None):
+        """Return a cached fragmentation result, recording a hit or miss.
+
+        Parameters
+        ----------
+        key : tuple
+            The (signature, canonical identifier) of the child scaffold.
+        default : object, optional
+            Value returned if the key is not in the cache.
+            The default is None.
+
+        """
+        conn = self._connection()
+        query = 'SELECT 1 FROM scaffolds WHERE namespace = ? AND child = ?'
+        if conn.execute(query, key).fetchone() is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        query = 'SELECT mol FROM parents WHERE namespace = ? AND child = ? ORDER BY position'
+        return [Scaffold(Mol(binary)) for binary, in conn.execute(query, key)]
+
+    def __getitem__(self, key):
+        value = self.get(key, None)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, parents):
+        namespace, child = key
+        rows = [(
+            namespace, child, position,
+            parent.get_canonical_identifier(),
+            parent.removed_ring_idx,
+            parent.prioritization_rule,
+            parent.to_binary(),
+        ) for position, parent in enumerate(parents)]
+        conn = self._connection()
+        conn.execute('INSERT OR REPLACE INTO scaffolds VALUES (?, ?)', key)
+        conn.execute('DELETE FROM parents WHERE namespace = ? AND child = ?', key)
+        conn.executemany('INSERT INTO parents VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        self._pending += 1
+        if self._pending >= self.commit_interval:
+            self.flush()
+
+    def __contains__(self, key):
+        query = 'SELECT 1 FROM scaffolds WHERE namespace = ? AND child = ?'
+        return self._connection().execute(query, key).fetchone() is not None
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM scaffolds').fetchone()[0]
+
+    def info(self):
+        """CacheInfo : Return the hits, misses, maxsize and current size of the cache."""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self))
+
+    def clear(self):
+        """Empty the cache and reset the hit/miss statistics."""
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM scaffolds')
+            conn.execute('DELETE FROM parents')
+        self._pending = 0
+        self.hits = 0
+        self.misses = 0
+
+    def flush(self):
+        """Commit pending entries to the database."""
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.commit()
+        self._pending = 0
+
+    def close(self):
+        """Commit pending entries and close the database connection."""
+        self.flush()
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+    def fork(self):
+        """SQLiteFragmentCache : Return a cache on the same database for a worker process."""
+        return SQLiteFragmentCache(self.path, self.commit_interval)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_conn=None, _pid=None, _pending=0)
+        return state
+
+    def __repr__(self):
+        return '<{_cls} at {address}>'.format(
+            _cls=self.__class__.__name__,
+            address=hex(id(self))
+        )
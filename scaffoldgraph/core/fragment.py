@@ -8,6 +8,7 @@ from loguru import logger
 
 from rdkit import RDLogger
 from rdkit.Chem import (
+    Mol,
     RWMol,
     MolToSmiles,
     rdmolops,
@@ -22,7 +23,9 @@ from rdkit.Chem import (
 )
 from rdkit.Chem.Scaffolds import MurckoScaffold
 
-from scaffoldgraph.core.scaffold import Scaffold
+from scaffoldgraph.core.cache import FragmentCache
+from scaffoldgraph.core.scaffold import Scaffold, ScaffoldRecord
+from scaffoldgraph.utils.parallel import get_n_jobs, chunked, ordered_imap
 
 rdlogger = RDLogger.logger()
 
@@ -43,6 +46,12 @@ class Fragmenter(ABC):
     the fragment method return scaffolds as
     scaffoldgraph.core.Scaffold objects.
 
+    Subclasses may also define the ``fragment_many`` method, which
+    fragments a batch of scaffolds, to amortize setup costs across
+    scaffolds or use vectorized or parallel back-ends. The graph
+    constructors fragment the scaffolds of each hierarchy level in
+    batches (see ``ScaffoldGraph._fragment_many``).
+
     The __call__ method can be used as an alias to the fragment
     function.
 
@@ -68,6 +77,39 @@ class Fragmenter(ABC):
         """
         raise NotImplementedError()
 
+    def fragment_many(self, scaffolds):
+        """Fragment a batch of scaffolds.
+
+        The default implementation calls ``fragment`` for each scaffold,
+        subclasses may override this method to fragment the batch more
+        efficiently.
+
+        Parameters
+        ----------
+        scaffolds : list
+            A list of child scaffolds (scaffoldgraph.core.Scaffold) to be
+            fragmented.
+
+        Returns
+        -------
+        list
+            A list containing the next set of parent scaffolds for each
+            child scaffold, in the order supplied.
+
+        """
+        return [self.fragment(scaffold) for scaffold in scaffolds]
+
+    @property
+    def signature(self):
+        """str : Return a string identifying the fragmenter and its options.
+
+        The signature is used to key fragment caches. Subclasses with
+        options which change the result of fragmentation should include
+        them in the signature.
+
+        """
+        return self.__class__.__name__
+
     def __repr__(self):
         return '<{_cls} at {address}>'.format(
             _cls=self.__class__.__name__,
@@ -84,12 +126,27 @@ class MurckoRingFragmenter(Fragmenter):
     that are one hierarchy below the supplied child scaffold (i.e.
     one ring less).
 
+    Attributes
+    ----------
+    skipped : int
+        The number of ring removals skipped by the aromatic dissection
+        pre-check, i.e. removals for which the resulting molecule was
+        predicted to fail sanitization without being edited.
+
     Notes
     -----
     This paticular implementation will also fragment fused ring
     systems. If this behaviour is not desired the
     ``MurckoRingSystemFragmenter`` may be used instead.
 
+    Removing a ring fused to an aromatic system may leave an aromatic
+    system which cannot be kekulized, in which case no parents are
+    produced for the removal. Such removals are predicted from the
+    topology and aromaticity of the affected atoms and skipped before
+    the molecule is edited. The prediction is conservative, removals
+    which cannot be predicted are attempted as usual. Removals skipped
+    in worker processes (``n_jobs`` > 1) are not counted.
+
     See Also
     --------
     scaffoldgraph.core.fragment.MurckoRingSystemFragmenter
@@ -121,6 +178,33 @@ class MurckoRingFragmenter(Fragmenter):
         """
         super(MurckoRingFragmenter, self).__init__()
         self.use_scheme_4 = use_scheme_4
+        self.skipped = 0
+
+    @property
+    def signature(self):
+        """str : Return a string identifying the fragmenter and its options."""
+        return '{}(use_scheme_4={})'.format(self.__class__.__name__, self.use_scheme_4)
+
+    def applies_scheme_4(self, scaffold):
+        """Return True if scheme 4 modifies the fragmentation of a scaffold.
+
+        If False the fragmenter produces the same parent scaffolds as a
+        fragmenter with ``use_scheme_4=False``.
+
+        Parameters
+        ----------
+        scaffold : scaffoldgraph.core.Scaffold
+            Child scaffold to be fragmented.
+
+        Returns
+        -------
+        bool
+
+        """
+        if self.use_scheme_4 is False:
+            return False
+        rings = scaffold.rings
+        return any(_scheme_4_fusion_bond(ring, rings) is not None for ring in rings)
 
     def fragment(self, scaffold):
         """Fragment a scaffold into its next set of Murcko fragments.
@@ -138,8 +222,16 @@ class MurckoRingFragmenter(Fragmenter):
         """
         parents = []  # container for parent scaffolds
         rings = scaffold.rings  # ring information
+        topology = None  # built if aromatic dissection is to be checked
 
         for rix, ring in enumerate(rings):  # Loop through all rings and remove
+            if self._dissects_aromatic_system(scaffold, ring, rings):
+                if topology is None:
+                    topology = _FragmentTopology(scaffold)
+                if topology.dissection_fails(*topology.plan_removal(ring)):
+                    self.skipped += 1
+                    continue
+
             edit = RWMol(scaffold.mol)  # Editable molecule
 
             # Collect all removable atoms in the molecule
@@ -147,7 +239,7 @@ class MurckoRingFragmenter(Fragmenter):
             for index, atom in zip(ring.aix, ring.atoms):
                 if rings.info.NumAtomRings(index) == 1:
                     if atom.GetDegree() > 2:  # Evoke linker collection
-                        collect_linker_atoms(edit.GetAtomWithIdx(index), remove_atoms)
+                        _remove_linker(edit, scaffold.linkers.collect(index), remove_atoms)
                     else:  # Add ring atom to removable set
                         remove_atoms.add(index)
                 else:  # Atom is shared between multiple rings
@@ -166,13 +258,11 @@ class MurckoRingFragmenter(Fragmenter):
                     correct_atom_props(edit.GetAtomWithIdx(b_y))
 
             # Scheme 4 (scaffold tree rule)
-            if self.use_scheme_4 is not False and len(ring) == 3:
-                atomic_nums = [a.GetAtomicNum() for a in ring.atoms]
-                if len([a for a in atomic_nums if a != 1 and a != 6]) == 1:
-                    shared = {x for x in ring.bix if rings.info.NumBondRings(x) > 1}
-                    if len(shared) == 1:
-                        bond = edit.GetBondWithIdx(shared.pop())
-                        bond.SetBondType(BondType.DOUBLE)
+            if self.use_scheme_4 is not False:
+                fusion_bix = _scheme_4_fusion_bond(ring, rings)
+                if fusion_bix is not None:
+                    bond = edit.GetBondWithIdx(fusion_bix)
+                    bond.SetBondType(BondType.DOUBLE)
 
             # Remove collected atoms and bonds
             for bix in remove_bonds:
@@ -188,6 +278,470 @@ class MurckoRingFragmenter(Fragmenter):
 
         return parents
 
+    def _dissects_aromatic_system(self, scaffold, ring, rings):
+        """Private: Return True if removing a ring may dissect a fused aromatic system.
+
+        Removals to which scheme 4 applies are not checked.
+
+        """
+        info, atoms = rings.info, scaffold.atoms
+        for index in ring.aix:
+            if info.NumAtomRings(index) > 1 and atoms[index].GetIsAromatic():
+                return self.use_scheme_4 is False or _scheme_4_fusion_bond(ring, rings) is None
+        return False
+
+
+def _scheme_4_fusion_bond(ring, rings):
+    """Private: Return the index of the fusion bond converted by scheme 4 when removing a ring.
+
+    Scheme 4 applies to three-membered rings containing a single heteroatom
+    and sharing a single bond with other rings (i.e. epoxides and aziridines).
+
+    Parameters
+    ----------
+    ring : scaffoldgraph.core.scaffold.Ring
+        The ring being removed.
+    rings : scaffoldgraph.core.scaffold.RingStack
+        Ring information of the scaffold.
+
+    Returns
+    -------
+    int, None
+        The index of the fusion bond or None if scheme 4 does not apply.
+
+    """
+    if len(ring) != 3:
+        return None
+    atomic_nums = [a.GetAtomicNum() for a in ring.atoms]
+    if len([a for a in atomic_nums if a != 1 and a != 6]) != 1:
+        return None
+    shared = {x for x in ring.bix if rings.info.NumBondRings(x) > 1}
+    if len(shared) != 1:
+        return None
+    return shared.pop()
+
+
+class IndexedMurckoRingFragmenter(MurckoRingFragmenter):
+    """
+    A MurckoRingFragmenter planning ring removals on integer index arrays.
+
+    The fragmenter produces identical parent scaffolds to the
+    ``MurckoRingFragmenter``, but plans the removal of every ring
+    (including the collection of linker atoms) on integer adjacency
+    and ring membership arrays built once per child scaffold. The
+    connected components left by each removal are counted on the
+    arrays and an rdkit molecule is only edited, sanitized and
+    wrapped in a Scaffold for components which may pass the ring
+    count check. Components which cannot pass the check are rejected
+    without being materialized.
+
+    The fragmenter shares the signature of the ``MurckoRingFragmenter``
+    so that fragment caches may be shared between the two.
+
+    Examples
+    --------
+    >>> from scaffoldgraph.core import Scaffold
+    >>> scaffold = Scaffold.from_smiles('c1ccc(CC2CCN(Cc3ccccc3)CC2)cc1')
+    >>> parents = IndexedMurckoRingFragmenter().fragment(scaffold)
+    >>> sorted(p.smiles for p in parents)
+    ['c1ccc(CC2CCNCC2)cc1', 'c1ccc(CN2CCCCC2)cc1']
+
+    See Also
+    --------
+    scaffoldgraph.core.fragment.MurckoRingFragmenter
+
+    """
+    @property
+    def signature(self):
+        """str : Return a string identifying the fragmenter and its options."""
+        return 'MurckoRingFragmenter(use_scheme_4={})'.format(self.use_scheme_4)
+
+    def fragment(self, scaffold):
+        """Fragment a scaffold into its next set of Murcko fragments.
+
+        Parameters
+        ----------
+        scaffold : scaffoldgraph.core.Scaffold
+            Child scaffold to be fragmented.
+
+        Returns
+        -------
+        list
+            A list of parent scaffolds representing the next hierarchy.
+
+        """
+        parents = []
+        rings = scaffold.rings
+        target = len(rings) - 1
+        topology = _FragmentTopology(scaffold)
+
+        for rix, ring in enumerate(rings):
+            remove_atoms, remove_bonds, correct_atoms = topology.plan_removal(ring)
+            if self._dissects_aromatic_system(scaffold, ring, rings):
+                if topology.dissection_fails(remove_atoms, remove_bonds, correct_atoms):
+                    self.skipped += 1
+                    continue
+            fusion_bix = None
+            if self.use_scheme_4 is not False:
+                fusion_bix = _scheme_4_fusion_bond(ring, rings)
+            keep, discard = topology.split_components(
+                remove_atoms, remove_bonds, fusion_bix, target
+            )
+            if not keep:  # no component can pass the ring count check
+                continue
+            if discard is not None:
+                remove_atoms = remove_atoms.union(discard)
+
+            # Materialize the remaining components
+            edit = RWMol(scaffold.mol)
+            for aix in correct_atoms:
+                correct_atom_props(edit.GetAtomWithIdx(aix))
+            if fusion_bix is not None:
+                edit.GetBondWithIdx(fusion_bix).SetBondType(BondType.DOUBLE)
+            for bix in remove_bonds:
+                edit.RemoveBond(*topology.bond_atoms[bix])
+            for aix in sorted(remove_atoms, reverse=True):
+                edit.RemoveAtom(aix)
+
+            for parent in _materialize_frags(edit):
+                if parent.rings.count == target:
+                    parent.removed_ring_idx = rix
+                    parents.append(parent)
+
+        return parents
+
+
+def _materialize_frags(frag):
+    """Private: Get fragments from a disconnected structure (see ``get_scaffold_frags``).
+
+    Scaffolds are only collected into a set (requiring a canonical
+    identifier) when the structure contains more than one fragment.
+
+    """
+    try:
+        partial_sanitization(frag)
+    except ValueError as e:
+        logger.debug(e)
+        return []
+    frags = GetMolFrags(frag, True, False)
+    if len(frags) == 1:
+        return [Scaffold(frags[0])]
+    return {Scaffold(f) for f in frags}
+
+
+_RING_BOND_TYPES = {BondType.SINGLE, BondType.DOUBLE, BondType.TRIPLE, BondType.AROMATIC}
+
+
+class _FragmentTopology(object):
+    """Private: Integer adjacency and ring membership arrays of a scaffold.
+
+    Used by the ``IndexedMurckoRingFragmenter`` to plan the removal of
+    rings without editing an rdkit molecule.
+
+    """
+    __slots__ = (
+        'atoms',
+        'linkers',
+        'degree',
+        'aromatic',
+        'num_atom_rings',
+        'num_bond_rings',
+        'bond_atoms',
+        'bond_types',
+        'neighbors',
+        'atom_rings',
+        'bond_rings',
+        'countable',
+    )
+
+    def __init__(self, scaffold):
+        rings, linkers = scaffold.rings, scaffold.linkers
+        info = rings.info
+        atoms = scaffold.atoms
+        self.atoms = atoms
+        self.linkers = linkers
+        self.degree = linkers.degree
+        self.aromatic = [a.GetIsAromatic() for a in atoms]
+        self.num_atom_rings = [info.NumAtomRings(i) for i in range(len(atoms))]
+        self.atom_rings = rings.atom_rings
+        self.bond_rings = rings.bond_rings
+        self.neighbors = linkers.neighbors
+        self.bond_atoms = linkers.bond_atoms
+        self.bond_types = linkers.bond_types
+        self.num_bond_rings = linkers.num_bond_rings
+        # Rings may only be counted on the arrays if every bond is considered
+        # during ring perception (i.e. dative bonds are not)
+        self.countable = all(t in _RING_BOND_TYPES for t in self.bond_types)
+
+    def plan_removal(self, ring):
+        """Return the atoms and bonds removed and the atoms corrected when removing a ring.
+
+        Mirrors the removal performed by ``MurckoRingFragmenter.fragment``.
+
+        Returns
+        -------
+        tuple
+            A tuple of sets (remove_atoms, remove_bonds, correct_atoms).
+
+        """
+        remove_atoms, correct_atoms = set(), set()
+        for index in ring.aix:
+            if self.num_atom_rings[index] == 1:
+                if self.degree[index] > 2:  # Evoke linker collection
+                    linker = self.linkers.collect(index)
+                    remove_atoms.update(linker.atoms)
+                    correct_atoms.update(linker.corrected)
+                else:
+                    remove_atoms.add(index)
+            else:  # Atom is shared between multiple rings
+                correct_atoms.add(index)
+        remove_bonds = set()
+        for bix in ring.bix:
+            if self.num_bond_rings[bix] == 1:
+                x, y = self.bond_atoms[bix]
+                if x not in remove_atoms and y not in remove_atoms:
+                    remove_bonds.add(bix)
+                    correct_atoms.add(x)
+                    correct_atoms.add(y)
+        return remove_atoms, remove_bonds, correct_atoms
+
+    def split_components(self, remove_atoms, remove_bonds, fusion_bix, target):
+        """Find the components remaining after a removal which may contain `target` rings.
+
+        The number of rings of each component is bounded using its
+        cyclomatic number (bonds - atoms + 1), which is a lower bound
+        for the size of the symmetrized SSSR and equal to it when the
+        cycles of the component are vertex-disjoint rings of the child.
+        Components which may match the target are kept (and checked
+        after materialization).
+
+        Parameters
+        ----------
+        remove_atoms : set
+        remove_bonds : set
+        fusion_bix : int, None
+            Index of a bond converted to a double bond (scheme 4).
+        target : int
+            The number of rings required in a parent scaffold.
+
+        Returns
+        -------
+        tuple
+            A tuple (keep, discard) where keep is True if any component
+            may pass the ring count check and discard is a set of atom
+            indexes of components which can be removed before
+            sanitization (or None if the molecule should be sanitized
+            with all components, as sanitization may fail for them).
+
+        """
+        if not self.countable:
+            return True, None
+        # Traverse the components of the remaining atoms
+        components, seen = [], set(remove_atoms)
+        neighbors = self.neighbors
+        for start in range(len(neighbors)):
+            if start in seen:
+                continue
+            seen.add(start)
+            atoms, stack, num_bonds = [start], [start], 0
+            while stack:
+                for bix, other in neighbors[stack.pop()]:
+                    if bix in remove_bonds or other in remove_atoms:
+                        continue
+                    num_bonds += 1
+                    if other not in seen:
+                        seen.add(other)
+                        atoms.append(other)
+                        stack.append(other)
+            # each bond is encountered from both atoms
+            components.append((atoms, num_bonds // 2 - len(atoms) + 1))
+
+        # Atoms for which sanitization may fail (modified aromatic atoms)
+        unstable = set()
+        aromatic = self.aromatic
+        for aix in remove_atoms:
+            for _, other in neighbors[aix]:
+                if aromatic[other] and other not in remove_atoms:
+                    unstable.add(other)
+        for bix in remove_bonds:
+            unstable.update(a for a in self.bond_atoms[bix] if aromatic[a])
+        if fusion_bix is not None:
+            unstable.update(self.bond_atoms[fusion_bix])
+
+        keep, discard, stable = False, set(), True
+        for atoms, cyclomatic in components:
+            if cyclomatic == target or (
+                    cyclomatic < target and not self._is_exact(atoms, cyclomatic, remove_atoms, remove_bonds)):
+                keep = True
+            else:
+                discard.update(atoms)
+                if stable and not unstable.isdisjoint(atoms):
+                    stable = False
+        return keep, (discard if stable else None)
+
+    def _is_exact(self, atoms, cyclomatic, remove_atoms, remove_bonds):
+        """Private: Return True if the number of rings of a component equals its cyclomatic number."""
+        if cyclomatic <= 1:
+            return True
+        atoms = set(atoms)
+        seen, retained = set(), 0
+        for aix, bix in zip(self.atom_rings, self.bond_rings):
+            if aix[0] not in atoms:
+                continue
+            if not atoms.issuperset(aix) or not remove_bonds.isdisjoint(bix):
+                continue
+            if not seen.isdisjoint(aix):  # rings must be vertex-disjoint
+                return False
+            seen.update(aix)
+            retained += 1
+        return retained == cyclomatic
+
+    def dissection_fails(self, remove_atoms, remove_bonds, correct_atoms):
+        """Return True if sanitization is certain to fail after a removal.
+
+        Aromatic atoms which lose a neighbor are traced to the aromatic
+        systems remaining after the removal. Each atom of these systems
+        is classified as requiring a double bond or not (i.e. aromatic
+        carbon vs. pyrrole-type nitrogen) and the system cannot be
+        kekulized if no perfect matching of the atoms requiring a double
+        bond exists. The prediction is conservative, if any atom cannot
+        be classified False is returned.
+
+        Parameters
+        ----------
+        remove_atoms : set
+        remove_bonds : set
+        correct_atoms : set
+            Atoms to which ``correct_atom_props`` is applied.
+
+        Returns
+        -------
+        bool
+
+        """
+        aromatic, neighbors, bond_types = self.aromatic, self.neighbors, self.bond_types
+        modified = set()
+        for aix in remove_atoms:
+            for _, other in neighbors[aix]:
+                if aromatic[other] and other not in remove_atoms:
+                    modified.add(other)
+        for bix in remove_bonds:
+            modified.update(a for a in self.bond_atoms[bix] if aromatic[a])
+
+        seen = set()
+        for start in modified:
+            if start in seen:
+                continue
+            # Collect the aromatic system and atoms requiring a double bond
+            seen.add(start)
+            stack, candidates = [start], {}
+            while stack:
+                aix = stack.pop()
+                kept = [(b, o) for b, o in neighbors[aix] if b not in remove_bonds and o not in remove_atoms]
+                requires_double = self._requires_double_bond(aix, kept, aix in correct_atoms)
+                if requires_double is None:
+                    return False
+                arom = [o for b, o in kept if bond_types[b] == BondType.AROMATIC]
+                if requires_double:
+                    candidates[aix] = arom
+                for other in arom:
+                    if other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+            graph = {a: [o for o in nbrs if o in candidates] for a, nbrs in candidates.items()}
+            if _has_perfect_matching(graph) is False:
+                return True
+        return False
+
+    def _requires_double_bond(self, aix, kept, corrected):
+        """Private: Return True if an aromatic atom requires a double bond when kekulized.
+
+        Follows the valence model used by rdkit when kekulizing, where
+        aromatic bonds contribute 1 to the bond order of an atom. Returns
+        None if the atom cannot be classified.
+
+        """
+        atom = self.atoms[aix]
+        if atom.GetNumRadicalElectrons() != 0:
+            return None
+        num_aromatic, num_double, order = 0, 0, 0
+        for bix, _ in kept:
+            bond_type = self.bond_types[bix]
+            if bond_type == BondType.AROMATIC:
+                num_aromatic += 1
+            elif bond_type == BondType.SINGLE:
+                order += 1
+            elif bond_type == BondType.DOUBLE:
+                num_double += 1
+                order += 2
+            else:
+                return None
+        if num_aromatic == 0:
+            return None
+        atomic_num, charge = atom.GetAtomicNum(), atom.GetFormalCharge()
+        if atomic_num == 6 and charge == 0:
+            if num_double == 0:  # implicit hydrogens fill the valence
+                return num_aromatic + order <= 3
+            if num_aromatic == 2 and num_double == 1 and order == 2:
+                return False  # i.e. the carbonyl carbon of a pyridone
+            return None
+        hs = 1 if corrected else atom.GetNumExplicitHs()
+        total = num_aromatic + order + hs
+        if atomic_num == 16 and charge == 0:  # thiophene-type sulfur
+            return False if total == 2 else None
+        valence = _AROMATIC_VALENCE.get((atomic_num, charge))
+        if valence is None:
+            return None
+        if total + 1 == valence:
+            return True
+        if total == valence:
+            return False
+        return None
+
+
+_AROMATIC_VALENCE = {(7, 0): 3, (7, 1): 4, (8, 0): 2, (8, 1): 3}
+
+
+def _has_perfect_matching(graph, max_steps=1000):
+    """Private: Return True if a graph (adjacency dict) has a perfect matching.
+
+    Returns None if the search exceeds `max_steps`.
+
+    """
+    if len(graph) % 2:
+        return False
+    matched = set()
+    steps = [0]
+
+    def search():
+        steps[0] += 1
+        if steps[0] > max_steps:
+            return None
+        # match the unmatched atom with the fewest options first
+        best, options = None, None
+        for aix, nbrs in graph.items():
+            if aix in matched:
+                continue
+            free = [o for o in nbrs if o not in matched]
+            if best is None or len(free) < len(options):
+                best, options = aix, free
+                if not free:
+                    return False
+        if best is None:
+            return True
+        matched.add(best)
+        for other in options:
+            matched.add(other)
+            result = search()
+            matched.discard(other)
+            if result is not False:
+                matched.discard(best)
+                return result
+        matched.discard(best)
+        return False
+
+    return search()
+
 
 class MurckoRingSystemFragmenter(Fragmenter):
     """A Fragmenter class for the removal of peripheral ring systems from a
@@ -228,19 +782,21 @@ class MurckoRingSystemFragmenter(Fragmenter):
         """
         parents = []
         rings = scaffold.ring_systems  # ring system information
-        info = scaffold.rings.info
 
         if rings.count == 1:
             return []
+        shared = scaffold.rings.shared_atom_mask  # atoms in > 1 ring
+        linkers = scaffold.linkers
+        degree, neighbors, num_bond_rings = linkers.degree, linkers.neighbors, linkers.num_bond_rings
         for rix, ring in enumerate(rings):
             edit = RWMol(scaffold.mol)
             remove_atoms = set()
-            for index, atom in zip(ring.aix, ring.atoms):
-                if info.NumAtomRings(index) == 1 or any([not b.IsInRing() for b in atom.GetBonds()]):
-                    if atom.GetDegree() > 2:  # Evoke linker collection
-                        collect_linker_atoms(edit.GetAtomWithIdx(index), remove_atoms)
-                    else:
-                        remove_atoms.add(index)
+            for index in ring.aix:
+                if degree[index] > 2 and (
+                    not shared >> index & 1
+                    or any(num_bond_rings[b] == 0 for b, _ in neighbors[index])
+                ):  # Evoke linker collection
+                    _remove_linker(edit, linkers.collect(index), remove_atoms)
                 else:
                     remove_atoms.add(index)
 
@@ -255,6 +811,13 @@ class MurckoRingSystemFragmenter(Fragmenter):
         return parents
 
 
+def _remove_linker(edit, linker, remove_atoms):
+    """Private: Add the atoms of a collected linker to a removal set and correct its ends."""
+    remove_atoms.update(linker.atoms)
+    for index in linker.corrected:
+        correct_atom_props(edit.GetAtomWithIdx(index))
+
+
 def collect_linker_atoms(origin, remove_atoms, include_origin=True):
     """Collect atoms that are part of a linker.
 
@@ -284,8 +847,11 @@ def collect_linker_atoms(origin, remove_atoms, include_origin=True):
     visited = set()  # Visited bond indexes
     ring_attachments = set()  # Linker ring attachments
 
-    def collect(origin_atom):
-
+    # Linker is iteratively collected
+    # Linker atoms are added to the existing set 'remove_atoms'
+    stack = [origin]
+    while stack:
+        origin_atom = stack.pop()
         for bond in origin_atom.GetBonds():
             bond_id = bond.GetIdx()
             if bond_id in visited or bond.IsInRing():
@@ -303,7 +869,7 @@ def collect_linker_atoms(origin, remove_atoms, include_origin=True):
             elif other_degree == 2:  # Two neighboring atoms (remove)
                 remove_atoms.add(origin_atom.GetIdx())
                 visited.add(bond_id)
-                collect(other_atom)
+                stack.append(other_atom)
 
             elif other_degree > 2:  # Branching point
 
@@ -316,7 +882,7 @@ def collect_linker_atoms(origin, remove_atoms, include_origin=True):
                 if non_terminal_branches < 3:  # Continue with deletion
                     remove_atoms.add(origin_atom.GetIdx())
                     visited.add(bond_id)
-                    collect(other_atom)
+                    stack.append(other_atom)
 
                 else:  # Branching point links two rings
                     # Test for exolinker double bond
@@ -327,10 +893,6 @@ def collect_linker_atoms(origin, remove_atoms, include_origin=True):
                     if other_atom.IsInRing():
                         ring_attachments.add(other_atom.GetIdx())
 
-    # Linker is recursively collected
-    # Linker atoms are added to the existing set 'remove_atoms'
-    collect(origin)
-
     if include_origin is False:
         remove_atoms.discard(origin.GetIdx())
     if origin.IsInRing():
@@ -505,7 +1067,7 @@ def get_next_murcko_fragments(murcko_scaffold, break_fused_rings=True):
 
 
 # fragmenter is hierarchical so all fragments may not be returned (fix?).
-def get_all_murcko_fragments(mol, break_fused_rings=True):
+def get_all_murcko_fragments(mol, break_fused_rings=True, fragment_cache=None):
     """
     Get all possible murcko fragments from a molecule through
     recursive removal of peripheral rings.
@@ -515,6 +1077,10 @@ def get_all_murcko_fragments(mol, break_fused_rings=True):
     mol : rdkit.Chem.rdchem.Mol
     break_fused_rings : bool, optional
         If True dissect fused rings. The default is True.
+    fragment_cache : scaffoldgraph.core.FragmentCache, optional
+        A cache memoizing the fragmentation of scaffolds, which may be
+        shared with graph constructors and between calls, i.e. a
+        ``SQLiteFragmentCache``. If None (default) no cache is used.
 
     Returns
     -------
@@ -530,26 +1096,204 @@ def get_all_murcko_fragments(mol, break_fused_rings=True):
     >>> molecule = Chem.MolFromSmiles(smiles)
     >>> frags = get_all_murcko_fragments(molecule)
 
+    See Also
+    --------
+    iter_all_murcko_fragments
+
     """
     rdlogger.setLevel(4)
+    fragmenter = _murcko_fragmenter(break_fused_rings)
+    try:
+        parents = _all_murcko_fragments(mol, fragmenter, fragment_cache)
+    finally:
+        if fragment_cache is not None:
+            fragment_cache.flush()
+        rdlogger.setLevel(3)
+    return [f.mol for f in parents]
+
+
+def iter_all_murcko_fragments(mols, break_fused_rings=True, fragment_cache=None, n_jobs=1,
+                              output='smiles', chunksize=64, cache_size=10000):
+    """Generate all possible murcko fragments for each molecule in an iterable.
+
+    A batched version of ``get_all_murcko_fragments``. A single fragmenter
+    and fragment cache are shared by all molecules, such that scaffolds
+    common to many molecules are only fragmented once, and results are
+    streamed in input order.
+
+    Parameters
+    ----------
+    mols : iterable
+        An iterable of rdkit molecules (i.e. a supplier).
+    break_fused_rings : bool, optional
+        If True dissect fused rings. The default is True.
+    fragment_cache : scaffoldgraph.core.FragmentCache, optional
+        A cache memoizing the fragmentation of scaffolds. If None (default)
+        an in-memory ``FragmentCache`` of `cache_size` is used. Each worker
+        process uses a fork of the cache (see ``FragmentCache.fork``).
+    n_jobs : int, None, optional
+        Number of worker processes. If None or < 1 all available CPUs are
+        used. The default is 1 (no multiprocessing).
+    output : {'smiles', 'binary', 'mol'}, optional
+        The format of the returned fragments, canonical SMILES (default),
+        rdkit molecules in binary format or rdkit molecules.
+    chunksize : int, optional
+        Number of molecules sent to a worker at a time. The default is 64.
+    cache_size : int, None, optional
+        The maximum size of the fragment cache created if `fragment_cache`
+        is None. The default is 10000.
+
+    Yields
+    ------
+    list, None
+        A list of Murcko fragments for each input molecule, or None if
+        the molecule is None.
+
+    Examples
+    --------
+    >>> from rdkit import Chem
+    >>> supplier = Chem.SmilesMolSupplier('my_file.smi')
+    >>> for frags in iter_all_murcko_fragments(supplier, n_jobs=4):
+    ...     print(frags)
+
+    """
+    if fragment_cache is None:
+        fragment_cache = FragmentCache(cache_size)
+    fragmenter = _murcko_fragmenter(break_fused_rings)
+    args = (fragmenter, fragment_cache)
+    return _iter_fragments(_all_murcko_fragments, args, mols, n_jobs, output, chunksize)
+
 
+def _murcko_fragmenter(break_fused_rings):
+    """Private: Return the fragmenter used to generate murcko fragments."""
     if break_fused_rings:
-        fragmenter = MurckoRingFragmenter()
-    else:
-        fragmenter = MurckoRingSystemFragmenter()
+        return MurckoRingFragmenter()
+    return MurckoRingSystemFragmenter()
+
 
+def _all_murcko_fragments(mol, fragmenter, fragment_cache=None):
+    """Private: Return all murcko fragments of a molecule as Scaffolds (in order of generation)."""
     mol = get_murcko_scaffold(mol)
     rdmolops.RemoveStereochemistry(mol)
     scaffold = Scaffold(mol)
-    parents = {scaffold}
-
-    def recursive_generation(child):
-        for parent in fragmenter.fragment(child):
-            if parent in parents:
+    parents, seen = [scaffold], {scaffold}
+    stack = [scaffold]
+    while stack:
+        child = stack.pop()
+        for parent in reversed(_cached_fragment(child, fragmenter, fragment_cache)):
+            if parent in seen:
                 continue
-            parents.add(parent)
-            recursive_generation(parent)
+            seen.add(parent)
+            parents.append(parent)
+            stack.append(parent)
+    return parents
 
-    recursive_generation(scaffold)
-    rdlogger.setLevel(3)
-    return [f.mol for f in parents]
+
+def _cached_fragment(child, fragmenter, fragment_cache=None):
+    """Private: Fragment a scaffold, consulting a fragment cache if supplied."""
+    if fragment_cache is None:
+        return fragmenter.fragment(child)
+    key = (fragmenter.signature, child.get_canonical_identifier())
+    fragments = fragment_cache.get(key)
+    if fragments is None:
+        fragments = [p for p in fragmenter.fragment(child) if p]
+        fragment_cache[key] = fragments
+    return [_as_scaffold(p) for p in fragments]
+
+
+def _as_scaffold(scaffold):
+    """Private: Return a Scaffold from a cached Scaffold or ScaffoldRecord."""
+    if isinstance(scaffold, ScaffoldRecord):
+        return scaffold.to_scaffold()
+    return scaffold
+
+
+_OUTPUT_FORMATS = {'smiles', 'binary', 'mol'}
+_worker_state = None  # (generate, args, output) of a fragment worker process
+
+
+def _iter_fragments(generate, args, mols, n_jobs, output, chunksize):
+    """Private: Apply a fragment generating function to an iterable of molecules.
+
+    Parameters
+    ----------
+    generate : callable
+        A module level function called as ``generate(mol, *args)`` and
+        returning a list of Scaffolds.
+    args : tuple
+        Further (picklable) arguments to `generate`. The last argument must
+        be the fragment cache, which is flushed when the iterable is
+        exhausted and forked for worker processes.
+    mols : iterable
+        An iterable of rdkit molecules.
+    n_jobs : int, None
+        Number of worker processes.
+    output : {'smiles', 'binary', 'mol'}
+        The format of the returned fragments.
+    chunksize : int
+        Number of molecules sent to a worker at a time.
+
+    """
+    if output not in _OUTPUT_FORMATS:
+        raise ValueError(f'output must be one of {{smiles, binary, mol}} not {output}')
+    n_jobs = get_n_jobs(n_jobs)
+    if n_jobs <= 1:
+        return _iter_fragments_serial(generate, args, mols, output)
+    return _iter_fragments_parallel(generate, args, mols, n_jobs, output, chunksize)
+
+
+def _iter_fragments_serial(generate, args, mols, output):
+    """Private: Generate fragments in the current process."""
+    rdlogger.setLevel(4)
+    try:
+        for mol in mols:
+            if mol is None:
+                yield None
+            elif output == 'mol':
+                yield [Mol(f.mol) for f in generate(mol, *args)]
+            else:
+                yield _encode_fragments(generate(mol, *args), output)
+    finally:
+        args[-1].flush()
+        rdlogger.setLevel(3)
+
+
+def _iter_fragments_parallel(generate, args, mols, n_jobs, output, chunksize):
+    """Private: Generate fragments in worker processes, in input order."""
+    cache = args[-1]
+    state = (generate, args[:-1] + (cache.fork(), ), 'smiles' if output == 'smiles' else 'binary')
+    binaries = (None if m is None else m.ToBinary() for m in mols)
+    results = ordered_imap(_fragment_worker, chunked(binaries, chunksize), n_jobs,
+                           _init_fragment_worker, (state, ))
+    for chunk in results:
+        for frags in chunk:
+            if frags is not None and output == 'mol':
+                frags = [Mol(b) for b in frags]
+            yield frags
+
+
+def _encode_fragments(fragments, output):
+    """Private: Return a list of Scaffolds as SMILES or binary molecules."""
+    if output == 'smiles':
+        return [f.smiles for f in fragments]
+    return [f.to_binary() for f in fragments]
+
+
+def _init_fragment_worker(state):
+    """Private: Initialize a worker process for fragment generation."""
+    global _worker_state
+    rdlogger.setLevel(4)
+    _worker_state = state
+
+
+def _fragment_worker(binaries):
+    """Private: Generate the fragments of a chunk of molecules in a worker process."""
+    generate, args, output = _worker_state
+    result = []
+    for binary in binaries:
+        if binary is None:
+            result.append(None)
+        else:
+            result.append(_encode_fragments(generate(Mol(binary), *args), output))
+    args[-1].flush()
+    return result
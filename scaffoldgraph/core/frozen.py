@@ -0,0 +1,608 @@
+"""
+scaffoldgraph.core.frozen
+
+Defines an immutable, compact representation of a ScaffoldGraph.
+"""
+
+from collections import Counter, deque
+from collections.abc import Mapping
+
+import numpy as np
+
+from scaffoldgraph.utils import canonize_smiles
+
+from .store import MoleculeStore
+
+__all__ = ['FrozenScaffoldGraph']
+
+
+class _Missing(object):
+    """Private: Placeholder for absent attribute values (a picklable singleton)."""
+    __slots__ = ()
+
+    def __reduce__(self):
+        return '_MISSING'
+
+    def __repr__(self):
+        return '<missing>'
+
+
+_MISSING = _Missing()
+_SCAFFOLD, _MOLECULE = 0, 1  # node type codes
+
+
+def _index_dtype(size):
+    """Private: Return the smallest integer dtype able to index `size` items."""
+    return np.int32 if size < np.iinfo(np.int32).max else np.int64
+
+
+def _csr(keys, index, adjacency, edge_columns=None):
+    """Private: Build a CSR (indptr, indices) pair from a networkx adjacency.
+
+    Parameters
+    ----------
+    keys : list
+        Node keys in node id order.
+    index : dict
+        Mapping of node keys to node ids.
+    adjacency : dict
+        A networkx adjacency (i.e. graph._succ or graph._pred).
+    edge_columns : dict, optional
+        If supplied, edge attributes are appended to columns keyed by
+        attribute name, aligned with the CSR indices.
+
+    """
+    indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+    indices = []
+    for i, key in enumerate(keys):
+        nbrs = adjacency[key]
+        indptr[i + 1] = indptr[i] + len(nbrs)
+        for nbr, d in nbrs.items():
+            if edge_columns is not None:
+                position = len(indices)
+                for attr, value in d.items():
+                    column = edge_columns.get(attr)
+                    if column is None:
+                        column = edge_columns[attr] = _Column()
+                    column.set(position, value)
+            indices.append(index[nbr])
+    if edge_columns is not None:
+        for column in edge_columns.values():
+            column.pad(len(indices))
+    return indptr, np.array(indices, dtype=_index_dtype(len(keys)))
+
+
+class _Column(object):
+    """Private: A list of attribute values with interned duplicates.
+
+    Equal values are stored as a single object, which significantly
+    reduces the memory required for repetitive attributes (i.e. the
+    prioritization rule of tree edges).
+
+    """
+    __slots__ = ('values', '_interned')
+
+    def __init__(self):
+        self.values = []
+        self._interned = {}
+
+    def set(self, position, value):
+        try:
+            value = self._interned.setdefault(value, value)
+        except TypeError:  # unhashable
+            pass
+        self.pad(position)
+        self.values.append(value)
+
+    def pad(self, size):
+        if len(self.values) < size:
+            self.values.extend([_MISSING] * (size - len(self.values)))
+
+    def __getitem__(self, position):
+        return self.values[position]
+
+    def __getstate__(self):
+        return self.values
+
+    def __setstate__(self, state):
+        self.values = state
+        self._interned = {}
+
+
+class _FrozenNodeView(Mapping):
+    """Private: A read-only view of the nodes of a FrozenScaffoldGraph.
+
+    Mirrors the behaviour of the networkx ``NodeView``, node attribute
+    dictionaries are created on access.
+
+    """
+    __slots__ = ('_graph', )
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, node):
+        return self._graph._node_data(self._graph._index[node])
+
+    def __iter__(self):
+        return iter(self._graph._keys)
+
+    def __len__(self):
+        return len(self._graph._keys)
+
+    def __contains__(self, node):
+        return node in self._graph._index
+
+    def __call__(self, data=False, default=None):
+        return self._graph._format(range(len(self)), data, default)
+
+
+class FrozenScaffoldGraph(object):
+    """An immutable and compact representation of a ScaffoldGraph.
+
+    Node keys are interned to integer ids, parent/child adjacency is held
+    in compressed sparse row (CSR) NumPy arrays and node types and
+    hierarchy levels are held in typed arrays. Remaining node and edge
+    attributes are stored column-wise. The frozen graph offers the query
+    API of a ``ScaffoldGraph``, using far less memory than the equivalent
+    networkx representation and providing faster traversal. A mutable
+    graph can be recovered using the ``thaw`` method.
+
+    Frozen graphs are created using ``ScaffoldGraph.freeze``.
+
+    Examples
+    --------
+    >>> import scaffoldgraph as sg
+    >>> network = sg.ScaffoldNetwork.from_sdf('my_file.sdf')
+    >>> frozen = network.freeze()
+    >>> frozen.get_child_scaffolds('c1ccccc1')
+    ['O=C(NCc1ccccc1)c1ccccc1', 'c1ccc(Cc2ccccc2)cc1', ...]
+    >>> network = frozen.thaw()
+
+    Notes
+    -----
+    Missing hierarchy levels are stored as -1.
+
+    """
+    def __init__(self, graph):
+        """Initialize a FrozenScaffoldGraph.
+
+        Parameters
+        ----------
+        graph : scaffoldgraph.core.ScaffoldGraph
+            The graph to freeze.
+
+        """
+        keys = list(graph)
+        index = {k: i for i, k in enumerate(keys)}
+        n = len(keys)
+        type_codes = {'scaffold': _SCAFFOLD, 'molecule': _MOLECULE}
+        types = np.empty(n, dtype=np.int8)
+        hierarchy = np.full(n, -1, dtype=np.int32)
+        node_columns = {}
+        store = graph.molecule_store
+        for i, (key, d) in enumerate(graph.nodes(data=True)):
+            if store is not None and d.get('type') == 'molecule':
+                d = graph.get_molecule_data(key)
+            types[i] = type_codes.setdefault(d.get('type', _MISSING), len(type_codes))
+            if d.get('hierarchy') is not None:
+                hierarchy[i] = d['hierarchy']
+            for attr, value in d.items():
+                if attr == 'type' or attr == 'hierarchy':
+                    continue
+                column = node_columns.get(attr)
+                if column is None:
+                    column = node_columns[attr] = _Column()
+                column.set(i, value)
+        for column in node_columns.values():
+            column.pad(n)
+        edge_columns = {}
+        self._keys = keys
+        self._index = index
+        self._type_names = list(type_codes)
+        self._types = types
+        self._hierarchy = hierarchy
+        self._node_columns = node_columns
+        self._succ_indptr, self._succ_indices = _csr(keys, index, graph._succ, edge_columns)
+        self._pred_indptr, self._pred_indices = _csr(keys, index, graph._pred)
+        self._edge_columns = edge_columns
+        self.graph = dict(graph.graph)
+        template = graph._empty_copy()
+        template.fragment_cache = graph.fragment_cache
+        self._template = template
+        self._molecule_store = store is not None
+
+    def _node_data(self, i):
+        """Private: Return a new attribute dictionary for node id `i`."""
+        d = {}
+        node_type = self._type_names[self._types[i]]
+        if node_type is not _MISSING:
+            d['type'] = node_type
+        if self._hierarchy[i] >= 0:
+            d['hierarchy'] = int(self._hierarchy[i])
+        for attr, column in self._node_columns.items():
+            value = column[i]
+            if value is not _MISSING:
+                d[attr] = value
+        return d
+
+    def _node_attr(self, i, attr, default=None):
+        """Private: Return a single attribute for node id `i`."""
+        if attr == 'type':
+            value = self._type_names[self._types[i]]
+        elif attr == 'hierarchy':
+            value = int(self._hierarchy[i]) if self._hierarchy[i] >= 0 else _MISSING
+        else:
+            column = self._node_columns.get(attr)
+            value = column[i] if column is not None else _MISSING
+        return default if value is _MISSING else value
+
+    def _edge_data(self, position):
+        """Private: Return a new attribute dictionary for the edge at a CSR position."""
+        d = {}
+        for attr, column in self._edge_columns.items():
+            value = column[position]
+            if value is not _MISSING:
+                d[attr] = value
+        return d
+
+    def _format(self, ids, data=False, default=None):
+        """Private: Return nodes ids as keys or (key, data) tuples as in networkx."""
+        keys = self._keys
+        if data is False:
+            return [keys[i] for i in ids]
+        elif data is True:
+            return [(keys[i], self._node_data(i)) for i in ids]
+        return [(keys[i], self._node_attr(i, data, default)) for i in ids]
+
+    def _bfs(self, start, reverse=False):
+        """Private: Return node ids in breadth-first order from a start id.
+
+        The start node is excluded and neighbours are visited in the order
+        of the original graph, such that the order is identical to that of
+        ``networkx.bfs_tree``.
+
+        """
+        if reverse:
+            indptr, indices = self._pred_indptr, self._pred_indices
+        else:
+            indptr, indices = self._succ_indptr, self._succ_indices
+        seen, order = {start}, []
+        queue = deque([start])
+        while queue:
+            i = queue.popleft()
+            for j in indices[indptr[i]:indptr[i + 1]].tolist():
+                if j not in seen:
+                    seen.add(j)
+                    order.append(j)
+                    queue.append(j)
+        return order
+
+    def _lookup_scaffold(self, scaffold_smiles):
+        """Private: Return the node id of a scaffold SMILES or None if not found."""
+        i = self._index.get(scaffold_smiles)
+        if i is None:
+            i = self._index.get(canonize_smiles(scaffold_smiles, failsafe=True))
+        return i
+
+    @property
+    def nodes(self):
+        """A read-only view of the nodes in the graph."""
+        return _FrozenNodeView(self)
+
+    def edges(self, data=False, default=None):
+        """Return a list of edges in the graph.
+
+        Parameters
+        ----------
+        data : str, bool, optional
+            The edge attribute returned in 3-tuple (u, v, ddict[data]).
+            If True, return entire edge attribute dict as (u, v, ddict).
+            If False, return just the edges (u, v). The default is False.
+        default : value, bool, optional
+            Value used for edges that don't have the requested attribute.
+            Only relevant if data is not True or False.
+
+        """
+        keys, edges = self._keys, []
+        indptr, indices = self._succ_indptr, self._succ_indices.tolist()
+        for u in range(len(keys)):
+            for position in range(indptr[u], indptr[u + 1]):
+                edge = (keys[u], keys[indices[position]])
+                if data is True:
+                    edge += (self._edge_data(position), )
+                elif data is not False:
+                    column = self._edge_columns.get(data)
+                    value = column[position] if column is not None else _MISSING
+                    edge += (default if value is _MISSING else value, )
+                edges.append(edge)
+        return edges
+
+    def get_edge_data(self, u, v, default=None):
+        """Return the attribute dictionary of an edge or `default` if not found."""
+        i, j = self._index.get(u), self._index.get(v)
+        if i is None or j is None:
+            return default
+        start = self._succ_indptr[i]
+        match = np.flatnonzero(self._succ_indices[start:self._succ_indptr[i + 1]] == j)
+        if len(match) == 0:
+            return default
+        return self._edge_data(start + match[0])
+
+    def successors(self, node):
+        """list : Return the successors of a node."""
+        i = self._index[node]
+        return self._format(self._succ_indices[self._succ_indptr[i]:self._succ_indptr[i + 1]].tolist())
+
+    def predecessors(self, node):
+        """list : Return the predecessors of a node."""
+        i = self._index[node]
+        return self._format(self._pred_indices[self._pred_indptr[i]:self._pred_indptr[i + 1]].tolist())
+
+    def number_of_nodes(self):
+        """int : Return the number of nodes in the graph."""
+        return len(self._keys)
+
+    def number_of_edges(self):
+        """int : Return the number of edges in the graph."""
+        return len(self._succ_indices)
+
+    @property
+    def num_scaffold_nodes(self):
+        """int : Return the number of scaffold nodes in the graph."""
+        return int(np.count_nonzero(self._types == _SCAFFOLD))
+
+    @property
+    def num_molecule_nodes(self):
+        """int : Return the number of molecule nodes in the graph."""
+        return int(np.count_nonzero(self._types == _MOLECULE))
+
+    def get_scaffold_nodes(self, data=False, default=None):
+        """Return a list of all scaffold nodes in the graph.
+
+        Parameters
+        ----------
+        data : str, bool, optional
+            The scaffold node attribute returned in 2-tuple (n, ddict[data]).
+            If True, return entire node attribute dict as (n, ddict).
+            If False, return just the nodes n. The default is False.
+        default : value, bool, optional
+            Value used for nodes that don't have the requested attribute.
+            Only relevant if data is not True or False.
+
+        """
+        return self._format(np.flatnonzero(self._types == _SCAFFOLD).tolist(), data, default)
+
+    def get_molecule_nodes(self, data=False, default=None):
+        """Return a list of all molecule nodes in the graph.
+
+        Parameters
+        ----------
+        data : str, bool, optional
+            The molecule node attribute returned in 2-tuple (n, ddict[data]).
+            If True, return entire node attribute dict as (n, ddict).
+            If False, return just the nodes n. The default is False.
+        default : value, bool, optional
+            Value used for nodes that don't have the requested attribute.
+            Only relevant if data is not True or False.
+
+        """
+        return self._format(np.flatnonzero(self._types == _MOLECULE).tolist(), data, default)
+
+    def get_hierarchy_sizes(self):
+        """
+        Return a ``collections.Counter`` object indicating the number of scaffolds
+        within each hierarchy level.
+
+        """
+        levels = self._hierarchy[(self._types == _SCAFFOLD) & (self._hierarchy >= 0)]
+        values, counts = np.unique(levels, return_counts=True)
+        return Counter(dict(zip(values.tolist(), counts.tolist())))
+
+    def max_hierarchy(self):
+        """int : Return the largest hierarchy level"""
+        return max(self.get_hierarchy_sizes())
+
+    def min_hierarchy(self):
+        """int : Return the smallest hierarchy level"""
+        return min(self.get_hierarchy_sizes())
+
+    def get_scaffolds_in_hierarchy(self, hierarchy):
+        """Return a list of all scaffolds within a specified hierarchy.
+
+        Parameters
+        ----------
+        hierarchy : int
+            The hierarchy level to retrieve.
+
+        """
+        mask = (self._types == _SCAFFOLD) & (self._hierarchy == int(hierarchy))
+        return self._format(np.flatnonzero(mask).tolist())
+
+    def get_scaffolds_by_hierarchy(self, data=False, default=None, reverse=False):
+        """Return a list of all scaffold nodes in order of hierarchy.
+
+        Parameters
+        ----------
+        data : str, bool, optional
+            The scaffold node attribute returned in 2-tuple (n, ddict[data]).
+            If True, return entire node attribute dict as (n, ddict).
+            If False, return just the nodes n. The default is False.
+        default : value, bool, optional
+            Value used for nodes that don't have the requested attribute.
+            Only relevant if data is not True or False.
+        reverse : bool, optional
+            If True return scaffolds in descending order of hierarchy. The
+            default is False.
+
+        """
+        ids = np.flatnonzero((self._types == _SCAFFOLD) & (self._hierarchy >= 0))
+        levels = self._hierarchy[ids]
+        order = np.argsort(-levels if reverse else levels, kind='stable')
+        return self._format(ids[order].tolist(), data, default)
+
+    def scaffold_in_graph(self, scaffold_smiles):
+        """Returns True if the specified scaffold SMILES is in the scaffold graph.
+
+        Parameters
+        ----------
+        scaffold_smiles : str
+            SMILES of query scaffold.
+
+        """
+        i = self._lookup_scaffold(scaffold_smiles)
+        return i is not None and self._types[i] == _SCAFFOLD
+
+    def molecule_in_graph(self, molecule_id):
+        """Returns True if specified molecule ID is in the scaffold graph.
+
+        Parameters
+        ----------
+        molecule_id : str
+            ID of query molecule.
+
+        """
+        i = self._index.get(str(molecule_id))
+        return i is not None and self._types[i] == _MOLECULE
+
+    def get_molecules_for_scaffold(self, scaffold_smiles, data=False, default=None):
+        """Return a list of molecule IDs which are represented by a scaffold in the graph.
+
+        Parameters
+        ----------
+        scaffold_smiles : str
+            SMILES of query scaffold.
+        data : str, bool, optional
+            The molecule node attribute returned in 2-tuple (n, ddict[data]).
+            If True, return entire node attribute dict as (n, ddict).
+            If False, return just the nodes n. The default is False.
+        default : value, bool, optional
+            Value used for nodes that don't have the requested attribute.
+            Only relevant if data is not True or False.
+
+        """
+        i = self._lookup_scaffold(scaffold_smiles)
+        if i is None:
+            return []
+        ids = [j for j in [i] + self._bfs(i) if self._types[j] == _MOLECULE]
+        return self._format(ids, data, default)
+
+    def get_scaffolds_for_molecule(self, molecule_id, data=False, default=None):
+        """Return a list of scaffold SMILES connected to a query molecule ID.
+
+        Parameters
+        ----------
+        molecule_id:  str
+            ID of query molecule.
+        data : str, bool, optional
+            The scaffold node attribute returned in 2-tuple (n, ddict[data]).
+            If True, return entire node attribute dict as (n, ddict).
+            If False, return just the nodes n. The default is False.
+        default : value, bool, optional
+            Value used for nodes that don't have the requested attribute.
+            Only relevant if data is not True or False.
+
+        """
+        i = self._index.get(molecule_id)
+        if i is None:
+            return []
+        ids = [j for j in [i] + self._bfs(i, reverse=True) if self._types[j] == _SCAFFOLD]
+        return self._format(ids, data, default)
+
+    def _get_scaffold_hierarchy(self, scaffold_smiles, data=False, default=None, max_levels=-1, traversal='parent'):
+        """Private: Return a list of parent/child scaffolds for a query scaffold."""
+        assert traversal in {'parent', 'child'}
+        i = self._lookup_scaffold(scaffold_smiles)
+        if i is None:
+            return []
+        ids = np.array(self._bfs(i, reverse=traversal == 'parent'), dtype=np.int64)
+        mask = self._types[ids] == _SCAFFOLD
+        if max_levels >= 0:
+            level = self._hierarchy[i] if self._hierarchy[i] >= 0 else np.inf
+            mask &= np.abs(level - np.maximum(self._hierarchy[ids], 0)) <= max_levels
+        return self._format(ids[mask].tolist(), data, default)
+
+    def get_parent_scaffolds(self, scaffold_smiles, data=False, default=None, max_levels=-1):
+        """Return a list of parent scaffolds for a query scaffold.
+
+        Parameters
+        ----------
+        scaffold_smiles : str
+            SMILES of query scaffold.
+        data : str, bool, optional
+            The scaffold node attribute returned in 2-tuple (n, ddict[data]).
+            If True, return entire node attribute dict as (n, ddict).
+            If False, return just the nodes n. The default is False.
+        default : value, bool, optional
+            Value used for nodes that don't have the requested attribute.
+            Only relevant if data is not True or False.
+        max_levels : int, optional
+            If > 0 only return scaffolds with a hierarchy difference to the
+            query scaffold of `max_levels`.
+
+        """
+        return self._get_scaffold_hierarchy(scaffold_smiles, data, default, max_levels, 'parent')
+
+    def get_child_scaffolds(self, scaffold_smiles, data=False, default=None, max_levels=-1):
+        """Return a list of child scaffolds for a query scaffold.
+
+        Parameters
+        ----------
+        scaffold_smiles : str
+            SMILES of query scaffold.
+        data : str, bool, optional
+            The scaffold node attribute returned in 2-tuple (n, ddict[data]).
+            If True, return entire node attribute dict as (n, ddict).
+            If False, return just the nodes n. The default is False.
+        default : value, bool, optional
+            Value used for nodes that don't have the requested attribute.
+            Only relevant if data is not True or False.
+        max_levels : int, optional
+            If > 0 only return scaffolds with a hierarchy difference to the
+            query scaffold of `max_levels`.
+
+        """
+        return self._get_scaffold_hierarchy(scaffold_smiles, data, default, max_levels, 'child')
+
+    def thaw(self):
+        """Return a mutable copy of the graph.
+
+        Returns
+        -------
+        ScaffoldGraph
+            A graph of the type which was frozen, with identical nodes,
+            edges and attributes.
+
+        """
+        graph = self._template._empty_copy()
+        graph.fragment_cache = self._template.fragment_cache
+        graph.graph.update(self.graph)
+        if self._molecule_store:
+            graph.molecule_store = MoleculeStore()
+        for node, attr in self.nodes(data=True):
+            graph._add_node_data(node, attr)
+        graph.add_edges_from(graph._interned_edges(self.edges(data=True)))
+        # restore the predecessor order of the original graph (edges are
+        # added grouped by source, which only preserves the successor order).
+        keys, pred = self._keys, graph._pred
+        for v in range(len(keys)):
+            preds = self._pred_indices[self._pred_indptr[v]:self._pred_indptr[v + 1]].tolist()
+            if len(preds) > 1:
+                nbrs = pred[keys[v]]
+                pred[keys[v]] = {keys[u]: nbrs[keys[u]] for u in preds}
+        return graph
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __contains__(self, node):
+        return node in self._index
+
+    def __repr__(self):
+        return '<{_cls} at {address}>'.format(
+            _cls=self.__class__.__name__,
+            address=hex(id(self))
+        )
@@ -4,10 +4,14 @@ scaffoldgraph.core.graph
 Defines the base class for scaffold graphs in ScaffoldGraph
 """
 
+import multiprocessing
+
 from abc import ABC, abstractmethod
 from collections import Counter
+from itertools import islice
 
 import networkx as nx
+import numpy as np
 import rdkit
 import gzip
 
@@ -15,18 +19,27 @@ from loguru import logger
 from tqdm.auto import tqdm
 
 from rdkit import RDLogger
-from rdkit.Chem import rdMolHash, MolToSmiles, rdmolops
+from rdkit.Chem import rdMolHash, MolToSmiles, rdmolops, Mol, PropertyPickleOptions
 from rdkit.Chem.rdMolDescriptors import CalcNumRings
 
 from scaffoldgraph.io import *
 from scaffoldgraph.utils import canonize_smiles
+from scaffoldgraph.utils.parallel import get_n_jobs, chunked, ordered_imap
 
+from .budget import BudgetExceeded, BudgetReport
 from .fragment import get_murcko_scaffold, get_annotated_murcko_scaffold
-from .scaffold import Scaffold
+from .frozen import FrozenScaffoldGraph
+from .membership import MembershipIndex
+from .reachability import ReachabilityIndex
+from .store import MoleculeStore
+from .scaffold import Scaffold, ScaffoldRecord
 
 rdlogger = RDLogger.logger()
 rdversion = rdkit.__version__
 
+_worker_graph = None  # scaffold graph private to a construction worker process
+_worker_args = None
+
 
 def init_molecule_name(mol):
     """Initialize the name of a molecule if not provided.
@@ -56,6 +69,137 @@ def init_molecule_name(mol):
         mol.SetProp('_Name', n)
 
 
+def prepare_molecule(molecule, ring_cutoff=10, annotate=True):
+    """Prepare a molecule for addition to a scaffold graph.
+
+    The molecule is named (see ``init_molecule_name``), filtered by its
+    number of rings and stripped of stereochemistry, and its Murcko scaffold
+    and annotated scaffold SMILES are computed. The result is independent
+    of the type of graph, so that a molecule may be prepared once when
+    building multiple graphs.
+
+    Parameters
+    ----------
+    molecule : rdkit.Chem.rdchem.Mol
+        Molecule to prepare (modified in place).
+    ring_cutoff : int, optional
+        Filter the molecule if it contains more than the specified number
+        of rings. The default is 10.
+    annotate : bool, optional
+        If True compute an annotated murcko scaffold SMILES string for the
+        molecule edge (molecule --> scaffold). The default is True.
+
+    Returns
+    -------
+    tuple, None
+        A (scaffold, annotation) tuple or None if the molecule is filtered
+        or has no top-level scaffold. The annotation is None if `annotate`
+        is False.
+
+    """
+    init_molecule_name(molecule)
+    if CalcNumRings(molecule) > ring_cutoff:
+        name = molecule.GetProp('_Name')
+        logger.warning(f'Molecule {name} filtered (> {ring_cutoff} rings)')
+        return None
+    rdmolops.RemoveStereochemistry(molecule)
+    scaffold = Scaffold(get_murcko_scaffold(molecule))
+    if not scaffold:  # Checks that a scaffold has at least 1 atom
+        name = molecule.GetProp('_Name')
+        logger.warning(f'No top level scaffold for molecule {name}')
+        return None
+    annotation = None
+    if annotate:
+        annotation = get_annotated_murcko_scaffold(molecule, scaffold.mol, False)
+    return scaffold, annotation
+
+
+def _num_rings(scaffold):
+    """Private: Return the number of rings in a scaffold or scaffold record."""
+    if isinstance(scaffold, ScaffoldRecord):
+        return scaffold.num_rings
+    return scaffold.rings.count
+
+
+_TEMPLATE_ATTRS = ('type', 'hierarchy', 'budget_exceeded', 'truncated')  # scaffold attributes copied to workers
+
+
+def _init_construct_worker(template, ring_cutoff, annotate, budget=None):
+    """Initialize a worker process for parallel graph construction."""
+    global _worker_graph, _worker_args
+    rdlogger.setLevel(4)
+    _worker_graph = template
+    _worker_graph._reexpanded = []
+    _worker_args = (ring_cutoff, annotate, budget)
+
+
+def _expand_worker(binaries):
+    """Fragment a chunk of scaffolds in a worker process.
+
+    Parameters
+    ----------
+    binaries : list
+        A list of scaffold molecules in binary format.
+
+    Returns
+    -------
+    list
+        A list of (parent, attr) lists, where each parent is a scaffold
+        molecule in binary format.
+
+    """
+    graph = _worker_graph
+    children = [Scaffold(Mol(binary)) for binary in binaries]
+    result = []
+    for parents in graph._expand_many(children):
+        result.append([(p.to_binary(), attr) for p, attr in parents])
+    if graph.fragment_cache is not None:
+        graph.fragment_cache.flush()
+    return result
+
+
+def _construct_worker(binaries):
+    """Process a chunk of molecules in a worker process.
+
+    Molecules are added to the worker's private graph. Scaffold nodes are
+    retained between calls, so that hierarchies which have already been
+    produced by this worker are not produced again. Molecule nodes are
+    removed once processed.
+
+    Parameters
+    ----------
+    binaries : list
+        A list of rdkit molecules in binary format.
+
+    Returns
+    -------
+    list
+        A list of (name, nodes, edges, expanded) tuples, one per molecule,
+        containing the molecule ID, the nodes and edges (with attributes)
+        which are new to the worker graph and the truncated scaffolds whose
+        hierarchy was expanded (see ``_expand_truncated``).
+
+    """
+    graph = _worker_graph
+    result = []
+    for binary in binaries:
+        molecule = Mol(binary)
+        name = molecule.GetProp('_Name')
+        n_nodes = graph.number_of_nodes()
+        graph._add_molecule(molecule, *_worker_args)
+        new_nodes = list(islice(graph.nodes, n_nodes, None))
+        reexpanded, graph._reexpanded = graph._reexpanded, []
+        nodes = [(n, graph.nodes[n]) for n in new_nodes]
+        edges = [e for n in new_nodes + reexpanded for e in graph.in_edges(n, data=True)]
+        expanded = [n for n in reexpanded if not graph.nodes[n].get('truncated')]
+        result.append((name, nodes, edges, expanded))
+        if graph.nodes.get(name, {}).get('type') == 'molecule':
+            graph.remove_node(name)
+    if graph.fragment_cache is not None:
+        graph.fragment_cache.flush()
+    return result
+
+
 class ScaffoldGraph(nx.DiGraph, ABC):
     """Base class for ScaffoldGraphs.
 
@@ -77,6 +221,24 @@ class ScaffoldGraph(nx.DiGraph, ABC):
     fragmenter : scaffoldgraph.core.fragment.Fragmenter
         A ``scaffoldgraph.core.fragment.Fragmenter`` class for producing
         the next scaffold set for a given molecular input.
+    fragment_cache : scaffoldgraph.core.cache.FragmentCache, None
+        A cache memoizing the fragmentation of scaffolds, consulted by
+        the graph constructors before fragmenting a scaffold. A persistent
+        cache (``SQLiteFragmentCache``) may be used to share results
+        between runs.
+    molecule_store : scaffoldgraph.core.store.MoleculeStore, None
+        A columnar store holding the properties of molecule nodes, if
+        None (default) properties are stored as node attributes.
+    compact_scaffolds : bool
+        If True scaffolds which are not being expanded during construction
+        (cached fragmentation results and pending levels) are held as
+        ``ScaffoldRecord`` objects rather than full Scaffolds.
+    membership_index : scaffoldgraph.core.membership.MembershipIndex, None
+        An index of the molecules represented by each scaffold, if
+        enabled with ``build_membership_index``, else None.
+    reachability_index : scaffoldgraph.core.reachability.ReachabilityIndex, None
+        An index of the parent/child scaffolds (at any level) of each
+        scaffold, if enabled with ``build_reachability_index``, else None.
 
     **Subclasses:**
 
@@ -104,7 +266,8 @@ class ScaffoldGraph(nx.DiGraph, ABC):
     HierS
 
     """
-    def __init__(self, graph=None, fragmenter=None, graph_type=None, **attr):
+    def __init__(self, graph=None, fragmenter=None, graph_type=None, fragment_cache=None,
+                 molecule_store=False, compact_scaffolds=False, **attr):
         """ Initialize a ScaffoldGraph.
 
         Parameters
@@ -123,15 +286,46 @@ class ScaffoldGraph(nx.DiGraph, ABC):
         graph_type : str, optional
             The type of graph being constructed (set as a global
             graph attribute).
+        fragment_cache : {FragmentCache, SQLiteFragmentCache}, optional
+            A cache memoizing the fragmentation of scaffolds during
+            construction. If None (default) no cache is used.
+        molecule_store : bool, optional
+            If True store the properties of molecule nodes (including
+            SMILES) in a columnar ``MoleculeStore`` rather than as node
+            attributes, reducing memory use and retaining the data types
+            of properties. The default is False.
+        compact_scaffolds : bool, optional
+            If True hold scaffolds which are not being expanded during
+            construction (fragmentation results stored in the fragment
+            cache, siblings awaiting expansion and pending levels) as
+            compact ``ScaffoldRecord`` objects, which drop the rdkit Mol
+            of the scaffold. Full scaffolds are rebuilt when their
+            hierarchy is expanded, reducing peak memory use for large
+            builds at the cost of rebuilding molecules. The default is
+            False.
         **attr : keyword arguments, optional
             Attributes to add to graph as key=value pairs. The default is
             no attributes.
 
         """
+        self.molecule_store = MoleculeStore() if molecule_store else None
+        self.compact_scaffolds = compact_scaffolds
+        self._scaffold_ids = {}  # identifier --> interned integer id
+        self._scaffold_keys = []  # interned integer id --> identifier
+        self._index_membership = False
+        self._membership = None  # discarded when the graph changes
+        self._index_reachability = False
+        self._reachability = None  # discarded when the graph changes
+        self._node_registries = {}  # node type (None if untyped) --> {node: None} in insertion order
+        self._hierarchy_buckets = {}  # hierarchy level --> {scaffold: None}
         super(ScaffoldGraph, self).__init__(graph, graph_type=graph_type, **attr)
         self.fragmenter = fragmenter
+        self.fragment_cache = fragment_cache
+        self._budget = None  # budget of the molecule being expanded
+        self._reexpanded = None  # truncated scaffolds expanded by a worker
 
-    def _construct(self, molecules, ring_cutoff=10, progress=False, annotate=True):
+    def _construct(self, molecules, ring_cutoff=10, progress=False, annotate=True, n_jobs=1,
+                   engine='recursive', budget=None, replace=None):
         """Private method for graph construction, called by constructors.
 
         Parameters
@@ -146,40 +340,523 @@ class ScaffoldGraph(nx.DiGraph, ABC):
             molecule edge (molecule --> scaffold). The default is True.
         progress : bool
             If True show a progress bar monitoring progress. The default is False
+        n_jobs : int, None, optional
+            Number of worker processes used for construction. If None or < 1
+            all available CPUs are used. The default is 1 (no multiprocessing).
+        engine : {'recursive', 'level'}, optional
+            The construction engine. 'recursive' (default) expands the scaffold
+            hierarchy of each molecule in turn, 'level' expands the hierarchies
+            of all molecules one level at a time (see ``_construct_levels``).
+        budget : scaffoldgraph.core.ConstructionBudget, optional
+            A per-molecule budget limiting the expansion of each hierarchy.
+            Only supported by the 'recursive' engine. With n_jobs > 1 each
+            worker expands the molecules it receives against its own partial
+            graph, such that the scaffolds counted against the budget of a
+            molecule (and so the truncated hierarchies) may differ from a
+            serial construction. The default is None.
+        replace : callable, optional
+            If provided, called with the ID of each molecule which is already
+            a molecule node in the graph before the molecule is added (in
+            input order, for all engines). The default is None.
 
         """
+        if engine not in {'recursive', 'level'}:
+            raise ValueError(f'engine must be one of {{recursive, level}} not {engine}')
+        if engine == 'level' and budget is not None:
+            raise ValueError('budgets are not supported by the level engine')
         rdlogger.setLevel(4)  # Suppress the RDKit logs
-        progress = progress is False
+        n_jobs = get_n_jobs(n_jobs)
+        if engine == 'level':
+            self._construct_levels(molecules, ring_cutoff, progress, annotate, n_jobs, replace)
+        elif n_jobs > 1:
+            self._construct_parallel(molecules, ring_cutoff, progress, annotate, n_jobs, budget, replace=replace)
+        else:
+            progress = progress is False
+            desc = self.__class__.__name__
+            for molecule in tqdm(molecules, disable=progress, desc=desc, miniters=1, dynamic_ncols=True):
+                if molecule is None:  # logged in suppliers
+                    continue
+                self._replace_existing(molecule.GetProp('_Name'), replace)
+                self._add_molecule(molecule, ring_cutoff, annotate, budget)
+        if self.fragment_cache is not None:
+            self.fragment_cache.flush()
+        rdlogger.setLevel(3)  # Enable the RDKit logs
+
+    def _replace_existing(self, molecule_id, replace):
+        """Private: Call `replace` with a molecule ID if it is already a molecule node in the graph."""
+        if replace is not None and self.molecule_in_graph(molecule_id):
+            replace(molecule_id)
+
+    def _add_molecule(self, molecule, ring_cutoff=10, annotate=True, budget=None):
+        """Private: Add a molecule and its scaffold hierarchy to the graph.
+
+        Parameters
+        ----------
+        molecule : rdkit.Chem.rdchem.Mol
+            Molecule to process.
+        ring_cutoff : int, optional
+            Ignore the molecule if it contains more than the specified number
+            of rings. The default is 10.
+        annotate : bool, optional
+            If True write an annotated murcko scaffold SMILES string to the
+            molecule edge (molecule --> scaffold). The default is True.
+        budget : scaffoldgraph.core.ConstructionBudget, optional
+            A budget limiting the expansion of the hierarchy. The default
+            is None.
+
+        """
+        prepared = prepare_molecule(molecule, ring_cutoff, annotate)
+        if prepared is not None:
+            self._add_prepared_molecule(molecule, *prepared, budget=budget)
+
+    def _add_prepared_molecule(self, molecule, scaffold, annotation=None, budget=None):
+        """Private: Add a prepared molecule and its scaffold hierarchy to the graph.
+
+        Parameters
+        ----------
+        molecule : rdkit.Chem.rdchem.Mol
+            Molecule to process.
+        scaffold : scaffoldgraph.core.Scaffold
+            The Murcko scaffold of the molecule (see ``prepare_molecule``).
+        annotation : str, optional
+            An annotated murcko scaffold SMILES string written to the molecule
+            edge (molecule --> scaffold). The default is None.
+        budget : scaffoldgraph.core.ConstructionBudget, optional
+            A budget limiting the expansion of the hierarchy. The default
+            is None.
+
+        Notes
+        -----
+        If the budget is exceeded under the 'keep' policy, the top-level
+        scaffold and the scaffolds added while expanding its hierarchy are
+        flagged with the node attribute 'truncated', as their hierarchies
+        may be incomplete. Truncated scaffolds are expanded again when they
+        are reached by a later molecule (see ``_expand_truncated``), such
+        that a partial hierarchy is not treated as complete.
+
+        """
+        scaffold = self._add_top_level_scaffold(molecule, scaffold, annotation)
+        if scaffold is None:
+            return
+        key = scaffold.get_canonical_identifier()
+        if budget is None:
+            self._recursive_constructor(scaffold)
+            self.nodes[key].pop('truncated', None)
+            return
+        n_nodes = self.number_of_nodes()
+        self._budget = budget
+        budget.start()
+        try:
+            self._recursive_constructor(scaffold)
+        except BudgetExceeded as e:
+            name = molecule.GetProp('_Name')
+            logger.warning(f'Molecule {name} exceeded its construction budget ({e})')
+            new_nodes = list(islice(self.nodes, n_nodes, None))
+            if budget.policy == 'skip':  # remove the partial hierarchy
+                self.remove_nodes_from(new_nodes)
+                self.remove_edges_from(list(self.in_edges(key)))
+                self.nodes[key].pop('truncated', None)
+            else:  # flag hierarchies which may be incomplete
+                self.nodes[key]['truncated'] = True
+                for node in new_nodes:
+                    if self.nodes[node].get('hierarchy', 0) > 1:
+                        self.nodes[node]['truncated'] = True
+            self.nodes[key]['budget_exceeded'] = e.reason
+            self._flag_budget_exceeded(name, e.reason)
+        else:
+            self.nodes[key].pop('truncated', None)
+        finally:
+            self._budget = None
+
+    def _expand_truncated(self, scaffold):
+        """Private: Expand the hierarchy of an existing scaffold if it was truncated by a budget.
+
+        Recursive constructors call this method when a parent scaffold is
+        already in the graph. The 'truncated' flag of the scaffold is
+        removed once its hierarchy has been expanded without exceeding a
+        budget.
+
+        """
+        key = scaffold.get_canonical_identifier()
+        if not self.nodes[key].get('truncated'):
+            return
+        if self._reexpanded is not None:
+            self._reexpanded.append(key)
+        self._recursive_constructor(self._restore(scaffold))
+        del self.nodes[key]['truncated']
+
+    def _check_budget(self):
+        """Private: Consume the budget of the molecule being expanded for a new sub-scaffold.
+
+        Recursive constructors call this method before adding a new scaffold
+        node to the graph.
+
+        Raises
+        ------
+        scaffoldgraph.core.budget.BudgetExceeded
+            If the budget of the molecule is exceeded.
+
+        """
+        if self._budget is not None:
+            self._budget.check()
+
+    def _flag_budget_exceeded(self, molecule_id, reason):
+        """Private: Flag a molecule node whose construction budget was exceeded."""
+        if self.molecule_store is not None:
+            self.molecule_store.update(molecule_id, {'budget_exceeded': reason})
+        else:
+            self.nodes[molecule_id]['budget_exceeded'] = reason
+
+    def _add_top_level_scaffold(self, molecule, scaffold, annotation=None):
+        """Private: Add a molecule and its Murcko scaffold to the graph.
+
+        Parameters
+        ----------
+        molecule : rdkit.Chem.rdchem.Mol
+            Molecule to process.
+        scaffold : scaffoldgraph.core.Scaffold
+            The Murcko scaffold of the molecule (see ``prepare_molecule``).
+        annotation : str, optional
+            An annotated murcko scaffold SMILES string written to the molecule
+            edge (molecule --> scaffold). The default is None.
+
+        Returns
+        -------
+        scaffoldgraph.core.Scaffold, None
+            The scaffold if its hierarchy should be expanded (it is new to
+            the graph and contains more than one ring), else None.
+
+        """
+        expanded = scaffold in self  # hierarchy already in the graph
+        if expanded and self.nodes[scaffold].get('truncated'):
+            expanded = False  # hierarchy truncated by a budget, expand again
+            if self._reexpanded is not None:
+                self._reexpanded.append(scaffold.get_canonical_identifier())
+        self.add_scaffold_node(scaffold)
+        self.add_molecule_node(molecule)
+        self.add_molecule_edge(molecule, scaffold, annotation=annotation)
+        reason = self.nodes[scaffold].get('budget_exceeded') if expanded else None
+        if reason is not None:  # the hierarchy of the scaffold exceeded a budget
+            self._flag_budget_exceeded(molecule.GetProp('_Name'), reason)
+        if scaffold.rings.count > 1 and not expanded:
+            return scaffold
+        return None
+
+    def _construct_levels(self, molecules, ring_cutoff, progress, annotate, n_jobs, replace=None):
+        """Private: Construct the graph one hierarchy level at a time.
+
+        All molecules and their (deduplicated) top-level scaffolds are first
+        added to the graph. Scaffolds are then expanded iteratively from the
+        highest hierarchy downward, such that each unique scaffold in a level
+        is fragmented exactly once across the whole dataset and the parents
+        of a level are bulk-inserted before the next level is processed. As
+        a parent scaffold always contains fewer rings than its child, all of
+        the children of a scaffold are processed before it is fragmented.
+        No recursion is used, and the result is equal to that of the
+        recursive engine.
+
+        Parameters
+        ----------
+        molecules : iterable
+            An iterable of rdkit molecules for processing.
+        ring_cutoff : int
+            Ignore molecules with more than the specified number of rings.
+        progress : bool
+            If True show progress bars monitoring progress.
+        annotate : bool
+            If True write an annotated murcko scaffold SMILES string to each
+            molecule edge (molecule --> scaffold).
+        n_jobs : int
+            Number of worker processes used to fragment each level.
+        replace : callable, optional
+            Called with the ID of each molecule already in the graph (see
+            ``_construct``).
+
+        """
         desc = self.__class__.__name__
-        for molecule in tqdm(molecules, disable=progress, desc=desc, miniters=1, dynamic_ncols=True):
+        disable = progress is False
+        pending = {}  # hierarchy --> {identifier: scaffold}
+        for molecule in tqdm(molecules, disable=disable, desc=desc, miniters=1, dynamic_ncols=True):
             if molecule is None:  # logged in suppliers
                 continue
-            init_molecule_name(molecule)
-            if CalcNumRings(molecule) > ring_cutoff:
-                name = molecule.GetProp('_Name')
-                logger.warning(f'Molecule {name} filtered (> {ring_cutoff} rings)')
+            self._replace_existing(molecule.GetProp('_Name'), replace)
+            prepared = prepare_molecule(molecule, ring_cutoff, annotate)
+            if prepared is None:
                 continue
-            rdmolops.RemoveStereochemistry(molecule)
-            scaffold = Scaffold(get_murcko_scaffold(molecule))
-            if scaffold:  # Checks that a scaffold has at least 1 atom
-                annotation = None
-                if annotate:
-                    annotation = get_annotated_murcko_scaffold(molecule, scaffold.mol, False)
-                self.add_scaffold_node(scaffold)
-                self.add_molecule_node(molecule)
-                self.add_molecule_edge(molecule, scaffold, annotation=annotation)
-                if scaffold.rings.count > 1:
-                    self._recursive_constructor(scaffold)
-            else:
-                name = molecule.GetProp('_Name')
-                logger.warning(f'No top level scaffold for molecule {name}')
-        rdlogger.setLevel(3)  # Enable the RDKit logs
+            scaffold = self._add_top_level_scaffold(molecule, *prepared)
+            if scaffold is not None:
+                level = pending.setdefault(scaffold.rings.count, {})
+                level[scaffold.get_canonical_identifier()] = self._compact(scaffold)
+        pool = None
+        if n_jobs > 1:
+            pool = multiprocessing.Pool(n_jobs, _init_construct_worker, (self._empty_copy(), None, None))
+        try:
+            with tqdm(total=sum(map(len, pending.values())), disable=disable, desc=f'{desc} (levels)',
+                      miniters=1, dynamic_ncols=True) as pbar:
+                while pending:
+                    children = list(pending.pop(max(pending)).values())
+                    for child, parents in zip(children, self._expand_many(children, n_jobs, pool)):
+                        for parent, attr in parents:
+                            new = parent not in self.nodes
+                            if new:
+                                self.add_scaffold_node(parent)
+                            if new and self._is_expandable(parent) or not new and self._is_truncated(parent):
+                                parent = self._compact(parent)
+                                level = pending.setdefault(_num_rings(parent), {})
+                                if parent.get_canonical_identifier() not in level:
+                                    level[parent.get_canonical_identifier()] = parent
+                                    pbar.total += 1
+                            self.add_scaffold_edge(parent, child, **attr)
+                        self.nodes[child.get_canonical_identifier()].pop('truncated', None)
+                    pbar.update(len(children))
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+    def _expand_many(self, children, n_jobs=1, pool=None, chunksize=16):
+        """Private: Return the result of ``_expand`` for each child scaffold.
+
+        Parameters
+        ----------
+        children : list
+            Child scaffolds (or records) to be fragmented.
+        n_jobs : int, optional
+            Number of worker processes. The default is 1.
+        pool : multiprocessing.Pool, optional
+            A pool of worker processes initialized with an empty copy of
+            this graph, required if `n_jobs` > 1.
+        chunksize : int, optional
+            Number of scaffolds sent to a worker at a time. The default is 16.
+
+        Returns
+        -------
+        list
+            A list of (parent, attr) lists aligned with `children`.
+
+        """
+        if n_jobs <= 1 or len(children) <= chunksize:
+            result = []
+            for chunk in chunked(children, chunksize):  # fragmented in batches
+                chunk = [self._restore(child) for child in chunk]
+                fragments = self._fragment_many(chunk)
+                result.extend(self._expand(child, parents) for child, parents in zip(chunk, fragments))
+            return result
+        binaries = (c.to_binary() for c in children)
+        results = ordered_imap(_expand_worker, chunked(binaries, chunksize), n_jobs, pool=pool)
+        return [[(Scaffold(Mol(b)), attr) for b, attr in parents] for chunk in results for parents in chunk]
+
+    def _expand(self, child, parents=None):
+        """Private: Return the parent scaffolds of a child scaffold and their edge attributes.
+
+        Used by the level-synchronous construction engine. Subclasses which
+        select or annotate parent scaffolds should override this method.
+
+        Parameters
+        ----------
+        child : scaffoldgraph.core.Scaffold
+            Child scaffold to be fragmented.
+        parents : list, optional
+            The result of ``_fragment`` for the child, if it has already
+            been computed (i.e. by ``_fragment_many``). The default is None.
+
+        Returns
+        -------
+        list
+            A list of (parent, attr) tuples, where attr is a dictionary of
+            attributes for the parent --> child edge.
+
+        """
+        if parents is None:
+            parents = self._fragment(child)
+        return [(parent, {}) for parent in parents]
+
+    def _is_expandable(self, scaffold):
+        """Private: Return True if the hierarchy of a new parent scaffold (or record) should be expanded."""
+        return _num_rings(scaffold) > 1
+
+    def _is_truncated(self, scaffold):
+        """Private: Return True if the hierarchy of an existing scaffold (or record) was truncated by a budget."""
+        return bool(self.nodes[scaffold.get_canonical_identifier()].get('truncated'))
+
+    def _compact(self, scaffold):
+        """Private: Return a record of a scaffold if the graph holds compact scaffolds.
+
+        Scaffolds are returned unchanged if ``compact_scaffolds`` is False.
+        The record is assigned the integer id of the scaffold if it has been
+        added to the graph.
+
+        """
+        if not self.compact_scaffolds or isinstance(scaffold, ScaffoldRecord):
+            return scaffold
+        scaffold_id = self._scaffold_ids.get(scaffold.get_canonical_identifier())
+        return scaffold.to_record(scaffold_id)
+
+    def _restore(self, scaffold):
+        """Private: Return the full Scaffold of a scaffold record (scaffolds are returned unchanged)."""
+        if isinstance(scaffold, ScaffoldRecord):
+            return scaffold.to_scaffold()
+        return scaffold
+
+    def _construct_parallel(self, molecules, ring_cutoff, progress, annotate, n_jobs, budget=None, chunksize=64,
+                            replace=None):
+        """Private: Construct the graph using multiple worker processes.
+
+        Each worker holds a private scaffold graph, initialized with the
+        scaffold nodes already in this graph, into which molecules are
+        processed in input order, such that existing hierarchies are not
+        expanded again. For each molecule, the worker returns only the nodes
+        and edges which it has not previously produced, which are then merged
+        into this graph in input order. Molecules already in the graph are
+        passed to `replace` as they are merged. The result is equal to a
+        serial construction.
+
+        Parameters
+        ----------
+        molecules : iterable
+            An iterable of rdkit molecules for processing.
+        ring_cutoff : int
+            Ignore molecules with more than the specified number of rings.
+        progress : bool
+            If True show a progress bar monitoring progress.
+        annotate : bool
+            If True write an annotated murcko scaffold SMILES string to each
+            molecule edge (molecule --> scaffold).
+        n_jobs : int
+            Number of worker processes.
+        budget : scaffoldgraph.core.ConstructionBudget, optional
+            A per-molecule budget limiting the expansion of each hierarchy.
+        chunksize : int, optional
+            Number of molecules sent to a worker at a time. The default is 64.
+        replace : callable, optional
+            Called with the ID of each molecule already in the graph (see
+            ``_construct``).
+
+        """
+        total = len(molecules) if hasattr(molecules, '__len__') else None
+        desc = self.__class__.__name__
+        binaries = (m.ToBinary(PropertyPickleOptions.AllProps) for m in molecules if m is not None)
+        template = self._empty_copy()
+        template.add_nodes_from((n, {k: d[k] for k in _TEMPLATE_ATTRS if k in d})
+                                for n, d in self.get_scaffold_nodes(data=True))
+        initargs = (template, ring_cutoff, annotate, budget)
+        results = ordered_imap(_construct_worker, chunked(binaries, chunksize), n_jobs,
+                               _init_construct_worker, initargs)
+        with tqdm(total=total, disable=progress is False, desc=desc, miniters=1, dynamic_ncols=True) as pbar:
+            for chunk in results:
+                for name, nodes, edges, expanded in chunk:
+                    self._replace_existing(name, replace)
+                    for node, attr in nodes:
+                        self._add_node_data(node, attr)
+                    self.add_edges_from(self._interned_edges(edges))
+                    for node in expanded:
+                        self.nodes[node].pop('truncated', None)
+                pbar.update(len(chunk))
+
+    def _empty_copy(self):
+        """Private: Return an empty graph of the same type, sharing the fragmenter.
+
+        Used to provide worker processes with a template for construction.
+        Subclasses which hold further construction state should extend this
+        method.
+
+        """
+        graph = self.__class__()
+        graph.fragmenter = self.fragmenter
+        graph.compact_scaffolds = self.compact_scaffolds
+        if self.fragment_cache is not None:
+            graph.fragment_cache = self.fragment_cache.fork()
+        return graph
+
+    def _fragment(self, child):
+        """Private: Return the parent scaffolds of a child scaffold.
+
+        The fragment cache is consulted before calling the fragmenter,
+        and updated with the result if the child has not been seen.
+
+        Parameters
+        ----------
+        child : scaffoldgraph.core.Scaffold
+            Child scaffold to be fragmented.
+
+        Returns
+        -------
+        list
+            Parent scaffolds produced by the fragmenter (as records if the
+            graph holds compact scaffolds). The returned list may be shared
+            with the cache and should not be modified.
+
+        """
+        return self._fragment_many([child])[0]
+
+    def _fragment_many(self, children):
+        """Private: Return the parent scaffolds of a batch of child scaffolds.
+
+        The fragment cache is consulted for each child, the children which
+        have not been seen are fragmented as a batch by the fragmenter
+        (see ``Fragmenter.fragment_many``) and the cache is updated.
+
+        Parameters
+        ----------
+        children : list
+            Child scaffolds to be fragmented.
+
+        Returns
+        -------
+        list
+            A list of the parent scaffolds of each child (see ``_fragment``),
+            in the order supplied.
+
+        """
+        cache = self.fragment_cache
+        signature = self._cache_signature() if cache is not None else None
+        if signature is None:
+            fragments = self.fragmenter.fragment_many(children)
+            return [[self._compact(p) for p in parents if p] for parents in fragments]
+        results, missed = [], []
+        for child in children:
+            parents = cache.get((signature, child.get_canonical_identifier()))
+            if parents is None:
+                missed.append(len(results))
+            results.append(parents)
+        if missed:
+            fragments = self.fragmenter.fragment_many([children[i] for i in missed])
+            for i, parents in zip(missed, fragments):
+                parents = [self._compact(p) for p in parents if p]
+                cache[(signature, children[i].get_canonical_identifier())] = parents
+                results[i] = parents
+        return results
+
+    def _cache_signature(self):
+        """Private: Return a string identifying the fragmentation result stored in a cache.
+
+        Subclasses which process the result of fragmentation before it is
+        cached should extend this signature. If None is returned the cache
+        is not used.
+
+        """
+        return self.fragmenter.signature
+
+    def cache_info(self):
+        """Return statistics for the fragment cache.
+
+        Returns
+        -------
+        CacheInfo, None
+            A named tuple (hits, misses, maxsize, currsize) or None if
+            the graph does not use a fragment cache.
+
+        """
+        if self.fragment_cache is None:
+            return None
+        return self.fragment_cache.info()
 
     @abstractmethod
     def _recursive_constructor(self, child):
         """
         This method should be implemented by the subclass, used during recursive
-        fragmentation of a scaffold.
+        fragmentation of a scaffold. Implementations should call ``_check_budget``
+        before adding a new scaffold node to the graph, and ``_expand_truncated``
+        when a parent scaffold is already in the graph.
 
         Parameters
         ----------
@@ -191,16 +868,62 @@ class ScaffoldGraph(nx.DiGraph, ABC):
     @property
     def num_scaffold_nodes(self):
         """int : Return the number of scaffold nodes in the graph."""
-        count = 0
-        for _ in self.get_scaffold_nodes():
-            count += 1
-        return count
+        return self._count_nodes_with_type('scaffold')
 
     @property
     def num_molecule_nodes(self):
         """int : Return the number of molecule nodes in the graph."""
+        return self._count_nodes_with_type('molecule')
+
+    def _typed_nodes(self, _type):
+        """Private: Return the registry of nodes with a 'type' attribute equal to _type.
+
+        Registries are maintained as nodes are added and removed, such that
+        type-filtered queries do not scan every node. Registries are
+        validated before use (see ``_validate_registries``). Graph views do
+        not hold registries of their own and None is returned.
+
+        """
+        if '_graph' in self.__dict__:  # networkx graph view
+            return None
+        self._validate_registries()
+        return self._node_registries.get(_type, {})
+
+    def _validate_registries(self):
+        """Private: Rebuild the node registries if node types were written outside of ``add_node``.
+
+        Nodes without a 'type' attribute are held in an untyped registry.
+        The registries are rebuilt from the node attributes if they do not
+        account for every node in the graph (i.e. nodes were written to the
+        graph directly, as by ``networkx.relabel_nodes``) or if an untyped
+        node has since been assigned a type. Changing the 'type' of a typed
+        node directly is not supported, use ``add_node`` instead.
+
+        """
+        registries = self._node_registries
+        if sum(map(len, registries.values())) != len(self._node):
+            self._rebuild_registries()
+            return
+        untyped = registries.get(None)
+        if untyped:
+            node = self._node
+            if any(node[n].get('type') is not None for n in untyped):
+                self._rebuild_registries()
+
+    def _rebuild_registries(self):
+        """Private: Rebuild the node registries (and hierarchy buckets) from the node attributes."""
+        self._node_registries = {}
+        self._hierarchy_buckets = {}
+        for node in self._node:
+            self._register_node(node)
+
+    def _count_nodes_with_type(self, _type):
+        """Private: Return the number of nodes with a 'type' attribute equal to _type."""
+        registry = self._typed_nodes(_type)
+        if registry is not None:
+            return len(registry)
         count = 0
-        for _ in self.get_molecule_nodes():
+        for _ in self._get_nodes_with_type(_type, False, None):
             count += 1
         return count
 
@@ -227,12 +950,19 @@ class ScaffoldGraph(nx.DiGraph, ABC):
             to `_type`.
 
         """
+        registry = self._typed_nodes(_type)
+        if registry is None:
+            nodes = (n for n, d in self.nodes(data='type') if d == _type)
+        else:
+            nodes = iter(registry)
         if data is False:
-            return (n for n, d in self.nodes(data='type') if d == _type)
+            return nodes
+        elif _type == 'molecule' and self.molecule_store is not None:
+            return ((n, self.get_molecule_data(n, data, default)) for n in nodes)
         elif data is True:
-            return ((n, self.nodes[n]) for n, d in self.nodes(data='type') if d == _type)
+            return ((n, self.nodes[n]) for n in nodes)
         else:
-            return ((n, self.nodes[n].get(data, default)) for n, d in self.nodes(data='type') if d == _type)
+            return ((n, self.nodes[n].get(data, default)) for n in nodes)
 
     def get_scaffold_nodes(self, data=False, default=None):
         """Return a generator of all scaffold nodes in the graph.
@@ -253,6 +983,12 @@ class ScaffoldGraph(nx.DiGraph, ABC):
             A generator containing all nodes with a 'type' attribute equal
             to `_type`.
 
+        Notes
+        -----
+        Nodes are indexed by type as they are added to the graph. The
+        'type' of an existing typed node should be changed with
+        ``add_node`` rather than by writing its attributes directly.
+
         """
         return self._get_nodes_with_type('scaffold', data, default)
 
@@ -275,6 +1011,12 @@ class ScaffoldGraph(nx.DiGraph, ABC):
             A generator containing all nodes with a 'type' attribute equal
             to `_type`.
 
+        Notes
+        -----
+        Nodes are indexed by type as they are added to the graph. The
+        'type' of an existing typed node should be changed with
+        ``add_node`` rather than by writing its attributes directly.
+
         """
         return self._get_nodes_with_type('molecule', data, default)
 
@@ -291,16 +1033,94 @@ class ScaffoldGraph(nx.DiGraph, ABC):
             hierarchy.
 
         """
+        buckets = self._scaffold_buckets()
+        if buckets is not None:
+            return Counter({h: len(bucket) for h, bucket in buckets.items()})
         hierarchy = (d['hierarchy'] for _, d in self.get_scaffold_nodes(data=True))
         return Counter(hierarchy)
 
     def max_hierarchy(self):
         """int : Return the largest hierarchy level"""
-        return max(self.get_hierarchy_sizes())
+        buckets = self._scaffold_buckets()
+        return max(self.get_hierarchy_sizes() if buckets is None else buckets)
 
     def min_hierarchy(self):
         """int : Return the smallest hierarchy level"""
-        return min(self.get_hierarchy_sizes())
+        buckets = self._scaffold_buckets()
+        return min(self.get_hierarchy_sizes() if buckets is None else buckets)
+
+    def _scaffold_buckets(self):
+        """Private: Return the index of hierarchy level --> scaffold nodes.
+
+        Buckets are maintained as scaffold nodes are added and removed
+        (empty buckets are discarded). As the 'hierarchy' attribute of a
+        scaffold may be written directly (i.e. by ``networkx.set_node_attributes``)
+        the buckets are validated against the live attributes before use, and
+        rebuilt if they differ. Graph views do not hold an index of their own
+        and None is returned.
+
+        """
+        scaffolds = self._typed_nodes('scaffold')
+        if scaffolds is None:  # networkx graph view
+            return None
+        node, buckets = self._node, self._hierarchy_buckets
+        bucketed = 0
+        for hierarchy, bucket in buckets.items():
+            bucketed += len(bucket)
+            if any(node[n].get('hierarchy') != hierarchy for n in bucket):
+                return self._rebuild_buckets()
+        if bucketed != len(scaffolds) and \
+                bucketed != sum(node[n].get('hierarchy') is not None for n in scaffolds):
+            return self._rebuild_buckets()
+        return buckets
+
+    def _rebuild_buckets(self):
+        """Private: Rebuild (and return) the hierarchy buckets from the scaffold node attributes."""
+        node, buckets = self._node, {}
+        for scaffold in self._node_registries.get('scaffold', ()):
+            hierarchy = node[scaffold].get('hierarchy')
+            if hierarchy is not None:
+                buckets.setdefault(hierarchy, {})[scaffold] = None
+        self._hierarchy_buckets = buckets
+        return buckets
+
+    def get_scaffolds_by_hierarchy(self, data=False, default=None, reverse=False):
+        """Return a generator of all scaffold nodes in order of hierarchy.
+
+        Scaffolds within a hierarchy are returned in the order they were
+        added to the graph, as in a stable sort of ``get_scaffold_nodes``
+        by hierarchy, without sorting the nodes of the graph.
+
+        Parameters
+        ----------
+        data : str, bool, optional
+            The scaffold node attribute returned in 2-tuple (n, ddict[data]).
+            If True, return entire node attribute dict as (n, ddict).
+            If False, return just the nodes n. The default is False.
+        default : value, bool, optional
+            Value used for nodes that don't have the requested attribute.
+            Only relevant if data is not True or False.
+        reverse : bool, optional
+            If True return scaffolds in descending order of hierarchy. The
+            default is False.
+
+        Returns
+        -------
+        nodes : generator
+            A generator of scaffold nodes.
+
+        """
+        buckets = self._scaffold_buckets()
+        if buckets is None:
+            levels = ((n, h) for n, h in self.get_scaffold_nodes(data='hierarchy') if h is not None)
+            nodes = (n for n, _ in sorted(levels, key=lambda x: x[1], reverse=reverse))
+        else:
+            nodes = (n for h in sorted(buckets, reverse=reverse) for n in buckets[h])
+        if data is False:
+            return nodes
+        elif data is True:
+            return ((n, self.nodes[n]) for n in nodes)
+        return ((n, self.nodes[n].get(data, default)) for n in nodes)
 
     def get_scaffolds_in_hierarchy(self, hierarchy):
         """Return a generator of all scaffolds within a specified hierarchy.
@@ -317,6 +1137,10 @@ class ScaffoldGraph(nx.DiGraph, ABC):
             specified hierarchy.
 
         """
+        buckets = self._scaffold_buckets()
+        if buckets is not None:
+            yield from buckets.get(int(hierarchy), ())
+            return
         for s, d in self.get_scaffold_nodes(data=True):
             if d['hierarchy'] == int(hierarchy):
                 yield s
@@ -387,22 +1211,65 @@ class ScaffoldGraph(nx.DiGraph, ABC):
         Molecules are found by traversing the graph. In the case of a scaffold tree
         the results represent the rules used to prioritize the scaffolds.
 
+        If a membership index has been built (see ``build_membership_index``)
+        molecules are read from the index in graph order, rather than in
+        traversal order.
+
         """
         molecules = []
         if scaffold_smiles not in self:
             scaffold_smiles = canonize_smiles(scaffold_smiles, failsafe=True)
             if scaffold_smiles not in self:
                 return molecules
+        index = self.membership_index
+        if index is not None and scaffold_smiles in index:
+            molecules = index.get_molecules(scaffold_smiles)
+            if data is False:
+                return molecules
+            return [(m, self.get_molecule_data(m, data, default)) for m in molecules]
         for succ in nx.bfs_tree(self, scaffold_smiles, reverse=False):
             if self.nodes[succ].get('type') == 'molecule':
                 if data is False:
                     molecules.append(succ)
-                elif data is True:
-                    molecules.append((succ, self.nodes[succ]))
                 else:
-                    molecules.append((succ, self.nodes[succ].get(data, default)))
+                    molecules.append((succ, self.get_molecule_data(succ, data, default)))
         return molecules
 
+    def get_molecule_data(self, molecule_id, data=True, default=None):
+        """Return the attributes of a molecule node.
+
+        Attributes are combined with the properties held in the molecule
+        store, if the graph uses one.
+
+        Parameters
+        ----------
+        molecule_id : str
+            ID of query molecule.
+        data : str, bool, optional
+            If True (default) return a dictionary of all attributes, else
+            return the value of the attribute with the key `data`.
+        default : value, optional
+            Value returned if the requested attribute is not available.
+            Only relevant if data is not True.
+
+        Returns
+        -------
+        {dict, object}
+            The attribute dictionary or the value of the requested attribute.
+
+        """
+        attr = self.nodes[molecule_id]
+        store = self.molecule_store
+        if data is True:
+            if store is None or molecule_id not in store:
+                return attr
+            attr = dict(attr)
+            attr.update(store.row(molecule_id))
+            return attr
+        if store is None or data in attr:
+            return attr.get(data, default)
+        return store.get(molecule_id, data, default)
+
     def get_scaffolds_for_molecule(self, molecule_id, data=False, default=None):
         """Return a list of scaffold SMILES connected to a query molecule ID.
 
@@ -467,6 +1334,12 @@ class ScaffoldGraph(nx.DiGraph, ABC):
         list
             A list of scaffold parent/child nodes.
 
+        Notes
+        -----
+        If a reachability index has been built (see ``build_reachability_index``)
+        scaffolds are read from the index in order of hierarchy, rather than
+        in traversal order.
+
         """
         assert traversal in {'parent', 'child'}
         reverse = traversal == 'parent'
@@ -476,11 +1349,24 @@ class ScaffoldGraph(nx.DiGraph, ABC):
             if scaffold_smiles not in self:
                 return next_hiers
         level = self.nodes[scaffold_smiles].get('hierarchy', float('inf'))
+        index = self.reachability_index
+        if index is not None and scaffold_smiles in index:
+            if max_levels >= 0 and level == float('inf'):
+                return next_hiers
+            if reverse:
+                nodes = index.ancestors(scaffold_smiles, max_levels)
+            else:
+                nodes = index.descendants(scaffold_smiles, max_levels)
+            if data is False:
+                return nodes
+            elif data is True:
+                return [(n, self.nodes[n]) for n in nodes]
+            return [(n, self.nodes[n].get(data, default)) for n in nodes]
         bfs = iter(nx.bfs_tree(self, scaffold_smiles, reverse=reverse).nodes)
         next(bfs)  # first entry is the query node
         for succ in bfs:
             d = self.nodes[succ]
-            if d.get('type') == 'scaffold' and (max_levels < 0 or level - d.get('hierarchy', 0) <= max_levels):
+            if d.get('type') == 'scaffold' and (max_levels < 0 or abs(level - d.get('hierarchy', 0)) <= max_levels):
                 if data is False:
                     next_hiers.append(succ)
                 elif data is True:
@@ -541,12 +1427,551 @@ class ScaffoldGraph(nx.DiGraph, ABC):
         """
         return self._get_scaffold_hierarchy(scaffold_smiles, data, default, max_levels, 'child')
 
+    def is_parent_scaffold(self, parent_smiles, scaffold_smiles):
+        """Return True if a scaffold is a parent scaffold (at any level) of a query scaffold.
+
+        Parameters
+        ----------
+        parent_smiles : str
+            SMILES of the candidate parent scaffold.
+        scaffold_smiles : str
+            SMILES of query scaffold.
+
+        Returns
+        -------
+        bool
+            True if `parent_smiles` is in the parent hierarchy of
+            `scaffold_smiles` (i.e. is returned by ``get_parent_scaffolds``).
+
+        Notes
+        -----
+        If a reachability index has been built (see ``build_reachability_index``)
+        the check is a lookup in the index rather than a traversal.
+
+        """
+        scaffolds = []
+        for smiles in (parent_smiles, scaffold_smiles):
+            if smiles not in self:
+                smiles = canonize_smiles(smiles, failsafe=True)
+            if not self.scaffold_in_graph(smiles):
+                return False
+            scaffolds.append(smiles)
+        parent, scaffold = scaffolds
+        index = self.reachability_index
+        if index is not None and scaffold in index:
+            return index.is_ancestor(parent, scaffold)
+        return parent != scaffold and nx.has_path(self, parent, scaffold)
+
     def add_scaffold_molecule_count(self):
         """Add the number of molecules containing each scaffold node as a scaffold
-         node attribute ('count')."""
+         node attribute ('count').
+
+        Counts are computed in a single pass using the membership index of
+        the graph (see ``build_membership_index``). If the index is not
+        enabled a temporary index is built.
+
+        The graph attribute 'molecule_counts' is set to True, such that
+        counts are maintained by ``add_molecules`` and ``remove_molecules``.
+
+        """
+        index = self.membership_index or MembershipIndex(self)
         for scaffold, data in self.nodes(data=True):
-            mols = self.get_molecules_for_scaffold(scaffold)
-            data['count'] = len(mols)
+            if scaffold in index:
+                data['count'] = index.count(scaffold)
+            else:
+                data['count'] = len(self.get_molecules_for_scaffold(scaffold))
+        self.graph['molecule_counts'] = True
+
+    def aggregate_molecule_property(self, key, funcs=('count', 'mean'), as_dataframe=False):
+        """Aggregate a molecule property over the molecules represented by each scaffold.
+
+        All aggregates are computed in one pass using the membership index
+        of the graph (see ``build_membership_index``), which is built in a
+        single traversal of the graph in topological order. If the index is
+        not enabled a temporary index is built. Molecules reachable from a
+        scaffold by more than one path are counted once. Molecules without
+        the property (or with a value of None or NaN) are ignored.
+
+        Parameters
+        ----------
+        key : str
+            The molecule node attribute to aggregate. Values must be
+            numeric (booleans are treated as 1 and 0, such that 'sum'
+            counts actives in a binary activity property).
+        funcs : iterable, optional
+            Aggregates to compute, either names of built-in aggregates
+            {'count', 'sum', 'mean', 'median', 'min', 'max', 'std', 'var'}
+            or callables reducing an array of values to a scalar, named by
+            their ``__name__``. 'count' is the number of molecules with a
+            value. The default is ('count', 'mean').
+        as_dataframe : bool, optional
+            If True return the aggregates as a pandas DataFrame rather than
+            adding them as scaffold node attributes. The default is False.
+
+        Returns
+        -------
+        pandas.DataFrame, None
+            If `as_dataframe` is True a DataFrame indexed by scaffold with a
+            column for each aggregate, else None.
+
+        Raises
+        ------
+        ValueError
+            If an aggregate name is not recognized.
+
+        Notes
+        -----
+        Aggregates are named '{key}_{aggregate}' (i.e. 'pIC50_mean') both
+        as node attributes and DataFrame columns. Aggregates of scaffolds
+        without values are NaN (0 for 'count' and 'sum').
+
+        Examples
+        --------
+        >>> network.aggregate_molecule_property('pIC50', ['count', 'mean', 'max'])
+        >>> network.nodes['c1ccccc1']['pIC50_mean']
+        6.4
+        >>> network.aggregate_molecule_property('active', ['sum'], as_dataframe=True)
+                    active_sum
+        scaffold
+        c1ccccc1          12.0
+        ...
+
+        """
+        index = self.membership_index or MembershipIndex(self)
+        values = [self.get_molecule_data(m, key, None) for m in index.molecules]
+        values = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        scaffolds = list(self.get_scaffold_nodes())
+        results = index.aggregate(values, funcs, scaffolds)
+        columns = {'{}_{}'.format(key, name): result for name, result in results.items()}
+        if as_dataframe:
+            import pandas as pd
+            return pd.DataFrame(columns, index=pd.Index(scaffolds, name='scaffold'))
+        for column, result in columns.items():
+            for scaffold, value in zip(scaffolds, result.tolist()):
+                self.nodes[scaffold][column] = value
+
+    @property
+    def membership_index(self):
+        """MembershipIndex : Return the membership index of the graph, or None if not enabled.
+
+        The index is rebuilt when accessed after the graph has changed.
+
+        """
+        if self._index_membership and self._membership is None:
+            self._membership = MembershipIndex(self)
+        return self._membership
+
+    def build_membership_index(self):
+        """Enable and build an index of the molecules represented by each scaffold.
+
+        The index is built in a single pass over the graph and used by
+        ``get_molecules_for_scaffold`` (and functions calling it for each
+        scaffold, such as compound set enrichment and bipartite graph
+        creation), replacing a traversal of the graph for each query. The
+        index is discarded when the graph changes and rebuilt on the next
+        query.
+
+        Returns
+        -------
+        scaffoldgraph.core.membership.MembershipIndex
+            The membership index of the graph.
+
+        See Also
+        --------
+        drop_membership_index
+
+        """
+        self._index_membership = True
+        self._membership = None
+        return self.membership_index
+
+    def drop_membership_index(self):
+        """Disable and discard the membership index of the graph.
+
+        See Also
+        --------
+        build_membership_index
+
+        """
+        self._index_membership = False
+        self._membership = None
+
+    @property
+    def reachability_index(self):
+        """ReachabilityIndex : Return the reachability index of the graph, or None if not enabled.
+
+        The index is rebuilt when accessed after the graph has changed.
+
+        """
+        if self._index_reachability and self._reachability is None:
+            self._reachability = ReachabilityIndex(self)
+        return self._reachability
+
+    def build_reachability_index(self):
+        """Enable and build an index of the parent/child scaffolds of each scaffold.
+
+        The index holds the transitive closure of the scaffold hierarchy and
+        is used by ``get_parent_scaffolds``, ``get_child_scaffolds`` and
+        ``is_parent_scaffold``, replacing a traversal of the graph for each
+        query, such that repeated drill-down queries are answered from the
+        index. The index is discarded when the graph changes and rebuilt on
+        the next query.
+
+        Returns
+        -------
+        scaffoldgraph.core.reachability.ReachabilityIndex
+            The reachability index of the graph.
+
+        See Also
+        --------
+        drop_reachability_index
+
+        """
+        self._index_reachability = True
+        self._reachability = None
+        return self.reachability_index
+
+    def drop_reachability_index(self):
+        """Disable and discard the reachability index of the graph.
+
+        See Also
+        --------
+        build_reachability_index
+
+        """
+        self._index_reachability = False
+        self._reachability = None
+
+    def _graph_changed(self):
+        """Private: Discard indexes derived from the graph structure."""
+        self._membership = None
+        self._reachability = None
+
+    def _register_node(self, node):
+        """Private: File a node in the registry of its 'type' attribute (and hierarchy bucket)."""
+        data = self._node[node]
+        node_type = data.get('type')
+        hierarchy = data.get('hierarchy') if node_type == 'scaffold' else None
+        registries, buckets = self._node_registries, self._hierarchy_buckets
+        if node in registries.get('scaffold', ()) and node not in buckets.get(hierarchy, ()):
+            self._unbucket_node(node)
+        for _type, registry in registries.items():
+            if _type != node_type:
+                registry.pop(node, None)
+        registries.setdefault(node_type, {})[node] = None
+        if hierarchy is not None:
+            buckets.setdefault(hierarchy, {})[node] = None
+
+    def _unbucket_node(self, node):
+        """Private: Remove a scaffold node from its hierarchy bucket."""
+        buckets = self._hierarchy_buckets
+        for hierarchy, bucket in buckets.items():
+            if node in bucket:
+                del bucket[node]
+                if not bucket:
+                    del buckets[hierarchy]
+                return
+
+    def _unregister_node(self, node):
+        """Private: Remove a node from the node type registries (and hierarchy buckets)."""
+        if node in self._node_registries.get('scaffold', ()):
+            self._unbucket_node(node)
+        for registry in self._node_registries.values():
+            registry.pop(node, None)
+
+    def add_node(self, node_for_adding, **attr):
+        """See ``networkx.DiGraph.add_node``, discarding derived indexes."""
+        self._graph_changed()
+        new = node_for_adding not in self._node
+        super(ScaffoldGraph, self).add_node(node_for_adding, **attr)
+        if new or 'type' in attr or 'hierarchy' in attr:
+            self._register_node(node_for_adding)
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        """See ``networkx.DiGraph.add_nodes_from``, discarding derived indexes."""
+        self._graph_changed()
+        for n in nodes_for_adding:
+            try:
+                n in self._node
+                node_attr = attr
+            except TypeError:  # (node, attribute dict) tuple
+                n, node_data = n
+                node_attr = attr.copy()
+                node_attr.update(node_data)
+            self.add_node(n, **node_attr)
+
+    def remove_node(self, n):
+        """See ``networkx.DiGraph.remove_node``, discarding derived indexes."""
+        self._graph_changed()
+        super(ScaffoldGraph, self).remove_node(n)
+        self._unregister_node(n)
+
+    def remove_nodes_from(self, nodes):
+        """See ``networkx.DiGraph.remove_nodes_from``, discarding derived indexes."""
+        self._graph_changed()
+        nodes = list(nodes)
+        super(ScaffoldGraph, self).remove_nodes_from(nodes)
+        for n in nodes:
+            self._unregister_node(n)
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        """See ``networkx.DiGraph.add_edge``, discarding derived indexes."""
+        self._graph_changed()
+        super(ScaffoldGraph, self).add_edge(u_of_edge, v_of_edge, **attr)
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        """See ``networkx.DiGraph.add_edges_from``, discarding derived indexes."""
+        self._graph_changed()
+        super(ScaffoldGraph, self).add_edges_from(ebunch_to_add, **attr)
+
+    def remove_edge(self, u, v):
+        """See ``networkx.DiGraph.remove_edge``, discarding derived indexes."""
+        self._graph_changed()
+        super(ScaffoldGraph, self).remove_edge(u, v)
+
+    def remove_edges_from(self, ebunch):
+        """See ``networkx.DiGraph.remove_edges_from``, discarding derived indexes."""
+        self._graph_changed()
+        super(ScaffoldGraph, self).remove_edges_from(ebunch)
+
+    def clear(self):
+        """See ``networkx.DiGraph.clear``, discarding derived indexes."""
+        self._graph_changed()
+        super(ScaffoldGraph, self).clear()
+        self._node_registries = {}
+        self._hierarchy_buckets = {}
+
+    def clear_edges(self):
+        """See ``networkx.DiGraph.clear_edges``, discarding derived indexes."""
+        self._graph_changed()
+        super(ScaffoldGraph, self).clear_edges()
+
+    def get_budget_report(self):
+        """Return the molecules which exceeded their construction budget.
+
+        Molecules exceeding a ``ConstructionBudget`` during construction are
+        flagged with the node attribute 'budget_exceeded', as are molecules
+        sharing the top-level scaffold of such a molecule.
+
+        Returns
+        -------
+        list
+            A list of BudgetReport(molecule, scaffold, reason) named tuples,
+            where reason is the budget exceeded ('max_scaffolds' or 'timeout').
+
+        """
+        report = []
+        for molecule, reason in self.get_molecule_nodes(data='budget_exceeded'):
+            if reason is None:
+                continue
+            for scaffold in self.predecessors(molecule):
+                report.append(BudgetReport(molecule, scaffold, reason))
+        return report
+
+    def add_molecules(self, molecules, ring_cutoff=10, progress=False, annotate=True, n_jobs=1,
+                      engine='recursive', budget=None):
+        """Add molecules and their scaffold hierarchies to an existing graph.
+
+        Existing scaffold nodes are reused, and fragmentation stops at any
+        scaffold already present in the graph. A molecule with the same
+        identifier as a molecule node in the graph replaces that node. If
+        the graph holds molecule counts (see ``add_scaffold_molecule_count``)
+        these are updated for the affected scaffolds only.
+
+        Parameters
+        ----------
+        molecules : iterable
+            An iterable of rdkit molecules (i.e. a supplier), it is expected
+            that each molecule will be assigned a property '_Name' serving as
+            an identifier for that molecule.
+        ring_cutoff : int, optional
+            Ignore molecules with more rings than this cutoff. The default is 10.
+        progress : bool, optional
+            If True display a progress bar to monitor progress.
+            The default is False.
+        annotate : bool, optional
+            If True write an annotated murcko scaffold SMILES string to each
+            molecule edge (molecule --> scaffold). The default is True.
+        n_jobs : int, None, optional
+            Number of worker processes used for construction. If None or < 1
+            all available CPUs are used. The default is 1 (no multiprocessing).
+        engine : {'recursive', 'level'}, optional
+            The construction engine (see ``from_sdf``). The default is 'recursive'.
+        budget : scaffoldgraph.core.ConstructionBudget, optional
+            A per-molecule construction budget (see ``from_sdf``). The default is None.
+
+        Examples
+        --------
+        >>> import scaffoldgraph as sg
+        >>> network = sg.ScaffoldNetwork.from_sdf('my_file.sdf')
+        >>> network.add_molecules(sg.io.sdf.read_sdf(open('new_compounds.sdf', 'rb')))
+
+        See Also
+        --------
+        remove_molecules
+
+        """
+        counted = self._has_molecule_counts()
+        added, detached = {}, set()
+
+        def _supplier():
+            for molecule in molecules:
+                if molecule is None:  # logged in suppliers
+                    continue
+                init_molecule_name(molecule)
+                added[molecule.GetProp('_Name')] = None
+                yield molecule
+
+        def _replace(name):  # replace existing molecule
+            detached.update(self._detach_molecule(name, counted))
+            self._remove_molecule_node(name)
+
+        self._construct(_supplier(), ring_cutoff, progress, annotate, n_jobs, engine, budget, _replace)
+        if counted:
+            for name in added:
+                if not self.molecule_in_graph(name):  # filtered
+                    continue
+                self.nodes[name]['count'] = 1
+                for scaffold in nx.ancestors(self, name):
+                    data = self.nodes[scaffold]
+                    data['count'] = data.get('count', 0) + 1
+        self._collect_scaffolds(detached)
+
+    def remove_molecules(self, molecule_ids):
+        """Remove molecules from the graph.
+
+        Molecule nodes are removed along with any scaffold nodes which no
+        longer represent a molecule in the graph, such that the remaining
+        scaffold hierarchies (or parent chains in a scaffold tree) are
+        unaffected. If the graph holds molecule counts (see
+        ``add_scaffold_molecule_count``) these are updated for the affected
+        scaffolds only.
+
+        Parameters
+        ----------
+        molecule_ids : str, iterable
+            A molecule ID or an iterable of molecule IDs to remove. IDs
+            which are not molecule nodes in the graph are ignored.
+
+        See Also
+        --------
+        add_molecules
+
+        """
+        if isinstance(molecule_ids, str):
+            molecule_ids = [molecule_ids]
+        counted = self._has_molecule_counts()
+        detached = set()
+        for molecule_id in molecule_ids:
+            if not self.molecule_in_graph(molecule_id):
+                logger.warning(f'Molecule {molecule_id} not in graph')
+                continue
+            detached.update(self._detach_molecule(molecule_id, counted))
+            self._remove_molecule_node(molecule_id)
+        self._collect_scaffolds(detached)
+
+    def _detach_molecule(self, molecule_id, counted=False):
+        """Private: Remove the scaffold edges of a molecule node.
+
+        Parameters
+        ----------
+        molecule_id : str
+            ID of the molecule node.
+        counted : bool, optional
+            If True decrement the molecule count of each scaffold
+            representing the molecule. The default is False.
+
+        Returns
+        -------
+        set
+            The scaffolds which represented the molecule.
+
+        """
+        scaffolds = nx.ancestors(self, molecule_id)
+        if counted:
+            for scaffold in scaffolds:
+                data = self.nodes[scaffold]
+                if 'count' in data:
+                    data['count'] -= 1
+        self.remove_edges_from(list(self.in_edges(molecule_id)))
+        return scaffolds
+
+    def _remove_molecule_node(self, molecule_id):
+        """Private: Remove a molecule node and its properties from the molecule store."""
+        self.remove_node(molecule_id)
+        if self.molecule_store is not None:
+            self.molecule_store.remove(molecule_id)
+
+    def _collect_scaffolds(self, scaffolds):
+        """Private: Remove scaffolds which no longer represent any molecule.
+
+        Scaffolds are visited in descending hierarchy, such that children
+        are removed before their parents are considered. A scaffold is
+        removed if it has no remaining successors.
+
+        Parameters
+        ----------
+        scaffolds : iterable
+            Candidate scaffold nodes for removal.
+
+        """
+        for scaffold in sorted(scaffolds, key=lambda n: self.nodes[n].get('hierarchy', 0), reverse=True):
+            if self.nodes[scaffold].get('type') == 'scaffold' and self.out_degree(scaffold) == 0:
+                self.remove_node(scaffold)
+
+    def _has_molecule_counts(self):
+        """Private: Return True if molecule counts were added (see ``add_scaffold_molecule_count``)."""
+        return bool(self.graph.get('molecule_counts', False))
+
+    def copy(self, as_view=False):
+        """Return a copy of the graph, including the molecule store if used.
+
+        Integer scaffold ids (see ``get_scaffold_id``) are retained.
+        See ``networkx.DiGraph.copy`` for details.
+
+        """
+        graph = super(ScaffoldGraph, self).copy(as_view)
+        if as_view:
+            graph._scaffold_ids, graph._scaffold_keys = self._scaffold_ids, self._scaffold_keys
+        else:
+            graph._scaffold_ids, graph._scaffold_keys = dict(self._scaffold_ids), list(self._scaffold_keys)
+        graph.fragmenter = self.fragmenter
+        graph.compact_scaffolds = self.compact_scaffolds
+        graph._index_membership = self._index_membership and not as_view
+        graph._index_reachability = self._index_reachability and not as_view
+        if self.molecule_store is not None:
+            if as_view:
+                graph.molecule_store = self.molecule_store
+            else:
+                graph.molecule_store = self.molecule_store.subset(graph.get_molecule_nodes())
+        return graph
+
+    def subgraph(self, nodes):
+        """Return a subgraph view of the graph, sharing the molecule store and scaffold ids.
+
+        See ``networkx.DiGraph.subgraph`` for details.
+
+        """
+        subgraph = super(ScaffoldGraph, self).subgraph(nodes)
+        subgraph.molecule_store = self.molecule_store
+        subgraph._scaffold_ids, subgraph._scaffold_keys = self._scaffold_ids, self._scaffold_keys
+        return subgraph
+
+    def freeze(self):
+        """Return an immutable and compact copy of the graph for querying.
+
+        The frozen graph stores adjacency in CSR arrays and node types and
+        hierarchy levels in typed arrays, reducing memory use and speeding
+        up traversal, while offering the query API of the ScaffoldGraph.
+
+        Returns
+        -------
+        scaffoldgraph.core.FrozenScaffoldGraph
+            A frozen copy of the graph, a mutable graph can be recovered
+            using ``FrozenScaffoldGraph.thaw``.
+
+        """
+        return FrozenScaffoldGraph(self)
 
     def separate_disconnected_components(self, sort=False):
         """Separate disconnected components into distinct ScaffoldGraph objects.
@@ -591,14 +2016,97 @@ class ScaffoldGraph(nx.DiGraph, ABC):
         default_attr = dict(type='molecule', smiles=MolToSmiles(molecule))
         default_attr.update(molecule.GetPropsAsDict())
         default_attr.update(attr)
-        self.add_node(name, **default_attr)
+        self._add_node_data(name, default_attr)
+
+    def _add_node_data(self, node, attr):
+        """Private: Add a node, storing molecule properties in the molecule store if used.
+
+        Parameters
+        ----------
+        node : str
+            The node key.
+        attr : dict
+            Node attributes. If the node is a molecule and the graph uses a
+            molecule store, attributes other than 'type' are added to the
+            store.
+
+        """
+        store = self.molecule_store
+        if attr.get('type') == 'scaffold':
+            node = self._intern(node)
+        if store is None or attr.get('type') != 'molecule':
+            self.add_node(node, **attr)
+            return
+        properties = {k: v for k, v in attr.items() if k != 'type'}
+        store.update(node, properties)
+        self.add_node(node, type='molecule')
+
+    def _intern(self, scaffold):
+        """Private: Return the interned identifier of a scaffold, assigning it an integer id if new.
+
+        The same string object is returned for every scaffold with an equal
+        identifier, such that node and edge keys referring to a scaffold
+        share a single string rather than holding duplicates.
+
+        """
+        identifier = scaffold if isinstance(scaffold, str) else scaffold.get_canonical_identifier()
+        scaffold_id = self._scaffold_ids.get(identifier)
+        if scaffold_id is None:
+            scaffold_id = self._scaffold_ids[identifier] = len(self._scaffold_keys)
+            self._scaffold_keys.append(identifier)
+        return self._scaffold_keys[scaffold_id]
+
+    def _interned_edges(self, edges):
+        """Private: Yield (u, v, attr) edges with interned scaffold keys."""
+        for u, v, attr in edges:
+            if attr.get('type') == 1:  # scaffold --> scaffold
+                v = self._intern(v)
+            yield self._intern(u), v, attr
+
+    def get_scaffold_id(self, scaffold):
+        """Return the compact integer id assigned to a scaffold.
+
+        Integer ids are assigned in order as scaffolds are added to the
+        graph and are stable, i.e. an id is never reassigned, even if its
+        scaffold is removed from the graph.
+
+        Parameters
+        ----------
+        scaffold : {str, scaffoldgraph.core.Scaffold}
+            A scaffold or its canonical identifier (SMILES).
+
+        Returns
+        -------
+        int, None
+            The integer id of the scaffold or None if the scaffold has not
+            been added to the graph.
+
+        """
+        identifier = scaffold if isinstance(scaffold, str) else scaffold.get_canonical_identifier()
+        return self._scaffold_ids.get(identifier)
+
+    def get_scaffold_from_id(self, scaffold_id):
+        """Return the canonical identifier (SMILES) of a scaffold from its integer id.
+
+        Parameters
+        ----------
+        scaffold_id : int
+            The integer id of a scaffold (see ``get_scaffold_id``).
+
+        Returns
+        -------
+        str
+            The canonical identifier of the scaffold.
+
+        """
+        return self._scaffold_keys[scaffold_id]
 
     def add_scaffold_node(self, scaffold, **attr):
         """Add a scaffold node to the graph.
 
         Parameters
         ----------
-        scaffold : scaffoldgraph.core.Scaffold
+        scaffold : {scaffoldgraph.core.Scaffold, scaffoldgraph.core.ScaffoldRecord}
             Scaffold to add to the graph.
         **attr : keyword arguments, optional
             Attributes to add to the node.
@@ -609,9 +2117,9 @@ class ScaffoldGraph(nx.DiGraph, ABC):
         a node attribute with the key 'hierarchy'.
 
         """
-        default_attr = dict(type='scaffold', hierarchy=scaffold.rings.count)
+        default_attr = dict(type='scaffold', hierarchy=_num_rings(scaffold))
         default_attr.update(attr)
-        self.add_node(scaffold.get_canonical_identifier(), **default_attr)
+        self.add_node(self._intern(scaffold), **default_attr)
 
     def add_molecule_edge(self, molecule, scaffold, **attr):
         """Add a scaffold -> molecule edge.
@@ -631,7 +2139,7 @@ class ScaffoldGraph(nx.DiGraph, ABC):
         name = molecule.GetProp('_Name')
         default_attr = dict(type=0)
         default_attr.update(attr)
-        self.add_edge(scaffold.get_canonical_identifier(), name, **default_attr)
+        self.add_edge(self._intern(scaffold), name, **default_attr)
 
     def add_scaffold_edge(self, parent, child, **attr):
         """Add a scaffold (parent) -> scaffold (child) edge.
@@ -648,14 +2156,11 @@ class ScaffoldGraph(nx.DiGraph, ABC):
         """
         default_attr = dict(type=1)
         default_attr.update(attr)
-        self.add_edge(
-            parent.get_canonical_identifier(),
-            child.get_canonical_identifier(),
-            **default_attr
-        )
+        self.add_edge(self._intern(parent), self._intern(child), **default_attr)
 
     @classmethod
-    def from_sdf(cls, file_name, ring_cutoff=10, progress=False, annotate=True, zipped=False, **kwargs):
+    def from_sdf(cls, file_name, ring_cutoff=10, progress=False, annotate=True, zipped=False, n_jobs=1,
+                 engine='recursive', budget=None, **kwargs):
         """Construct a ScaffoldGraph from an SDF file.
 
         Parameters
@@ -673,6 +2178,17 @@ class ScaffoldGraph(nx.DiGraph, ABC):
             molecule edge (molecule --> scaffold). The default is True.
         zipped : bool, optional
             If True input file is compressed with gzip. The default is False.
+        n_jobs : int, None, optional
+            Number of worker processes used for construction. If None or < 1
+            all available CPUs are used. The default is 1 (no multiprocessing).
+        engine : {'recursive', 'level'}, optional
+            The construction engine. 'level' expands the scaffold hierarchies
+            of all molecules one level at a time, fragmenting each unique
+            scaffold once. The default is 'recursive'.
+        budget : scaffoldgraph.core.ConstructionBudget, optional
+            A per-molecule budget limiting the number of sub-scaffolds and
+            time spent expanding each hierarchy (see ``get_budget_report``).
+            The default is None (no budget).
         **kwargs : keyword arguments, optional
             Arguments to pass to the ScaffoldGraph initilaizer.
 
@@ -683,13 +2199,15 @@ class ScaffoldGraph(nx.DiGraph, ABC):
             sdf = open(file_name, 'rb')
         supplier = read_sdf(sdf, requires_length=progress is True)
         instance = cls(**kwargs)
-        instance._construct(supplier, ring_cutoff=ring_cutoff, progress=progress, annotate=annotate)
+        instance._construct(supplier, ring_cutoff=ring_cutoff, progress=progress, annotate=annotate,
+                            n_jobs=n_jobs, engine=engine, budget=budget)
         sdf.close()
         return instance
 
     @classmethod
     def from_smiles_file(cls, file_name, delimiter=' ', smiles_column=0, name_column=1, header=False,
-                         ring_cutoff=10, progress=False, annotate=True, **kwargs):
+                         ring_cutoff=10, progress=False, annotate=True, n_jobs=1, engine='recursive',
+                         budget=None, **kwargs):
 
         """Construct a ScaffoldGraph from a SMILES file.
 
@@ -713,6 +2231,17 @@ class ScaffoldGraph(nx.DiGraph, ABC):
         annotate : bool, optional
             If True write an annotated murcko scaffold SMILES string to each
             molecule edge (molecule --> scaffold). The default is True.
+        n_jobs : int, None, optional
+            Number of worker processes used for construction. If None or < 1
+            all available CPUs are used. The default is 1 (no multiprocessing).
+        engine : {'recursive', 'level'}, optional
+            The construction engine. 'level' expands the scaffold hierarchies
+            of all molecules one level at a time, fragmenting each unique
+            scaffold once. The default is 'recursive'.
+        budget : scaffoldgraph.core.ConstructionBudget, optional
+            A per-molecule budget limiting the number of sub-scaffolds and
+            time spent expanding each hierarchy (see ``get_budget_report``).
+            The default is None (no budget).
         **kwargs : keyword arguments, optional
             Arguments to pass to the ScaffoldGraph initilaizer.
 
@@ -720,11 +2249,13 @@ class ScaffoldGraph(nx.DiGraph, ABC):
         supplier = read_smiles_file(file_name, delimiter, smiles_column, name_column,
                                     header, requires_length=progress is True)
         instance = cls(**kwargs)
-        instance._construct(supplier, ring_cutoff=ring_cutoff, progress=progress, annotate=annotate)
+        instance._construct(supplier, ring_cutoff=ring_cutoff, progress=progress, annotate=annotate,
+                            n_jobs=n_jobs, engine=engine, budget=budget)
         return instance
 
     @classmethod
-    def from_supplier(cls, supplier, ring_cutoff=10, progress=False, annotate=True, **kwargs):
+    def from_supplier(cls, supplier, ring_cutoff=10, progress=False, annotate=True, n_jobs=1,
+                      engine='recursive', budget=None, **kwargs):
         """Construct a ScaffoldGraph from a custom rdkit Mol supplier.
 
         A simple supplier could be a list of rdkit molecules or a supplier provided by rdkit.
@@ -743,6 +2274,17 @@ class ScaffoldGraph(nx.DiGraph, ABC):
         annotate : bool, optional
             If True write an annotated murcko scaffold SMILES string to each
             molecule edge (molecule --> scaffold). The default is True.
+        n_jobs : int, None, optional
+            Number of worker processes used for construction. If None or < 1
+            all available CPUs are used. The default is 1 (no multiprocessing).
+        engine : {'recursive', 'level'}, optional
+            The construction engine. 'level' expands the scaffold hierarchies
+            of all molecules one level at a time, fragmenting each unique
+            scaffold once. The default is 'recursive'.
+        budget : scaffoldgraph.core.ConstructionBudget, optional
+            A per-molecule budget limiting the number of sub-scaffolds and
+            time spent expanding each hierarchy (see ``get_budget_report``).
+            The default is None (no budget).
         **kwargs : keyword arguments, optional
             Arguments to pass to the ScaffoldGraph initilaizer.
 
@@ -753,12 +2295,14 @@ class ScaffoldGraph(nx.DiGraph, ABC):
 
         """
         instance = cls(**kwargs)
-        instance._construct(supplier, ring_cutoff=ring_cutoff, progress=progress, annotate=annotate)
+        instance._construct(supplier, ring_cutoff=ring_cutoff, progress=progress, annotate=annotate,
+                            n_jobs=n_jobs, engine=engine, budget=budget)
         return instance
 
     @classmethod
     def from_dataframe(cls, df, smiles_column='Smiles', name_column='Name', data_columns=None,
-                       ring_cutoff=10, progress=False, annotate=True, **kwargs):
+                       ring_cutoff=10, progress=False, annotate=True, n_jobs=1, engine='recursive',
+                       budget=None, **kwargs):
 
         """Construct a ScaffoldGraph from a pandas DataFrame.
 
@@ -772,6 +2316,8 @@ class ScaffoldGraph(nx.DiGraph, ABC):
             Label of column containing SMILES strings. The default is 'Name'.
         data_columns : list
             List of column keys to be included in the molecule node attributes.
+            If the graph uses a molecule store (``molecule_store=True``) the
+            columns are added to the store in bulk, retaining their dtypes.
         ring_cutoff : int, optional
             Ignore molecules with more rings than this cutoff. The default is 10.
         progress : bool, optional
@@ -780,13 +2326,37 @@ class ScaffoldGraph(nx.DiGraph, ABC):
         annotate : bool, optional
             If True write an annotated murcko scaffold SMILES string to each
             molecule edge (molecule --> scaffold). The default is True.
+        n_jobs : int, None, optional
+            Number of worker processes used for construction. If None or < 1
+            all available CPUs are used. The default is 1 (no multiprocessing).
+        engine : {'recursive', 'level'}, optional
+            The construction engine. 'level' expands the scaffold hierarchies
+            of all molecules one level at a time, fragmenting each unique
+            scaffold once. The default is 'recursive'.
+        budget : scaffoldgraph.core.ConstructionBudget, optional
+            A per-molecule budget limiting the number of sub-scaffolds and
+            time spent expanding each hierarchy (see ``get_budget_report``).
+            The default is None (no budget).
         **kwargs : keyword arguments, optional
             Arguments to pass to the ScaffoldGraph initilaizer.
 
         """
-        supplier = read_dataframe(df, smiles_column, name_column, data_columns)
         instance = cls(**kwargs)
-        instance._construct(supplier, ring_cutoff=ring_cutoff, progress=progress, annotate=annotate)
+        store = instance.molecule_store
+        if store is not None and data_columns is not None:
+            # data columns are added in bulk, retaining their dtypes.
+            supplier = read_dataframe(df, smiles_column, name_column)
+            instance._construct(supplier, ring_cutoff=ring_cutoff, progress=progress, annotate=annotate,
+                                n_jobs=n_jobs, engine=engine, budget=budget)
+            names = [str(n) for n in df[name_column].values]
+            store.update_columns(names, {c: df[c].values for c in data_columns})
+            for name in names:
+                if not instance.molecule_in_graph(name):  # filtered
+                    store.remove(name)
+            return instance
+        supplier = read_dataframe(df, smiles_column, name_column, data_columns)
+        instance._construct(supplier, ring_cutoff=ring_cutoff, progress=progress, annotate=annotate,
+                            n_jobs=n_jobs, engine=engine, budget=budget)
         return instance
 
     def __repr__(self):
@@ -0,0 +1,225 @@
+"""
+scaffoldgraph.core.membership
+
+Defines an index of the molecules represented by each scaffold in a graph.
+"""
+
+import networkx as nx
+import numpy as np
+
+__all__ = ['MembershipIndex']
+
+AGGREGATES = ('count', 'sum', 'mean', 'median', 'min', 'max', 'std', 'var')
+
+
+def _readonly(array):
+    """Private: Mark an array as read-only (member arrays may be shared) and return it."""
+    array.flags.writeable = False
+    return array
+
+
+class MembershipIndex(object):
+    """An index of the molecules represented by each scaffold in a ScaffoldGraph.
+
+    Molecule nodes are numbered in graph order and the molecules
+    represented by each scaffold (molecules reachable from the scaffold)
+    are stored as a sorted array of molecule numbers. The index is computed
+    in a single pass over the graph in reverse topological order, merging
+    the member arrays of the successors of each node, such that building
+    the index costs roughly as much as a single traversal of the graph,
+    rather than a traversal per scaffold. A scaffold with a single child
+    scaffold and no molecules of its own shares the member array of its
+    child.
+
+    Indexes are created by ``ScaffoldGraph.build_membership_index`` and
+    used by ``ScaffoldGraph.get_molecules_for_scaffold`` when available.
+    An index is a snapshot of the graph, and is discarded by the graph
+    when its structure changes.
+
+    Examples
+    --------
+    >>> import scaffoldgraph as sg
+    >>> network = sg.ScaffoldNetwork.from_smiles_file('my_file.smi')
+    >>> index = network.build_membership_index()
+    >>> index.count('c1ccccc1')
+    125
+    >>> index.get_molecules('c1ccccc1')
+    ['MOL1', 'MOL2', ...]
+
+    """
+    def __init__(self, graph):
+        """
+        Parameters
+        ----------
+        graph : ScaffoldGraph
+            The graph to index.
+
+        """
+        self.molecules = []  # molecule number --> molecule node
+        self._members = {}  # node --> sorted array of molecule numbers
+        self._build(graph)
+
+    def _build(self, graph):
+        """Private: Compute the member arrays of each non-molecule node of a graph."""
+        numbers = {}
+        for node, node_type in graph.nodes(data='type'):
+            if node_type == 'molecule':
+                numbers[node] = len(self.molecules)
+                self.molecules.append(node)
+        members, succ = self._members, graph._succ
+        empty = _readonly(np.empty(0, dtype=np.int32))
+        for node in reversed(list(nx.topological_sort(graph))):
+            number = numbers.get(node)
+            if number is not None and not succ[node]:
+                continue  # leaf molecules are numbered directly
+            direct = [] if number is None else [number]
+            parts = []
+            for child in succ[node]:
+                child_members = members.get(child)
+                if child_members is None:
+                    direct.append(numbers[child])
+                elif len(child_members):
+                    parts.append(child_members)
+            if not direct and len(parts) == 1:
+                members[node] = parts[0]
+            elif not direct and not parts:
+                members[node] = empty
+            else:
+                parts.append(np.array(direct, dtype=np.int32))
+                members[node] = _readonly(np.unique(np.concatenate(parts)))
+        for node in numbers:
+            members.pop(node, None)  # molecules with successors are not indexed
+
+    def get(self, scaffold, default=None):
+        """Return the sorted array of molecule numbers represented by a scaffold.
+
+        Parameters
+        ----------
+        scaffold : str
+            The scaffold node key.
+        default : optional
+            Value returned if the scaffold is not indexed. The default
+            is None.
+
+        Returns
+        -------
+        numpy.ndarray
+            A read-only array of molecule numbers, which index the
+            ``molecules`` list.
+
+        """
+        return self._members.get(scaffold, default)
+
+    def get_molecules(self, scaffold):
+        """Return a list of the molecule nodes represented by a scaffold.
+
+        Molecules are returned in graph order. An empty list is returned
+        if the scaffold is not indexed.
+
+        """
+        molecules = self.molecules
+        return [molecules[i] for i in self._members.get(scaffold, ())]
+
+    def count(self, scaffold):
+        """Return the number of molecules represented by a scaffold."""
+        return len(self._members.get(scaffold, ()))
+
+    def aggregate(self, values, funcs, scaffolds=None):
+        """Aggregate molecule values over the molecules represented by each scaffold.
+
+        The member arrays of all scaffolds are gathered into a single
+        array of values, and built-in aggregates are computed for every
+        scaffold at once using NumPy (molecules are counted once per
+        scaffold, however many paths lead to them). Missing (NaN) values
+        are ignored.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            A float array of values for each molecule, aligned with
+            ``molecules``.
+        funcs : iterable
+            Aggregates to compute, either names of built-in aggregates
+            {'count', 'sum', 'mean', 'median', 'min', 'max', 'std', 'var'}
+            or callables reducing an array of values to a scalar.
+        scaffolds : iterable, optional
+            The scaffolds to aggregate. If None (default) all indexed
+            scaffolds are aggregated.
+
+        Returns
+        -------
+        dict
+            A dict mapping aggregate names (the name of callables) to
+            arrays aligned with `scaffolds`. Aggregates of scaffolds
+            without values are NaN (0 for 'count' and 'sum').
+
+        Raises
+        ------
+        ValueError
+            If an aggregate name is not recognized.
+
+        """
+        funcs = list(funcs)
+        for func in funcs:
+            if not callable(func) and func not in AGGREGATES:
+                raise ValueError(f'aggregate must be callable or one of {AGGREGATES}, not {func}')
+        scaffolds = list(self._members) if scaffolds is None else list(scaffolds)
+        empty = np.empty(0, dtype=np.int32)
+        rows = [self._members.get(scaffold, empty) for scaffold in scaffolds]
+        size = len(rows)
+        lengths = np.fromiter((len(row) for row in rows), dtype=np.int64, count=size)
+        segments = np.repeat(np.arange(size), lengths)
+        data = np.asarray(values, dtype=np.float64)[np.concatenate(rows) if rows else empty]
+        valid = ~np.isnan(data)
+        segments, data = segments[valid], data[valid]  # grouped by scaffold
+        count = np.bincount(segments, minlength=size)
+        total = np.bincount(segments, weights=data, minlength=size)
+        present = count > 0
+        starts = np.cumsum(count) - count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+        ordered = None
+
+        def _at(positions):
+            out = np.full(size, np.nan)
+            out[present] = ordered[positions[present]]
+            return out
+
+        results = {}
+        for func in funcs:
+            if callable(func):
+                groups = np.split(data, np.cumsum(count)[:-1]) if size else []
+                results[func.__name__] = np.array(
+                    [func(group) if len(group) else np.nan for group in groups], dtype=np.float64)
+                continue
+            if func in ('median', 'min', 'max') and ordered is None:
+                ordered = data[np.lexsort((data, segments))]
+            if func == 'count':
+                results[func] = count
+            elif func == 'sum':
+                results[func] = total
+            elif func == 'mean':
+                results[func] = mean
+            elif func == 'median':
+                results[func] = (_at(starts + (count - 1) // 2) + _at(starts + count // 2)) / 2
+            elif func == 'min':
+                results[func] = _at(starts)
+            elif func == 'max':
+                results[func] = _at(starts + count - 1)
+            else:
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    var = np.bincount(segments, weights=(data - mean[segments]) ** 2, minlength=size) / count
+                results[func] = np.sqrt(var) if func == 'std' else var
+        return results
+
+    def __contains__(self, scaffold):
+        return scaffold in self._members
+
+    def __len__(self):
+        return len(self._members)
+
+    def __repr__(self):
+        return '<{_cls} at {address}>'.format(
+            _cls=self.__class__.__name__,
+            address=hex(id(self))
+        )
@@ -0,0 +1,183 @@
+"""
+scaffoldgraph.core.reachability
+
+Defines an index of the ancestor/descendant relationships of scaffolds in a graph.
+"""
+
+import networkx as nx
+import numpy as np
+
+__all__ = ['ReachabilityIndex']
+
+
+def _csr(rows, size):
+    """Private: Return (indptr, indices) arrays from a list of sorted index arrays."""
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(row) for row in rows])
+    indices = np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+    return indptr, indices.astype(np.int32, copy=False)
+
+
+class ReachabilityIndex(object):
+    """An index of the ancestor/descendant relationships of scaffolds in a ScaffoldGraph.
+
+    Scaffold nodes are numbered in ascending order of hierarchy, and the
+    transitive closure of the scaffold hierarchy is stored in CSR arrays,
+    holding for each scaffold the sorted numbers of its ancestors (parent
+    scaffolds at any level) and descendants (child scaffolds at any level).
+    As numbers are ordered by hierarchy each row is also ordered by
+    hierarchy, such that a query limited to a number of hierarchy levels
+    is answered by slicing a row rather than traversing the graph, and an
+    ancestor check is a binary search of the (small) ancestor row of a
+    scaffold.
+
+    The closure is computed in a single pass over the graph in
+    topological order. Its size is the number of ancestor/descendant
+    pairs in the graph, which is bounded by the number of ring subsets
+    of each scaffold.
+
+    Indexes are created by ``ScaffoldGraph.build_reachability_index`` and
+    used by ``get_parent_scaffolds``, ``get_child_scaffolds`` and
+    ``is_parent_scaffold`` when available. An index is a snapshot of the
+    graph, and is discarded by the graph when its structure changes.
+
+    Examples
+    --------
+    >>> import scaffoldgraph as sg
+    >>> network = sg.ScaffoldNetwork.from_smiles_file('my_file.smi')
+    >>> index = network.build_reachability_index()
+    >>> index.is_ancestor('c1ccccc1', 'c1ccc(Cc2ccccc2)cc1')
+    True
+    >>> index.descendants('c1ccccc1', max_levels=1)
+    ['c1ccc(Cc2ccccc2)cc1', ...]
+
+    """
+    def __init__(self, graph):
+        """
+        Parameters
+        ----------
+        graph : ScaffoldGraph
+            The graph to index.
+
+        """
+        levels = [(n, h if h is not None else 0) for n, h in graph.get_scaffold_nodes(data='hierarchy')]
+        levels.sort(key=lambda x: x[1])
+        self.scaffolds = [n for n, _ in levels]  # scaffold number --> scaffold node
+        self._numbers = {n: i for i, n in enumerate(self.scaffolds)}
+        self._levels = np.array([h for _, h in levels], dtype=np.int64)
+        self._build(graph)
+
+    def _build(self, graph):
+        """Private: Compute the ancestor and descendant CSR arrays of the scaffold hierarchy."""
+        numbers, size = self._numbers, len(self.scaffolds)
+        empty = np.empty(0, dtype=np.int32)
+        ancestors = [empty] * size
+        for node in nx.topological_sort(graph):
+            i = numbers.get(node)
+            if i is None:
+                continue
+            parents = [numbers[p] for p in graph.predecessors(node) if p in numbers]
+            if not parents:
+                continue
+            parts = [ancestors[p] for p in parents]
+            parts.append(np.array(parents, dtype=np.int32))
+            ancestors[i] = np.unique(np.concatenate(parts))
+        self._anc_indptr, self._anc_indices = _csr(ancestors, size)
+        # descendants are the transposed ancestor relation
+        descendants = np.repeat(np.arange(size, dtype=np.int32), np.diff(self._anc_indptr))
+        order = np.lexsort((descendants, self._anc_indices))
+        counts = np.bincount(self._anc_indices, minlength=size)
+        self._desc_indptr = np.zeros(size + 1, dtype=np.int64)
+        self._desc_indptr[1:] = np.cumsum(counts)
+        self._desc_indices = descendants[order]
+
+    def _row(self, scaffold, indptr, indices, max_levels):
+        """Private: Return a row of scaffold numbers, limited to `max_levels` hierarchy levels if >= 0."""
+        i = self._numbers.get(scaffold)
+        if i is None:
+            return indices[:0]
+        row = indices[indptr[i]:indptr[i + 1]]
+        if max_levels >= 0:
+            level = self._levels[i]
+            lower = np.searchsorted(self._levels, level - max_levels, 'left')
+            upper = np.searchsorted(self._levels, level + max_levels, 'right')
+            row = row[np.searchsorted(row, lower):np.searchsorted(row, upper)]
+        return row
+
+    def ancestors(self, scaffold, max_levels=-1):
+        """Return a list of the ancestors (parent scaffolds at any level) of a scaffold.
+
+        Parameters
+        ----------
+        scaffold : str
+            The scaffold node key.
+        max_levels : int, optional
+            If >= 0 only return scaffolds with a hierarchy difference to the
+            query scaffold of at most `max_levels`. The default is -1.
+
+        Returns
+        -------
+        list
+            Scaffold nodes in ascending order of hierarchy. An empty list
+            is returned if the scaffold is not indexed.
+
+        """
+        scaffolds = self.scaffolds
+        row = self._row(scaffold, self._anc_indptr, self._anc_indices, max_levels)
+        return [scaffolds[j] for j in row.tolist()]
+
+    def descendants(self, scaffold, max_levels=-1):
+        """Return a list of the descendants (child scaffolds at any level) of a scaffold.
+
+        Parameters
+        ----------
+        scaffold : str
+            The scaffold node key.
+        max_levels : int, optional
+            If >= 0 only return scaffolds with a hierarchy difference to the
+            query scaffold of at most `max_levels`. The default is -1.
+
+        Returns
+        -------
+        list
+            Scaffold nodes in ascending order of hierarchy. An empty list
+            is returned if the scaffold is not indexed.
+
+        """
+        scaffolds = self.scaffolds
+        row = self._row(scaffold, self._desc_indptr, self._desc_indices, max_levels)
+        return [scaffolds[j] for j in row.tolist()]
+
+    def is_ancestor(self, ancestor, scaffold):
+        """Return True if `ancestor` is a parent scaffold (at any level) of `scaffold`.
+
+        Parameters
+        ----------
+        ancestor : str
+            The candidate ancestor scaffold node key.
+        scaffold : str
+            The scaffold node key.
+
+        Returns
+        -------
+        bool
+
+        """
+        i, j = self._numbers.get(ancestor), self._numbers.get(scaffold)
+        if i is None or j is None:
+            return False
+        row = self._anc_indices[self._anc_indptr[j]:self._anc_indptr[j + 1]]
+        k = np.searchsorted(row, i)
+        return bool(k < len(row) and row[k] == i)
+
+    def __contains__(self, scaffold):
+        return scaffold in self._numbers
+
+    def __len__(self):
+        return len(self.scaffolds)
+
+    def __repr__(self):
+        return '<{_cls} at {address}>'.format(
+            _cls=self.__class__.__name__,
+            address=hex(id(self))
+        )
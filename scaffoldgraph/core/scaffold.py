@@ -6,7 +6,11 @@ A module defining scaffold objects used in ScaffoldGraph
 
 import weakref
 
-from rdkit.Chem import MolToSmiles, MolFromSmiles, BondType, GetSymmSSSR
+from collections import namedtuple
+
+import numpy as np
+
+from rdkit.Chem import MolToSmiles, MolFromSmiles, BondType, GetSymmSSSR, Mol, PropertyPickleOptions
 
 
 class Scaffold(object):
@@ -83,8 +87,12 @@ class Scaffold(object):
         '_bonds',
         '_rings',
         '_ring_systems',
+        '_ring_descriptors',
+        '_ring_system_descriptors',
+        '_linkers',
         '_smiles',
-        'hash_func',
+        '_identifier',
+        '_hash_func',
         '__weakref__',
     )
 
@@ -117,7 +125,22 @@ class Scaffold(object):
         self._bonds = None
         self._rings = None
         self._ring_systems = None
-        self.hash_func = hash_func
+        self._ring_descriptors = None
+        self._ring_system_descriptors = None
+        self._linkers = None
+        self._identifier = None
+        self._hash_func = hash_func
+
+    @property
+    def hash_func(self):
+        """callable : Returns the function used to generate the canonical identifier."""
+        return self._hash_func
+
+    @hash_func.setter
+    def hash_func(self, value):
+        """Sets the function used to generate the canonical identifier."""
+        self._hash_func = value
+        self._identifier = None
 
     @property
     def name(self):
@@ -160,6 +183,47 @@ class Scaffold(object):
             self._ring_systems = RingSystemStack(self)
         return self._ring_systems
 
+    @property
+    def ring_descriptors(self):
+        """RingDescriptorTable : Return a table of descriptors for each ring in the scaffold.
+
+        The table contains NumPy arrays with one row per ring (size, number
+        of heteroatoms/N/O/S atoms, aromaticity, ring system index, linker
+        length and heteroatom linkage), computed lazily on first access.
+        It is used by the scaffold prioritization rules to evaluate parent
+        scaffolds with array operations.
+
+        """
+        if self._ring_descriptors is None:
+            self._ring_descriptors = RingDescriptorTable(self)
+        return self._ring_descriptors
+
+    @property
+    def ring_system_descriptors(self):
+        """RingSystemDescriptorTable : Return a table of descriptors for each ring system."""
+        if self._ring_system_descriptors is None:
+            self._ring_system_descriptors = RingSystemDescriptorTable(self)
+        return self._ring_system_descriptors
+
+    @property
+    def linkers(self):
+        """LinkerMap : Return the linkers attached to each ring and ring system of the scaffold.
+
+        The map is computed once (lazily) and shared by the fragmenters
+        and the linker based prioritization rules.
+
+        """
+        if self._linkers is None:
+            self._linkers = LinkerMap(self)
+        return self._linkers
+
+    @property
+    def delta(self):
+        """int : Return the delta value of the scaffold (nrrb - (num_rings - 1))."""
+        rb = [b for bix in self.rings.bond_rings for b in bix]
+        nrrb = len(rb) - len(set(rb))
+        return nrrb - (self.rings.count - 1)
+
     @property
     def smiles(self):
         """str : Returns the canonical smiles string of the scaffold."""
@@ -200,15 +264,23 @@ class Scaffold(object):
         `hash_func` attribute. This can be set upon initialization
         or afterwards by: Scaffold.hash_func = callable.
 
+        The identifier is computed once and memoized on the instance
+        (setting the `hash_func` resets the memoized identifier), thus
+        the underlying molecule should not be modified after the
+        identifier has been requested.
+
         Returns
         -------
         str
             A canonical identifier for the scaffold.
 
         """
-        if self.hash_func:
-            return self.hash_func(self.mol)
-        return self.smiles
+        if self._identifier is None:
+            if self._hash_func:
+                self._identifier = self._hash_func(self.mol)
+            else:
+                self._identifier = self.smiles
+        return self._identifier
 
     @classmethod
     def from_smiles(cls, smiles, hash_func=None):
@@ -235,6 +307,40 @@ class Scaffold(object):
         mol = MolFromSmiles(smiles)
         return cls(mol, hash_func)
 
+    def to_binary(self):
+        """Return the scaffold molecule in binary format (including all properties).
+
+        Returns
+        -------
+        bytes
+
+        """
+        return self.mol.ToBinary(PropertyPickleOptions.AllProps)
+
+    def to_record(self, scaffold_id=None, keep_binary=True):
+        """Return a compact record of the scaffold.
+
+        Parameters
+        ----------
+        scaffold_id : int, optional
+            The integer id assigned to the scaffold by a graph.
+            The default is None.
+        keep_binary : bool, optional
+            If True (default) keep the molecule in binary format, such
+            that the scaffold can be rebuilt exactly, else it is rebuilt
+            from its SMILES.
+
+        Returns
+        -------
+        ScaffoldRecord
+
+        See Also
+        --------
+        ScaffoldRecord
+
+        """
+        return ScaffoldRecord.from_scaffold(self, scaffold_id, keep_binary)
+
     def __getnewargs__(self):
         return (self.mol, {})
 
@@ -242,11 +348,15 @@ class Scaffold(object):
         return self.mol, self.hash_func
 
     def __setstate__(self, state):
-        self.mol, self.hash_func = state
+        self.mol, self._hash_func = state
+        setattr(self, '_identifier', None)
         setattr(self, '_atoms', None)
         setattr(self, '_bonds', None)
         setattr(self, '_rings', None)
         setattr(self, '_ring_systems', None)
+        setattr(self, '_ring_descriptors', None)
+        setattr(self, '_ring_system_descriptors', None)
+        setattr(self, '_linkers', None)
 
     def __bool__(self):
         """Returns True if the molecule contains at least 1 atom."""
@@ -259,8 +369,11 @@ class Scaffold(object):
     def __eq__(self, other):
         if isinstance(other, str):
             return self.get_canonical_identifier() == other
+        if isinstance(other, ScaffoldRecord):
+            return self.get_canonical_identifier() == other.identifier
         return (
-            type(self) == type(other) and hash(self), hash(other)
+            type(self) == type(other) and
+            self.get_canonical_identifier() == other.get_canonical_identifier()
         )
 
     def __str__(self):
@@ -274,6 +387,601 @@ class Scaffold(object):
         )
 
 
+class ScaffoldRecord(object):
+    """A compact, immutable record of a Scaffold.
+
+    A record holds the canonical identifier, SMILES and ring counts of a
+    scaffold along with the fragmentation properties of its molecule and
+    optionally the molecule in binary format, without keeping an rdkit
+    Mol (and the cached atoms, bonds and ring information) alive. Records
+    are used by graphs constructed with ``compact_scaffolds=True`` to hold
+    scaffolds whose hierarchy is not being expanded, the full Scaffold is
+    rebuilt on demand (see ``to_scaffold``).
+
+    Records hash and compare equal to scaffolds (and strings) with the same
+    canonical identifier, such that they can be used to query a graph.
+
+    Attributes
+    ----------
+    scaffold_id : int, None
+        The integer id assigned to the scaffold by a graph (if any).
+    identifier : str
+        The canonical identifier of the scaffold.
+    smiles : str
+        The canonical SMILES of the scaffold.
+    num_rings : int
+        The number of rings in the scaffold.
+    num_ring_systems : int
+        The number of ring systems in the scaffold.
+    removed_ring_idx : int, None
+        The index of the ring removed from the child scaffold.
+    prioritization_rule : str, None
+        The prioritization rule used to select the scaffold.
+    binary : bytes, None
+        The scaffold molecule in binary format (including all properties).
+
+    Examples
+    --------
+    >>> scaffold = Scaffold.from_smiles('c1ccc(CCN2CCCCC2)cc1')
+    >>> record = scaffold.to_record()
+    >>> record.num_rings
+    2
+    >>> record == scaffold
+    True
+    >>> rebuilt = record.to_scaffold()
+
+    """
+    __slots__ = (
+        'scaffold_id',
+        'identifier',
+        'smiles',
+        'num_rings',
+        'num_ring_systems',
+        'removed_ring_idx',
+        'prioritization_rule',
+        'binary',
+    )
+
+    def __init__(self, identifier, smiles, num_rings, num_ring_systems, removed_ring_idx=None,
+                 prioritization_rule=None, binary=None, scaffold_id=None):
+        self.scaffold_id = scaffold_id
+        self.identifier = identifier
+        self.smiles = smiles
+        self.num_rings = num_rings
+        self.num_ring_systems = num_ring_systems
+        self.removed_ring_idx = removed_ring_idx
+        self.prioritization_rule = prioritization_rule
+        self.binary = binary
+
+    @classmethod
+    def from_scaffold(cls, scaffold, scaffold_id=None, keep_binary=True):
+        """Construct a record from a Scaffold.
+
+        Parameters
+        ----------
+        scaffold : Scaffold
+            The scaffold to record.
+        scaffold_id : int, optional
+            The integer id assigned to the scaffold by a graph.
+            The default is None.
+        keep_binary : bool, optional
+            If True (default) keep the molecule in binary format.
+
+        Returns
+        -------
+        ScaffoldRecord
+
+        """
+        return cls(
+            scaffold.get_canonical_identifier(),
+            scaffold.smiles,
+            scaffold.rings.count,
+            scaffold.ring_systems.count,
+            scaffold.removed_ring_idx,
+            scaffold.prioritization_rule,
+            scaffold.to_binary() if keep_binary else None,
+            scaffold_id,
+        )
+
+    def to_binary(self):
+        """Return the scaffold molecule in binary format.
+
+        If the binary was not kept the molecule is rebuilt from its SMILES.
+
+        Returns
+        -------
+        bytes
+
+        """
+        if self.binary is not None:
+            return self.binary
+        return self.to_scaffold().to_binary()
+
+    def to_scaffold(self, hash_func=None):
+        """Rebuild the full Scaffold from the record.
+
+        Parameters
+        ----------
+        hash_func : callable, optional
+            The hash function of the rebuilt scaffold. If None (default)
+            the canonical SMILES is used.
+
+        Returns
+        -------
+        Scaffold
+
+        """
+        if self.binary is not None:
+            return Scaffold(Mol(self.binary), hash_func)
+        scaffold = Scaffold.from_smiles(self.smiles, hash_func)
+        if self.removed_ring_idx is not None:
+            scaffold.removed_ring_idx = self.removed_ring_idx
+        if self.prioritization_rule is not None:
+            scaffold.prioritization_rule = self.prioritization_rule
+        return scaffold
+
+    def get_canonical_identifier(self):
+        """str : Returns the canonical identifier of the scaffold."""
+        return self.identifier
+
+    def __getstate__(self):
+        return tuple(getattr(self, x) for x in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def __bool__(self):
+        """Returns True (records are only created for non-empty scaffolds)."""
+        return True
+
+    def __hash__(self):
+        """Returns a hash of the canonical identifier."""
+        return hash(self.identifier)
+
+    def __eq__(self, other):
+        if isinstance(other, str):
+            return self.identifier == other
+        if isinstance(other, (Scaffold, ScaffoldRecord)):
+            return self.identifier == other.get_canonical_identifier()
+        return NotImplemented
+
+    def __str__(self):
+        """Returns the SMILES string of the scaffold."""
+        return self.smiles
+
+    def __repr__(self):
+        return '<{_cls} at {address}>'.format(
+            _cls=self.__class__.__name__,
+            address=hex(id(self))
+        )
+
+
+class _DescriptorTable(object):
+    """Private: Base class for lazily computed tables of scaffold descriptors.
+
+    Columns are NumPy arrays computed on first access in groups of
+    related fields, defined by the ``_groups`` attribute of subclasses
+    as a mapping of field name to the name of the method computing the
+    group of fields (returning a dict of columns).
+
+    """
+    __slots__ = ('owner', '_columns')
+    fields = ()
+    _groups = {}
+
+    def __init__(self, owner):
+        self.owner = weakref.proxy(owner)
+        self._columns = {}
+
+    def to_array(self):
+        """numpy.ndarray: Return the table as a structured array (computes all fields)."""
+        columns = [self[f] for f in self.fields]
+        table = np.zeros(len(self), dtype=[(f, c.dtype) for f, c in zip(self.fields, columns)])
+        for field, column in zip(self.fields, columns):
+            table[field] = column
+        return table
+
+    def __getitem__(self, field):
+        try:
+            return self._columns[field]
+        except KeyError:
+            if field not in self._groups:
+                raise KeyError(f'{field} is not a descriptor field')
+        self._columns.update(getattr(self, self._groups[field])())
+        return self._columns[field]
+
+    def __contains__(self, field):
+        return field in self._groups
+
+    def __repr__(self):
+        return '<{_cls} at {address}>'.format(
+            _cls=self.__class__.__name__,
+            address=hex(id(self))
+        )
+
+
+class RingDescriptorTable(_DescriptorTable):
+    """A table of descriptors for each ring of a Scaffold.
+
+    This class is initialized by the Scaffold class. Each field is a
+    NumPy array containing one value per ring (in the order of
+    ``Scaffold.rings``) and is computed on first access.
+
+    Fields
+    ------
+    size : number of atoms in the ring
+    num_het : number of heteroatoms in the ring
+    num_n, num_o, num_s : number of N, O and S atoms in the ring
+    aromatic : True if the ring is aromatic
+    ring_system : index of the ring system containing the ring
+    linker_length : number of atoms in the linkers attached to the ring
+    het_linked : True if a linker of the ring is attached to a ring
+        heteroatom at either end
+
+    Examples
+    --------
+    >>> scaffold = Scaffold.from_smiles('c1ccc(CC2CCNCC2)cc1')
+    >>> scaffold.ring_descriptors['num_n']
+    array([1, 0], dtype=int32)
+    >>> scaffold.ring_descriptors['linker_length']
+    array([1, 1], dtype=int32)
+
+    """
+    __slots__ = ('_atomic_nums',)
+    fields = (
+        'size',
+        'num_het',
+        'num_n',
+        'num_o',
+        'num_s',
+        'aromatic',
+        'ring_system',
+        'linker_length',
+        'het_linked',
+    )
+    _groups = {
+        'size': '_compute_size',
+        'num_het': '_compute_atom_counts',
+        'num_n': '_compute_atom_counts',
+        'num_o': '_compute_atom_counts',
+        'num_s': '_compute_atom_counts',
+        'aromatic': '_compute_aromatic',
+        'ring_system': '_compute_ring_system',
+        'linker_length': '_compute_linkers',
+        'het_linked': '_compute_linkers',
+    }
+
+    def __init__(self, owner):
+        super(RingDescriptorTable, self).__init__(owner)
+        self._atomic_nums = None
+
+    @property
+    def atomic_nums(self):
+        """dict : Return the atomic number of each ring atom (keyed by atom index)."""
+        if self._atomic_nums is None:
+            atoms = self.owner.atoms
+            ring_atoms = set(ix for aix in self.owner.rings.atom_rings for ix in aix)
+            self._atomic_nums = {ix: atoms[ix].GetAtomicNum() for ix in ring_atoms}
+        return self._atomic_nums
+
+    def _compute_size(self):
+        return {'size': np.array([len(aix) for aix in self.owner.rings.atom_rings], dtype=np.int32)}
+
+    def _compute_atom_counts(self):
+        return _count_atoms(self.atomic_nums, self.owner.rings.atom_rings)
+
+    def _compute_aromatic(self):
+        mol = self.owner.mol
+        aromatic = [
+            all([mol.GetBondWithIdx(x).GetIsAromatic() for x in bix])
+            for bix in self.owner.rings.bond_rings
+        ]
+        return {'aromatic': np.array(aromatic, dtype=bool)}
+
+    def _compute_ring_system(self):
+        return {'ring_system': np.array(self.owner.rings.system_index, dtype=np.int32)}
+
+    def _compute_linkers(self):
+        linkers = self.owner.linkers
+        ring_linkers = [linkers.ring_linkers(rix) for rix in range(len(self))]
+        return {
+            'linker_length': np.array([len(r.atoms) for r in ring_linkers], dtype=np.int32),
+            'het_linked': np.array([r.het_linked for r in ring_linkers], dtype=bool),
+        }
+
+    def __len__(self):
+        """Returns the number of rings in the table."""
+        return len(self.owner.rings.atom_rings)
+
+
+class RingSystemDescriptorTable(_DescriptorTable):
+    """A table of descriptors for each ring system of a Scaffold.
+
+    This class is initialized by the Scaffold class. Each field is a
+    NumPy array containing one value per ring system (in the order of
+    ``Scaffold.ring_systems``) and is computed on first access.
+
+    Fields
+    ------
+    num_rings : number of rings in the ring system
+    num_aromatic : number of aromatic rings in the ring system
+    num_het : number of heteroatoms in the ring system
+    num_n, num_o, num_s : number of N, O and S atoms in the ring system
+    delta : the delta value of the ring system (nrrb - (num_rings - 1))
+
+    """
+    __slots__ = ()
+    fields = (
+        'num_rings',
+        'num_aromatic',
+        'num_het',
+        'num_n',
+        'num_o',
+        'num_s',
+        'delta',
+    )
+    _groups = {
+        'num_rings': '_compute_num_rings',
+        'num_aromatic': '_compute_num_aromatic',
+        'num_het': '_compute_atom_counts',
+        'num_n': '_compute_atom_counts',
+        'num_o': '_compute_atom_counts',
+        'num_s': '_compute_atom_counts',
+        'delta': '_compute_delta',
+    }
+
+    def _compute_num_rings(self):
+        ring_indexes = self.owner.ring_systems.ring_indexes
+        return {'num_rings': np.array([len(rix) for rix in ring_indexes], dtype=np.int32)}
+
+    def _compute_num_aromatic(self):
+        rings = self.owner.ring_descriptors
+        counts = np.bincount(rings['ring_system'], weights=rings['aromatic'], minlength=len(self))
+        return {'num_aromatic': counts.astype(np.int32)}
+
+    def _compute_atom_counts(self):
+        atomic_nums = self.owner.ring_descriptors.atomic_nums
+        return _count_atoms(atomic_nums, self.owner.ring_systems.atom_rings)
+
+    def _compute_delta(self):
+        bond_rings, delta = self.owner.rings.bond_rings, []
+        for rix in self.owner.ring_systems.ring_indexes:
+            rb = [b for r in rix for b in bond_rings[r]]
+            nrrb = len(rb) - len(set(rb))
+            delta.append(nrrb - (len(rix) - 1))
+        return {'delta': np.array(delta, dtype=np.int32)}
+
+    def __len__(self):
+        """Returns the number of ring systems in the table."""
+        return len(self.owner.ring_systems.ring_indexes)
+
+
+def _count_atoms(atomic_nums, atom_sets):
+    """Private: Count heteroatoms and N, O and S atoms in sets of atom indexes."""
+    counts = []
+    for aix in atom_sets:
+        nums = [atomic_nums[x] for x in aix]
+        counts.append((
+            len(nums) - nums.count(6) - nums.count(1),
+            nums.count(7), nums.count(8), nums.count(16),
+        ))
+    counts = np.array(counts, dtype=np.int32).reshape(-1, 4).T
+    return {'num_het': counts[0], 'num_n': counts[1], 'num_o': counts[2], 'num_s': counts[3]}
+
+
+Linker = namedtuple('Linker', ['atoms', 'corrected', 'attachments'])
+RingLinkers = namedtuple('RingLinkers', ['atoms', 'attachments', 'het_linked'])
+
+
+class LinkerMap(object):
+    """A map of the linkers attached to the rings and ring systems of a Scaffold.
+
+    This class is initialized by the Scaffold class. Linkers are
+    collected iteratively on integer adjacency lists of the scaffold,
+    built once on initialization, and memoized per origin atom.
+
+    Attributes
+    ----------
+    owner : weakproxy (Scaffold)
+        A weak reference to the owning Scaffold object.
+    degree : list
+        The degree of each atom.
+    neighbors : list
+        A list of (bond index, neighbor index) tuples for each atom.
+    bond_atoms : list
+        The (begin, end) atom indexes of each bond.
+    bond_types : list
+        The rdkit BondType of each bond.
+    num_bond_rings : list
+        The number of rings containing each bond.
+
+    Examples
+    --------
+    >>> scaffold = Scaffold.from_smiles('c1ccc(CCN2CCCCC2)cc1')
+    >>> scaffold.linkers.ring_linkers(0)
+    RingLinkers(atoms=frozenset({4, 5}), attachments=frozenset({3, 6}), het_linked=True)
+
+    """
+    __slots__ = (
+        'owner',
+        'degree',
+        'neighbors',
+        'bond_atoms',
+        'bond_types',
+        'num_bond_rings',
+        '_collected',
+        '_rings',
+        '_ring_systems',
+    )
+
+    def __init__(self, owner):
+        self.owner = weakref.proxy(owner)
+        mol, info = owner.mol, owner.rings.info
+        self.degree = [a.GetDegree() for a in owner.atoms]
+        self.neighbors = neighbors = [[] for _ in self.degree]
+        self.bond_atoms, self.bond_types, self.num_bond_rings = [], [], []
+        for bix in range(mol.GetNumBonds()):
+            bond = mol.GetBondWithIdx(bix)
+            x, y = bond.GetBeginAtomIdx(), bond.GetEndAtomIdx()
+            self.bond_atoms.append((x, y))
+            self.bond_types.append(bond.GetBondType())
+            self.num_bond_rings.append(info.NumBondRings(bix))
+            neighbors[x].append((bix, y))
+            neighbors[y].append((bix, x))
+        self._collected = {}
+        self._rings = None
+        self._ring_systems = None
+
+    def collect(self, origin):
+        """Collect the linker atoms starting from an origin atom.
+
+        Equivalent to ``collect_linker_atoms`` (with `include_origin`)
+        without modifying the molecule, the atoms which would have their
+        properties corrected are returned instead.
+
+        Parameters
+        ----------
+        origin : int
+            Index of the origin atom.
+
+        Returns
+        -------
+        Linker
+            A named tuple (atoms, corrected, attachments) of frozensets
+            containing the linker atoms (to be removed), the atoms to
+            correct (``correct_atom_props``) and the ring attachment
+            points of the linker.
+
+        """
+        try:
+            return self._collected[origin]
+        except KeyError:
+            pass
+        degree, neighbors, num_bond_rings = self.degree, self.neighbors, self.num_bond_rings
+        atoms, corrected, attachments = set(), set(), set()
+        visited, stack = set(), [origin]
+        while stack:
+            atom = stack.pop()
+            for bix, other in neighbors[atom]:
+                if bix in visited or num_bond_rings[bix] > 0:
+                    continue
+                other_degree = degree[other]
+                if other_degree == 1:  # Terminal side-chain
+                    atoms.add(atom)
+                    atoms.add(other)
+                    corrected.add(atom)
+                    visited.add(bix)
+                elif other_degree == 2:  # Two neighboring atoms (remove)
+                    atoms.add(atom)
+                    visited.add(bix)
+                    stack.append(other)
+                elif other_degree > 2:  # Branching point
+                    non_terminal_branches = 0
+                    for _, neighbor in neighbors[other]:
+                        if degree[neighbor] != 1:
+                            non_terminal_branches += 1
+                    if non_terminal_branches < 3:  # Continue with deletion
+                        atoms.add(atom)
+                        visited.add(bix)
+                        stack.append(other)
+                    else:  # Branching point links two rings
+                        if self.bond_types[bix] != BondType.DOUBLE:
+                            atoms.add(atom)
+                            corrected.add(other)
+                            visited.add(bix)
+                        if self._in_ring(other):
+                            attachments.add(other)
+        if self._in_ring(origin):
+            attachments.add(origin)
+        linker = Linker(frozenset(atoms), frozenset(corrected), frozenset(attachments))
+        self._collected[origin] = linker
+        return linker
+
+    def is_attachment_point(self, index):
+        """Return True if a ring atom is a linker attachment point.
+
+        Attachment points are ring atoms with a bond to a linker, excluding
+        exocyclic attachments (terminal double bonded atoms) and atoms
+        shared between rings bonded only to ring atoms (see
+        ``Ring.get_attachment_points``).
+
+        """
+        if self.degree[index] <= 2:
+            return False
+        bonds = self.neighbors[index]
+        num_bond_rings = self.num_bond_rings
+        if self.owner.rings.info.NumAtomRings(index) != 1 and all(num_bond_rings[b] > 0 for b, _ in bonds):
+            return False
+        for bix, other in bonds:  # exclude exocyclic attachments
+            if num_bond_rings[bix] == 0 and self.bond_types[bix] == BondType.DOUBLE and self.degree[other] == 1:
+                return False
+        return True
+
+    def ring_linkers(self, index):
+        """Return the linkers attached to a ring.
+
+        Parameters
+        ----------
+        index : int
+            Index of the ring (in ``Scaffold.rings``).
+
+        Returns
+        -------
+        RingLinkers
+            A named tuple (atoms, attachments, het_linked) containing the
+            linker atoms attached to the ring (excluding its attachment
+            points), the ring attachment points at either end of the
+            linkers and True if any attachment point is a heteroatom.
+
+        """
+        if self._rings is None:
+            self._rings = [self._ring_linkers(aix) for aix in self.owner.rings.atom_rings]
+        return self._rings[index]
+
+    def ring_system_linkers(self, index):
+        """Return the linkers attached to a ring system.
+
+        Parameters
+        ----------
+        index : int
+            Index of the ring system (in ``Scaffold.ring_systems``).
+
+        Returns
+        -------
+        RingLinkers
+            See ``LinkerMap.ring_linkers``.
+
+        """
+        if self._ring_systems is None:
+            self._ring_systems = [self._ring_linkers(aix) for aix in self.owner.ring_systems.atom_rings]
+        return self._ring_systems[index]
+
+    def _ring_linkers(self, atom_indexes):
+        """Private: Return the linkers attached to a set of ring atoms."""
+        linker, attachments, points = set(), set(), set()
+        for ix in atom_indexes:
+            if self.is_attachment_point(ix):
+                collected = self.collect(ix)
+                linker.update(collected.atoms)
+                attachments.update(collected.attachments)
+                points.add(ix)
+        linker.difference_update(points)
+        atoms = self.owner.atoms
+        het_linked = any(atoms[x].GetAtomicNum() not in (1, 6) for x in attachments)
+        return RingLinkers(frozenset(linker), frozenset(attachments), het_linked)
+
+    def _in_ring(self, index):
+        """Private: Return True if an atom is in a ring."""
+        return any(self.num_bond_rings[b] > 0 for b, _ in self.neighbors[index])
+
+    def __repr__(self):
+        return '<{_cls} at {address}>'.format(
+            _cls=self.__class__.__name__,
+            address=hex(id(self))
+        )
+
+
 class RingStack(object):
     """A class for holding ring information of a Scaffold.
 
@@ -292,12 +1000,23 @@ class RingStack(object):
         A tuple of tuples containing the bond indicies for
         each ring.
 
+    Notes
+    -----
+    Ring membership is also available as integer bitmasks (bit `i` set
+    if atom/bond `i` is in the ring), see ``atom_masks`` and
+    ``bond_masks``. The ring systems are assigned with a union-find
+    over the atoms shared between rings (see ``system_index``).
+
     """
     __slots__ = (
         'owner',
         'info',
         'atom_rings',
         'bond_rings',
+        '_atom_masks',
+        '_bond_masks',
+        '_shared_atom_mask',
+        '_systems',
     )
 
     def __init__(self, owner):
@@ -305,6 +1024,10 @@ class RingStack(object):
         self.info = self._initialize_ring_info()
         self.atom_rings = self.info.AtomRings()
         self.bond_rings = self.info.BondRings()
+        self._atom_masks = None
+        self._bond_masks = None
+        self._shared_atom_mask = None
+        self._systems = None
 
     def _initialize_ring_info(self):
         """RingInfo: Initialize ring information, catch if not available"""
@@ -322,6 +1045,49 @@ class RingStack(object):
         """int : Returns the number of rings in the stack."""
         return len(self)
 
+    @property
+    def atom_masks(self):
+        """tuple : Returns an integer bitmask of the atoms in each ring."""
+        if self._atom_masks is None:
+            shared = seen = 0
+            masks = []
+            for ring in self.atom_rings:
+                mask = _to_mask(ring)
+                shared |= seen & mask
+                seen |= mask
+                masks.append(mask)
+            self._atom_masks = tuple(masks)
+            self._shared_atom_mask = shared
+        return self._atom_masks
+
+    @property
+    def bond_masks(self):
+        """tuple : Returns an integer bitmask of the bonds in each ring."""
+        if self._bond_masks is None:
+            self._bond_masks = tuple(_to_mask(ring) for ring in self.bond_rings)
+        return self._bond_masks
+
+    @property
+    def shared_atom_mask(self):
+        """int : Returns a bitmask of the atoms contained in more than one ring."""
+        if self._shared_atom_mask is None:
+            _ = self.atom_masks
+        return self._shared_atom_mask
+
+    @property
+    def system_index(self):
+        """tuple : Returns the index of the ring system containing each ring."""
+        if self._systems is None:
+            self._systems = _find_ring_systems(self.atom_rings)
+        return self._systems[0]
+
+    @property
+    def system_rings(self):
+        """tuple : Returns the ring indicies of each ring system."""
+        if self._systems is None:
+            self._systems = _find_ring_systems(self.atom_rings)
+        return self._systems[1]
+
     def to_list(self):
         """list: Return a list of Rings in the stack."""
         return list(self)
@@ -333,7 +1099,8 @@ class RingStack(object):
             return Ring(
                 self.owner,
                 self.atom_rings[index],
-                self.bond_rings[index]
+                self.bond_rings[index],
+                index
             )
         else:
             raise TypeError(
@@ -351,6 +1118,67 @@ class RingStack(object):
         )
 
 
+def _to_mask(indexes):
+    """Private: Return an integer bitmask with the bits of the given indexes set."""
+    mask = 0
+    for ix in indexes:
+        mask |= 1 << ix
+    return mask
+
+
+def _find_ring_systems(atom_rings):
+    """Private: Assign rings sharing atoms to ring systems with a union-find.
+
+    Rings are processed in order, each ring becoming the root of the
+    systems it joins, so that systems are ordered by their last ring and
+    the rings of a system are ordered as the ring is followed by the
+    rings of the joined systems.
+
+    Returns
+    -------
+    tuple
+        A tuple (system_index, system_rings) containing the index of the
+        system of each ring and the ring indexes of each system.
+
+    """
+    num_rings = len(atom_rings)
+    parent = list(range(num_rings))
+    members = [[i] for i in parent]
+    first_ring = {}  # atom -> first ring containing the atom
+    for i, ring in enumerate(atom_rings):
+        roots = None
+        for aix in ring:
+            j = first_ring.get(aix)
+            if j is None:
+                first_ring[aix] = i
+                continue
+            while parent[j] != j:  # find (with path halving)
+                parent[j] = j = parent[parent[j]]
+            if j != i:
+                if roots is None:
+                    roots = {j}
+                else:
+                    roots.add(j)
+        if roots is not None:  # union (the current ring becomes the root)
+            merged = members[i]
+            for r in sorted(roots):
+                merged.extend(members[r])
+                members[r] = None
+                parent[r] = i
+
+    # A parent always has a larger index than its child
+    root = parent[:]
+    for i in range(num_rings - 1, -1, -1):
+        root[i] = root[root[i]]
+    roots = [i for i, p in enumerate(parent) if p == i]
+    if len(roots) == 1:
+        return (0,) * num_rings, (tuple(members[roots[0]]),)
+    position = {r: sys_idx for sys_idx, r in enumerate(roots)}
+    system_index = tuple([position[r] for r in root])
+    system_rings = tuple([tuple(members[r]) for r in roots])
+    return system_index, system_rings
+
+
 class Ring(object):
     """A class for holding information about a single ring.
 
@@ -364,14 +1192,17 @@ class Ring(object):
         Indicies of atoms in the ring.
     bix : tuple
         Indicies of bonds in the ring.
+    index : int, None
+        Index of the ring in the owners RingStack (None if unknown).
 
     """
-    __slots__ = 'owner', 'aix', 'bix'
+    __slots__ = 'owner', 'aix', 'bix', 'index'
 
-    def __init__(self, owner, atom_indexes, bond_indexes):
+    def __init__(self, owner, atom_indexes, bond_indexes, index=None):
         self.owner = owner
         self.aix = atom_indexes
         self.bix = bond_indexes
+        self.index = index
 
     @property
     def atoms(self):
@@ -383,6 +1214,13 @@ class Ring(object):
         """list : Returns the rdkit bonds in this ring."""
         return [self.owner.bonds[x] for x in self.bix]
 
+    @property
+    def atom_mask(self):
+        """int : Returns an integer bitmask of the atoms in this ring."""
+        if self.index is None:
+            return _to_mask(self.aix)
+        return self.owner.rings.atom_masks[self.index]
+
     @property
     def size(self):
         """int : Returns the size of the ring (number of atoms)."""
@@ -410,20 +1248,17 @@ class Ring(object):
 
         """
         attachments = set()
-        ri = self.owner.rings.info
-        for atom in self.atoms:
-            index = atom.GetIdx()
-            if (
-                    ri.NumAtomRings(index) == 1 or
-                    any([not b.IsInRing() for b in atom.GetBonds()])
-            ):
-                if atom.GetDegree() > 2:
-                    if (
-                        include_exocyclic is False
-                        and self.is_exocyclic_attachment(atom)
-                    ):
-                        continue
-                    attachments.add(index)
+        shared = self.owner.rings.shared_atom_mask
+        atoms = self.owner.atoms
+        for index in self.aix:
+            atom = atoms[index]
+            if atom.GetDegree() > 2 and (not shared >> index & 1 or _has_acyclic_bond(atom)):
+                if (
+                    include_exocyclic is False
+                    and _is_exocyclic_attachment(atom)
+                ):
+                    continue
+                attachments.add(index)
         return attachments
 
     def is_exocyclic_attachment(self, atom):
@@ -446,19 +1281,9 @@ class Ring(object):
             If the supplied atom is not within the ring.
 
         """
-        exocyclic = False
-        if atom not in self.atoms:
+        if not self.atom_mask >> atom.GetIdx() & 1:
             raise ValueError(f'atom {atom.GetIdx()} not in ring')
-        ri = self.owner.rings.info
-        for bond in atom.GetBonds():
-            if ri.NumBondRings(bond.GetIdx()) == 0:
-                other = bond.GetOtherAtom(atom)
-                if (
-                    bond.GetBondType() == BondType.DOUBLE
-                    and other.GetDegree() == 1
-                ):
-                    exocyclic = True
-        return exocyclic
+        return _is_exocyclic_attachment(atom)
 
     def get_ring_system(self):
         """Return the ring system associated with this ring.
@@ -475,6 +1300,8 @@ class Ring(object):
         RingSystem
 
         """
+        if self.index is not None:
+            return self.owner.ring_systems[self.owner.rings.system_index[self.index]]
         for system in self.owner.ring_systems:
             if system.contains(self):
                 return system
@@ -490,6 +1317,26 @@ class Ring(object):
         )
 
 
+def _has_acyclic_bond(atom):
+    """Private: Return True if an atom has a bond which is not in a ring."""
+    for bond in atom.GetBonds():
+        if not bond.IsInRing():
+            return True
+    return False
+
+
+def _is_exocyclic_attachment(atom):
+    """Private: Return True if an atom has an exocyclic (terminal) double bond."""
+    for bond in atom.GetBonds():
+        if (
+            not bond.IsInRing()
+            and bond.GetBondType() == BondType.DOUBLE
+            and bond.GetOtherAtom(atom).GetDegree() == 1
+        ):
+            return True
+    return False
+
+
 class RingSystemStack(object):
     """A class for holding the ring system information of a Scaffold.
 
@@ -514,43 +1361,61 @@ class RingSystemStack(object):
         'owner',
         'atom_rings',
         'bond_rings',
-        'ring_indexes'
+        'ring_indexes',
+        '_atom_masks',
+        '_bond_masks',
     )
 
     def __init__(self, owner):
         self.owner = weakref.proxy(owner)
         systems = self._find_fused_rings()
         self.ring_indexes, self.atom_rings, self.bond_rings = systems
+        self._atom_masks = None
+        self._bond_masks = None
 
     def _find_fused_rings(self):
         """Private: find fused rings in the molecule."""
-        rings = zip(self.owner.rings.atom_rings, self.owner.rings.bond_rings)
-        rings = [([i], set(a), set(b)) for i, (a, b) in enumerate(rings)]
-        systems = []
-        for ring in rings:
-            atoms = ring[1]
-            n_systems = []
-            for system in systems:
-                common = atoms.intersection(system[1])
-                if common:
-                    ring[1].update(system[1])
-                    ring[2].update(system[2])
-                    ring[0].extend(system[0])
-                else:
-                    n_systems.append(system)
-            n_systems.append(ring)
-            systems = n_systems
-        if systems:
-            idx, aix, bix = zip(*systems)
-            return tuple(map(tuple, idx)), tuple(map(tuple, aix)), tuple(map(tuple, bix))
-        else:
-            return (), (), ()
+        rings = self.owner.rings
+        ring_indexes = rings.system_rings
+        atom_rings, bond_rings = [], []
+        for rix in ring_indexes:
+            if len(rix) == 1:
+                atom_rings.append(tuple(sorted(rings.atom_rings[rix[0]])))
+                bond_rings.append(tuple(sorted(rings.bond_rings[rix[0]])))
+            else:
+                atom_rings.append(tuple(sorted({x for r in rix for x in rings.atom_rings[r]})))
+                bond_rings.append(tuple(sorted({x for r in rix for x in rings.bond_rings[r]})))
+        return ring_indexes, tuple(atom_rings), tuple(bond_rings)
 
     @property
     def count(self):
         """int : Returns the number of ring systems in the stack."""
         return len(self)
 
+    @property
+    def atom_masks(self):
+        """tuple : Returns an integer bitmask of the atoms in each ring system."""
+        if self._atom_masks is None:
+            self._atom_masks = self._join_masks(self.owner.rings.atom_masks)
+        return self._atom_masks
+
+    @property
+    def bond_masks(self):
+        """tuple : Returns an integer bitmask of the bonds in each ring system."""
+        if self._bond_masks is None:
+            self._bond_masks = self._join_masks(self.owner.rings.bond_masks)
+        return self._bond_masks
+
+    def _join_masks(self, ring_masks):
+        """Private: Join the masks of the rings in each ring system."""
+        joined = []
+        for rix in self.ring_indexes:
+            mask = 0
+            for r in rix:
+                mask |= ring_masks[r]
+            joined.append(mask)
+        return tuple(joined)
+
     def to_list(self):
         """list: return a list of the ring systems in the stack."""
         return list(self)
@@ -563,7 +1428,8 @@ class RingSystemStack(object):
                 self.owner,
                 self.atom_rings[index],
                 self.bond_rings[index],
-                self.ring_indexes[index]
+                self.ring_indexes[index],
+                index
             )
         else:
             raise TypeError(
@@ -596,15 +1462,19 @@ class RingSystem(object):
         Indicies of bonds in the ring sytem.
     rix : tuple
         Indicies of rings in the ring system.
+    index : int, None
+        Index of the ring system in the owners RingSystemStack
+        (None if unknown).
 
     """
-    __slots__ = 'owner', 'aix', 'bix', 'rix'
+    __slots__ = 'owner', 'aix', 'bix', 'rix', 'index'
 
-    def __init__(self, owner, atom_indexes, bond_indexes, ring_indexes):
+    def __init__(self, owner, atom_indexes, bond_indexes, ring_indexes, index=None):
         self.owner = owner
         self.aix = atom_indexes
         self.bix = bond_indexes
         self.rix = ring_indexes
+        self.index = index
 
     @property
     def atoms(self):
@@ -616,6 +1486,13 @@ class RingSystem(object):
         """list : Returns the rdkit bonds in this ring system."""
         return [self.owner.bonds[x] for x in self.bix]
 
+    @property
+    def atom_mask(self):
+        """int : Returns an integer bitmask of the atoms in this ring system."""
+        if self.index is None:
+            return _to_mask(self.aix)
+        return self.owner.ring_systems.atom_masks[self.index]
+
     @property
     def size(self):
         """int : Returns the size of the ring system (number of atoms)."""
@@ -653,7 +1530,7 @@ class RingSystem(object):
 
         """
         assert type(ring) == Ring, f'query must be a {Ring} object'
-        return len(set(self.aix).intersection(ring.aix)) > 0
+        return self.atom_mask & ring.atom_mask != 0
 
     def contains_ring_idx(self, ring_idx):
         """Return True if ring system contains query ring index.
@@ -689,16 +1566,16 @@ class RingSystem(object):
 
         """
         attachments = set()
-        for atom in self.atoms:
-            index = atom.GetIdx()
-            if any([not b.IsInRing() for b in atom.GetBonds()]):
-                if atom.GetDegree() > 2:
-                    if (
-                        include_exocyclic is False
-                        and self.is_exocyclic_attachment(atom)
-                    ):
-                        continue
-                    attachments.add(index)
+        atoms = self.owner.atoms
+        for index in self.aix:
+            atom = atoms[index]
+            if atom.GetDegree() > 2 and _has_acyclic_bond(atom):
+                if (
+                    include_exocyclic is False
+                    and _is_exocyclic_attachment(atom)
+                ):
+                    continue
+                attachments.add(index)
         return attachments
 
     def is_exocyclic_attachment(self, atom):
@@ -721,19 +1598,9 @@ class RingSystem(object):
             If the supplied atom is not within the ring system.
 
         """
-        exocyclic = False
-        if atom not in self.atoms:
+        if not self.atom_mask >> atom.GetIdx() & 1:
             raise ValueError(f'atom {atom.GetIdx()} not in ring system')
-        ri = self.owner.rings.info
-        for bond in atom.GetBonds():
-            if ri.NumBondRings(bond.GetIdx()) == 0:
-                other = bond.GetOtherAtom(atom)
-                if (
-                    bond.GetBondType() == BondType.DOUBLE
-                    and other.GetDegree() == 1
-                ):
-                    exocyclic = True
-        return exocyclic
+        return _is_exocyclic_attachment(atom)
 
     def __getitem__(self, index):
         if isinstance(index, slice):
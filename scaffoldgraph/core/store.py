@@ -0,0 +1,242 @@
+"""
+scaffoldgraph.core.store
+
+Defines a columnar store for molecule node properties.
+"""
+
+from numbers import Integral, Real
+
+import numpy as np
+
+__all__ = ['MoleculeStore']
+
+
+def _infer_dtype(value):
+    """Private: Return the column dtype used to store a value."""
+    if isinstance(value, (bool, np.bool_)):
+        return np.dtype(bool)
+    elif isinstance(value, Integral):
+        return np.dtype(np.int64)
+    elif isinstance(value, Real):
+        return np.dtype(np.float64)
+    return np.dtype(object)
+
+
+def _promote(dtype, value):
+    """Private: Return a dtype able to hold both `dtype` values and `value`."""
+    other = _infer_dtype(value)
+    if other == dtype or dtype == object:
+        return dtype
+    if dtype.kind in 'if' and other.kind in 'if':
+        return np.dtype(np.float64)
+    return np.dtype(object)
+
+
+class _Column(object):
+    """Private: A growable typed array with a mask indicating present values."""
+    __slots__ = ('values', 'mask')
+
+    def __init__(self, dtype, capacity):
+        self.values = np.zeros(capacity, dtype=dtype)
+        self.mask = np.zeros(capacity, dtype=bool)
+
+    def reserve(self, capacity):
+        if capacity > len(self.values):
+            capacity = max(capacity, 2 * len(self.values))
+            values = np.zeros(capacity, dtype=self.values.dtype)
+            values[:len(self.values)] = self.values
+            mask = np.zeros(capacity, dtype=bool)
+            mask[:len(self.mask)] = self.mask
+            self.values, self.mask = values, mask
+
+    def astype(self, dtype):
+        if dtype != self.values.dtype:
+            self.values = self.values.astype(dtype)
+
+    def __setitem__(self, row, value):
+        dtype = self.values.dtype
+        if not isinstance(value, np.ndarray) or value.ndim == 0:
+            self.astype(_promote(dtype, value))
+        elif np.result_type(dtype, value.dtype) != dtype:
+            self.astype(np.result_type(dtype, value.dtype))
+        self.values[row] = value
+        self.mask[row] = True
+
+    def get(self, row, default=None):
+        if not self.mask[row]:
+            return default
+        value = self.values[row]
+        return value.item() if isinstance(value, np.generic) else value
+
+
+class MoleculeStore(object):
+    """A columnar store of molecule node properties.
+
+    Properties are stored in typed NumPy arrays (one per property) with a
+    row for each molecule ID, rather than in a dictionary for each node.
+    This drastically reduces the memory required to store the properties
+    of many molecules and retains the original data types of properties
+    (i.e. float activity values remain floats). Values of mixed types
+    are promoted to a common type (int -> float -> object).
+
+    Stores are used by ScaffoldGraphs initialized with
+    ``molecule_store=True``, node queries such as ``get_molecule_nodes``
+    and ``get_molecules_for_scaffold`` read molecule properties from the
+    store.
+
+    Examples
+    --------
+    >>> import scaffoldgraph as sg
+    >>> network = sg.ScaffoldNetwork.from_dataframe(
+    ...     df, data_columns=['pIC50'], molecule_store=True)
+    >>> network.molecule_store.get('CHEMBL1', 'pIC50')
+    7.2
+    >>> network.get_molecule_nodes(data='pIC50')
+    [('CHEMBL1', 7.2), ('CHEMBL2', 6.8), ...]
+
+    """
+    def __init__(self, capacity=1024):
+        """
+        Parameters
+        ----------
+        capacity : int, optional
+            The initial number of rows allocated. The default is 1024.
+
+        """
+        self._ids = []
+        self._index = {}
+        self._columns = {}
+        self._capacity = capacity
+
+    @property
+    def columns(self):
+        """list : Return the names of the stored properties."""
+        return list(self._columns)
+
+    def _row(self, molecule_id):
+        """Private: Return the row of a molecule ID, allocating one if required."""
+        row = self._index.get(molecule_id)
+        if row is None:
+            row = self._index[molecule_id] = len(self._ids)
+            self._ids.append(molecule_id)
+            if row >= self._capacity:
+                self._capacity = max(2 * self._capacity, row + 1)
+                for column in self._columns.values():
+                    column.reserve(self._capacity)
+        return row
+
+    def _column(self, key, dtype):
+        """Private: Return the column for a property, creating it if required."""
+        column = self._columns.get(key)
+        if column is None:
+            column = self._columns[key] = _Column(dtype, self._capacity)
+        return column
+
+    def update(self, molecule_id, properties):
+        """Set properties for a molecule.
+
+        Parameters
+        ----------
+        molecule_id : str
+            ID of the molecule.
+        properties : dict
+            A dictionary of property names and values.
+
+        """
+        row = self._row(molecule_id)
+        for key, value in properties.items():
+            self._column(key, _infer_dtype(value))[row] = value
+
+    def update_columns(self, molecule_ids, columns):
+        """Set properties for many molecules at once.
+
+        Parameters
+        ----------
+        molecule_ids : sequence
+            IDs of the molecules.
+        columns : dict
+            A dictionary of property names and array-like values, aligned
+            with `molecule_ids`. The dtype of each array is retained.
+
+        """
+        rows = np.fromiter((self._row(m) for m in molecule_ids), dtype=np.int64)
+        for key, values in columns.items():
+            values = np.asarray(values)
+            if values.dtype.kind in 'US':  # avoid fixed width strings
+                values = values.astype(object)
+            self._column(key, values.dtype)[rows] = values
+
+    def get(self, molecule_id, key, default=None):
+        """Return a property value for a molecule, or `default` if not found."""
+        row = self._index.get(molecule_id)
+        column = self._columns.get(key)
+        if row is None or column is None:
+            return default
+        return column.get(row, default)
+
+    def row(self, molecule_id):
+        """dict : Return a dictionary of all properties for a molecule."""
+        row = self._index.get(molecule_id)
+        if row is None:
+            return {}
+        return {k: c.get(row) for k, c in self._columns.items() if c.mask[row]}
+
+    def remove(self, molecule_id):
+        """Remove the properties of a molecule (ignored if not in the store)."""
+        row = self._index.pop(molecule_id, None)
+        if row is not None:
+            self._ids[row] = None
+            for column in self._columns.values():
+                column.mask[row] = False
+
+    def subset(self, molecule_ids):
+        """MoleculeStore : Return a new store containing a subset of molecules."""
+        store = MoleculeStore()
+        ids = [m for m in molecule_ids if m in self._index]
+        rows = np.fromiter((self._index[m] for m in ids), dtype=np.int64)
+        new_rows = np.fromiter((store._row(m) for m in ids), dtype=np.int64)
+        for key, column in self._columns.items():
+            new = store._column(key, column.values.dtype)
+            new.values[new_rows] = column.values[rows]
+            new.mask[new_rows] = column.mask[rows]
+        return store
+
+    def to_dataframe(self):
+        """Return the store as a pandas DataFrame indexed by molecule ID.
+
+        Missing values are represented using the pandas missing value
+        for each column type.
+
+        Returns
+        -------
+        pandas.DataFrame
+
+        """
+        import pandas as pd
+        ids = list(self._index)
+        rows = np.fromiter(self._index.values(), dtype=np.int64)
+        data = {}
+        for key, column in self._columns.items():
+            values, mask = column.values[rows], column.mask[rows]
+            if mask.all():
+                data[key] = values
+            elif values.dtype.kind == 'f':
+                data[key] = np.where(mask, values, np.nan)
+            elif values.dtype.kind in 'ib':
+                data[key] = pd.array(values, dtype='Int64' if values.dtype.kind == 'i' else 'boolean')
+                data[key][~mask] = pd.NA
+            else:
+                data[key] = np.where(mask, values, None)
+        return pd.DataFrame(data, index=pd.Index(ids, name='molecule_id'))
+
+    def __contains__(self, molecule_id):
+        return molecule_id in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __repr__(self):
+        return '<{_cls} at {address}>'.format(
+            _cls=self.__class__.__name__,
+            address=hex(id(self))
+        )
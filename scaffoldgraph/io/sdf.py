@@ -57,9 +57,8 @@ def write_sdf_file(scaffold_graph, output_file):
         Filepath to an output file.
 
     """
-    N = scaffold_graph.num_scaffold_nodes
-    sorted_scaffolds = sorted(scaffold_graph.get_scaffold_nodes(data=True), key=lambda x: x[1]['hierarchy'])
-    mapping = dict(zip([s[0] for s in sorted_scaffolds], range(0, N)))
+    sorted_scaffolds = scaffold_graph.get_scaffolds_by_hierarchy(data=True)
+    mapping = {s: i for i, s in enumerate(scaffold_graph.get_scaffolds_by_hierarchy())}
     writer = SDWriter(output_file)
     for scaffold, data in sorted_scaffolds:
         molecule = MolFromSmiles(scaffold)
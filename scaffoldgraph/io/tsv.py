@@ -27,12 +27,11 @@ def write_tsv(scaffold_graph, output_file, write_ids=False):
         is False.
 
     """
-    N = scaffold_graph.num_scaffold_nodes
-    sorted_scaffolds = sorted(scaffold_graph.get_scaffold_nodes(data=True), key=lambda x: x[1]['hierarchy'])
+    sorted_scaffolds = scaffold_graph.get_scaffolds_by_hierarchy(data=True)
 
     if write_ids:
         field_names = ['ID', 'HIERARCHY', 'SMILES', 'SUBSCAFFOLDS']
-        mapping = dict(zip([s[0] for s in sorted_scaffolds], range(0, N)))
+        mapping = {s: i for i, s in enumerate(scaffold_graph.get_scaffolds_by_hierarchy())}
     else:
         field_names = ['HIERARCHY', 'SMILES', 'SUBSCAFFOLDS', 'MOLECULES', 'ANNOTATIONS']
         mapping = None
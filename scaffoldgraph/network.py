@@ -2,8 +2,10 @@
 scaffoldgraph.network
 """
 
+from rdkit.Chem import MolToSmiles
+
 from .core import MurckoRingFragmenter, MurckoRingSystemFragmenter
-from .core import ScaffoldGraph
+from .core import ScaffoldGraph, ScaffoldRecord
 
 
 class ScaffoldNetwork(ScaffoldGraph):
@@ -12,7 +14,10 @@ class ScaffoldNetwork(ScaffoldGraph):
 
     Explore scaffold-space through the iterative removal of available rings,
     generating all possible sub-scaffolds for a set of input molecules.
-    The output is a directed acyclic graph of molecular scaffolds.
+    The output is a directed acyclic graph of molecular scaffolds. If
+    initialized with ``record_removed_rings=True`` scaffold edges record
+    the rings of the child removed to produce the parent (edge attribute
+    'removed_rings', see ``ring_masks``).
 
     Examples
     --------
@@ -67,7 +72,8 @@ class ScaffoldNetwork(ScaffoldGraph):
     HierS
 
     """
-    def __init__(self, graph=None, **kwargs):
+    def __init__(self, graph=None, fragment_cache=None, molecule_store=False, compact_scaffolds=False,
+                 record_removed_rings=False, fragmenter=None, **kwargs):
         """Initialize a ScaffoldNetwork.
 
         Parameters
@@ -80,20 +86,109 @@ class ScaffoldNetwork(ScaffoldGraph):
             NumPy matrix or 2d ndarray, SciPy sparse matrix,
             or PyGraphviz graph. This argument is passed to the networkx
             DiGraph constructor.
+        fragment_cache : {FragmentCache, SQLiteFragmentCache}, optional
+            A cache memoizing the fragmentation of scaffolds during
+            construction. If None (default) no cache is used.
+        molecule_store : bool, optional
+            If True store molecule node properties in a columnar
+            ``MoleculeStore``. The default is False.
+        compact_scaffolds : bool, optional
+            If True hold scaffolds which are not being expanded during
+            construction as compact ``ScaffoldRecord`` objects. The
+            default is False.
+        record_removed_rings : bool, optional
+            If True record the rings of each child scaffold removed to
+            produce a parent as the edge attribute 'removed_rings', such
+            that a ``ScaffoldTree`` can be constructed from the network
+            without fragmentation (see ``ScaffoldTree.from_network``).
+            The attribute holds a tuple of integers, which is not
+            supported by some graph file formats (i.e. GraphML). The
+            default is False.
+        fragmenter : scaffoldgraph.core.fragment.MurckoRingFragmenter, optional
+            The fragmenter used to produce parent scaffolds, for example an
+            ``IndexedMurckoRingFragmenter``. If None (default) a
+            ``MurckoRingFragmenter()`` is used.
 
         """
-        super(ScaffoldNetwork, self).__init__(graph, MurckoRingFragmenter(), 'network')
+        if fragmenter is None:
+            fragmenter = MurckoRingFragmenter()
+        super(ScaffoldNetwork, self).__init__(graph, fragmenter, 'network', fragment_cache,
+                                              molecule_store, compact_scaffolds)
+        self.record_removed_rings = record_removed_rings
 
     def _recursive_constructor(self, child):
-        parents = (p for p in self.fragmenter.fragment(child) if p)
-        for parent in parents:
+        for parent, attr in self._expand(child):
             if parent in self.nodes:
-                self.add_scaffold_edge(parent, child)
+                self.add_scaffold_edge(parent, child, **attr)
+                self._expand_truncated(parent)
             else:
+                self._check_budget()
                 self.add_scaffold_node(parent)
-                self.add_scaffold_edge(parent, child)
-                if parent.rings.count > 1:
-                    self._recursive_constructor(parent)
+                self.add_scaffold_edge(parent, child, **attr)
+                if self._is_expandable(parent):
+                    self._recursive_constructor(self._restore(parent))
+
+    def _expand(self, child, parents=None):
+        """Private: Return the parent scaffolds of a child scaffold and their edge attributes.
+
+        If ``record_removed_rings`` is True each parent --> child edge records
+        the rings of the child removed to produce the parent ('removed_rings'),
+        such that the candidate parents of a child may be recovered from the
+        network (see ``ScaffoldTree.from_network``). Rings are recorded as
+        bitmasks of their atoms, indexed in the order written to the child
+        SMILES.
+
+        """
+        if parents is None:
+            parents = self._fragment(child)
+        if not self.record_removed_rings:
+            return [(parent, {}) for parent in parents]
+        removed, masks = {}, None
+        for parent in parents:
+            if masks is None:
+                masks = ring_masks(child)
+            key = parent.get_canonical_identifier()
+            removed.setdefault(key, (parent, []))[1].append(masks[parent.removed_ring_idx])
+        return [(parent, dict(removed_rings=tuple(rings))) for parent, rings in removed.values()]
+
+    def _empty_copy(self):
+        """Private: Return an empty network sharing the fragmenter and edge recording option."""
+        network = super(ScaffoldNetwork, self)._empty_copy()
+        network.record_removed_rings = self.record_removed_rings
+        return network
+
+    def copy(self, as_view=False):
+        """Return a copy of the network, see ``ScaffoldGraph.copy``."""
+        network = super(ScaffoldNetwork, self).copy(as_view)
+        network.record_removed_rings = self.record_removed_rings
+        return network
+
+
+def ring_masks(scaffold):
+    """Return a bitmask of the atoms in each ring of a scaffold.
+
+    Atoms are indexed in the order written to the canonical SMILES of the
+    scaffold, which is equal to the atom order of a molecule parsed from
+    the SMILES, such that the masks identify rings independently of the
+    atom order of the scaffold.
+
+    Parameters
+    ----------
+    scaffold : scaffoldgraph.core.Scaffold
+
+    Returns
+    -------
+    list
+        A list of integer bitmasks, one for each ring of the scaffold.
+
+    """
+    mol = scaffold.mol
+    _ = scaffold.smiles  # sets the output order
+    if not mol.HasProp('_smilesAtomOutputOrder'):
+        MolToSmiles(mol)
+    order = mol.GetProp('_smilesAtomOutputOrder').strip('[]').split(',')
+    position = {int(a): i for i, a in enumerate(x for x in order if x)}
+    return [sum(1 << position[a] for a in ring.aix) for ring in scaffold.rings]
 
 
 class HierS(ScaffoldGraph):
@@ -160,7 +255,8 @@ class HierS(ScaffoldGraph):
     ScaffoldTree
 
     """
-    def __init__(self, graph=None, **kwargs):
+    def __init__(self, graph=None, fragment_cache=None, molecule_store=False, compact_scaffolds=False,
+                 fragmenter=None, **kwargs):
         """Initialize a HierS network.
 
         Parameters
@@ -173,17 +269,40 @@ class HierS(ScaffoldGraph):
             NumPy matrix or 2d ndarray, SciPy sparse matrix,
             or PyGraphviz graph. This argument is passed to the networkx
             DiGraph constructor.
+        fragment_cache : {FragmentCache, SQLiteFragmentCache}, optional
+            A cache memoizing the fragmentation of scaffolds during
+            construction. If None (default) no cache is used.
+        molecule_store : bool, optional
+            If True store molecule node properties in a columnar
+            ``MoleculeStore``. The default is False.
+        compact_scaffolds : bool, optional
+            If True hold scaffolds which are not being expanded during
+            construction as compact ``ScaffoldRecord`` objects. The
+            default is False.
+        fragmenter : scaffoldgraph.core.fragment.Fragmenter, optional
+            The fragmenter used to produce parent scaffolds. If None
+            (default) a ``MurckoRingSystemFragmenter()`` is used.
 
         """
-        super(HierS, self).__init__(graph, MurckoRingSystemFragmenter(), 'hiers')
+        if fragmenter is None:
+            fragmenter = MurckoRingSystemFragmenter()
+        super(HierS, self).__init__(graph, fragmenter, 'hiers', fragment_cache,
+                                   molecule_store, compact_scaffolds)
 
     def _recursive_constructor(self, child):
-        parents = (p for p in self.fragmenter.fragment(child) if p)
+        parents = self._fragment(child)
         for parent in parents:
             if parent in self.nodes:
                 self.add_scaffold_edge(parent, child)
+                self._expand_truncated(parent)
             else:
+                self._check_budget()
                 self.add_scaffold_node(parent)
                 self.add_scaffold_edge(parent, child)
-                if parent.ring_systems.count > 1:
-                    self._recursive_constructor(parent)
+                if self._is_expandable(parent):
+                    self._recursive_constructor(self._restore(parent))
+
+    def _is_expandable(self, scaffold):
+        if isinstance(scaffold, ScaffoldRecord):
+            return scaffold.num_ring_systems > 1
+        return scaffold.ring_systems.count > 1
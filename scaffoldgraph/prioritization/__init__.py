@@ -5,7 +5,7 @@ Contains functions for scaffold prioritization.
 """
 
 from .original_rules import original_ruleset
-from .prioritization_ruleset import ScaffoldRuleSet
+from .prioritization_ruleset import ScaffoldRuleSet, RuleStatistics
 from .prioritization_rules import BaseScaffoldFilterRule, ScaffoldFilterRule, \
     ScaffoldMinFilterRule, ScaffoldMaxFilterRule
 from .generic_rules import *
@@ -17,5 +17,6 @@ __all__ = [
     'ScaffoldMinFilterRule',
     'ScaffoldMaxFilterRule',
     'ScaffoldRuleSet',
+    'RuleStatistics',
     'original_ruleset',
 ]
@@ -15,12 +15,10 @@ RSP - Property of ring system of removed ring before removal
 
 from rdkit.Chem import MolFromSmarts
 
-from itertools import chain, compress
+from itertools import compress
 from abc import abstractmethod
 
-from scaffoldgraph.core.fragment import collect_linker_atoms
-
-from .prioritization_rules import BaseScaffoldFilterRule
+from .prioritization_rules import BaseScaffoldFilterRule, extreme_mask, removed_ring_indexes
 
 
 __all__ = [
@@ -55,6 +53,15 @@ __all__ = [
     'Tiebreaker'
 ]
 
+# Fields of the ring (system) descriptor tables counting atoms of an element.
+_ATOMIC_NUM_FIELDS = {7: 'num_n', 8: 'num_o', 16: 'num_s'}
+
+
+def _ring_system_property(child, removed_rings, field):
+    """Private: Return a property of the ring system(s) of the removed ring(s)."""
+    system = child.ring_descriptors['ring_system'][removed_rings]
+    return child.ring_system_descriptors[field][system]
+
 
 class _MinMaxScaffoldFilterRule(BaseScaffoldFilterRule):
     """Abstract base class for generic rules where 'min' or 'max' filtering can be specified.
@@ -68,6 +75,7 @@ class _MinMaxScaffoldFilterRule(BaseScaffoldFilterRule):
 
     """
     _f = {'min', 'max'}
+    batched = True
 
     def __init__(self, min_max='min'):
         """
@@ -93,9 +101,21 @@ class _MinMaxScaffoldFilterRule(BaseScaffoldFilterRule):
             An iterable of all parent scaffolds generated by a fragmenter.
 
         """
-        props = [self.get_property(child, s) for s in parents]
-        val = self.func(props)
-        return list(compress(parents, [True if p == val else False for p in props]))
+        parents = list(parents)
+        mask = self.filter_mask(child, parents, removed_ring_indexes(parents))
+        return list(compress(parents, mask))
+
+    def filter_mask(self, child, parents, removed_rings):
+        return extreme_mask(self.get_properties(child, parents, removed_rings), self.func)
+
+    def get_properties(self, child, parents, removed_rings):
+        """Return the property values for each parent scaffold.
+
+        By default ``get_property`` is evaluated for each parent, subclasses
+        may override this method to evaluate all parents at once.
+
+        """
+        return [self.get_property(child, s) for s in parents]
 
     @abstractmethod
     def get_property(self, child, parent):
@@ -154,11 +174,7 @@ class SCPDelta(_MinMaxScaffoldFilterRule):
         super().__init__(min_max)
 
     def get_property(self, child, parent):
-        nr = parent.rings.count
-        rb = list(chain(*parent.rings.bond_rings))
-        nrrb = len(rb) - len(set(rb))
-        delta = nrrb - (nr - 1)
-        return delta
+        return parent.delta
 
 
 class SCPAbsDelta(SCPDelta):
@@ -229,8 +245,7 @@ class SCPNumAromaticRings(_MinMaxScaffoldFilterRule):
         super().__init__(min_max)
 
     def get_property(self, child, parent):
-        aro_r = [x.aromatic for x in parent.rings]
-        return aro_r.count(True)
+        return int(parent.ring_system_descriptors['num_aromatic'].sum())
 
 
 class _SCPAtomicNumRule(_MinMaxScaffoldFilterRule):
@@ -346,8 +361,10 @@ class RRPRingSize(_MinMaxScaffoldFilterRule):
         super().__init__(min_max)
 
     def get_property(self, child, parent):
-        removed_ring = child.rings[parent.removed_ring_idx]
-        return removed_ring.size
+        return child.ring_descriptors['size'][parent.removed_ring_idx]
+
+    def get_properties(self, child, parents, removed_rings):
+        return child.ring_descriptors['size'][removed_rings]
 
 
 class RRPNumHetAtoms(_MinMaxScaffoldFilterRule):
@@ -370,9 +387,10 @@ class RRPNumHetAtoms(_MinMaxScaffoldFilterRule):
         super().__init__(min_max)
 
     def get_property(self, child, parent):
-        removed_ring = child.rings[parent.removed_ring_idx]
-        ring_atomic_nums = [a.GetAtomicNum() for a in removed_ring.atoms]
-        return len([a for a in ring_atomic_nums if a != 1 and a != 6])
+        return child.ring_descriptors['num_het'][parent.removed_ring_idx]
+
+    def get_properties(self, child, parents, removed_rings):
+        return child.ring_descriptors['num_het'][removed_rings]
 
 
 class _RRPAtomicNumRule(_MinMaxScaffoldFilterRule):
@@ -382,10 +400,19 @@ class _RRPAtomicNumRule(_MinMaxScaffoldFilterRule):
         self.atomic_num = atomic_num
 
     def get_property(self, child, parent):
+        field = _ATOMIC_NUM_FIELDS.get(self.atomic_num)
+        if field is not None:
+            return child.ring_descriptors[field][parent.removed_ring_idx]
         removed_ring = child.rings[parent.removed_ring_idx]
         ring_atomic_nums = [a.GetAtomicNum() for a in removed_ring.atoms]
         return ring_atomic_nums.count(self.atomic_num)
 
+    def get_properties(self, child, parents, removed_rings):
+        field = _ATOMIC_NUM_FIELDS.get(self.atomic_num)
+        if field is not None:
+            return child.ring_descriptors[field][removed_rings]
+        return super().get_properties(child, parents, removed_rings)
+
 
 class RRPNumOAtoms(_RRPAtomicNumRule):
     """Filter by the number of oxygen atoms in the removed ring.
@@ -491,15 +518,10 @@ class RRPHetAtomLinked(_MinMaxScaffoldFilterRule):
         super().__init__(min_max)
 
     def get_property(self, child, parent):
-        linker, ra = set(), set()
-        removed_ring = child.rings[parent.removed_ring_idx]
-        attachments = removed_ring.get_attachment_points()
-        for attachment in attachments:
-            ra.update(collect_linker_atoms(
-                child.mol.GetAtomWithIdx(attachment), linker, False
-            ))
-        atomic_nums = [child.atoms[x].GetAtomicNum() for x in ra]
-        return len([a for a in atomic_nums if a != 1 and a != 6]) > 0
+        return child.ring_descriptors['het_linked'][parent.removed_ring_idx]
+
+    def get_properties(self, child, parents, removed_rings):
+        return child.ring_descriptors['het_linked'][removed_rings]
 
 
 class RRPRingSizeX(RRPRingSize):
@@ -529,6 +551,9 @@ class RRPRingSizeX(RRPRingSize):
         rs = super().get_property(child, parent)
         return rs == self.size
 
+    def get_properties(self, child, parents, removed_rings):
+        return super().get_properties(child, parents, removed_rings) == self.size
+
 
 class RRPLinkerLength(_MinMaxScaffoldFilterRule):
     """Filter by the size of the removed rings linker.
@@ -550,14 +575,10 @@ class RRPLinkerLength(_MinMaxScaffoldFilterRule):
         super().__init__(min_max)
 
     def get_property(self, child, parent):
-        linker = set()
-        removed_ring = child.rings[parent.removed_ring_idx]
-        attachments = removed_ring.get_attachment_points()
-        for attachment in attachments:
-            collect_linker_atoms(
-                child.mol.GetAtomWithIdx(attachment), linker, False
-            )
-        return len(linker)
+        return child.ring_descriptors['linker_length'][parent.removed_ring_idx]
+
+    def get_properties(self, child, parents, removed_rings):
+        return child.ring_descriptors['linker_length'][removed_rings]
 
 
 class RRPLinkerLengthX(RRPLinkerLength):
@@ -587,6 +608,9 @@ class RRPLinkerLengthX(RRPLinkerLength):
         linker_length = super().get_property(child, parent)
         return linker_length == self.length
 
+    def get_properties(self, child, parents, removed_rings):
+        return super().get_properties(child, parents, removed_rings) == self.length
+
 
 class RSPDelta(_MinMaxScaffoldFilterRule):
     """Filter by the delta value of the removed rings
@@ -609,13 +633,10 @@ class RSPDelta(_MinMaxScaffoldFilterRule):
         super().__init__(min_max)
 
     def get_property(self, child, parent):
-        removed_ring = child.rings[parent.removed_ring_idx]
-        system = removed_ring.get_ring_system()
-        nr = system.num_rings
-        rb = list(chain(*[x.bix for x in system]))
-        nrrb = len(rb) - len(set(rb))
-        delta = nrrb - (nr - 1)
-        return delta
+        return _ring_system_property(child, parent.removed_ring_idx, 'delta')
+
+    def get_properties(self, child, parents, removed_rings):
+        return _ring_system_property(child, removed_rings, 'delta')
 
 
 class RSPAbsDelta(RSPDelta):
@@ -641,6 +662,9 @@ class RSPAbsDelta(RSPDelta):
     def get_property(self, child, parent):
         return abs(super().get_property(child, parent))
 
+    def get_properties(self, child, parents, removed_rings):
+        return abs(super().get_properties(child, parents, removed_rings))
+
 
 class RSPNumRings(_MinMaxScaffoldFilterRule):
     """Filter by the size of the removed rings ring system.
@@ -662,9 +686,10 @@ class RSPNumRings(_MinMaxScaffoldFilterRule):
         super().__init__(min_max)
 
     def get_property(self, child, parent):
-        removed_ring = child.rings[parent.removed_ring_idx]
-        system = removed_ring.get_ring_system()
-        return system.num_rings
+        return _ring_system_property(child, parent.removed_ring_idx, 'num_rings')
+
+    def get_properties(self, child, parents, removed_rings):
+        return _ring_system_property(child, removed_rings, 'num_rings')
 
 
 class RSPNumAromaticRings(_MinMaxScaffoldFilterRule):
@@ -688,10 +713,10 @@ class RSPNumAromaticRings(_MinMaxScaffoldFilterRule):
         super().__init__(min_max)
 
     def get_property(self, child, parent):
-        removed_ring = child.rings[parent.removed_ring_idx]
-        system = removed_ring.get_ring_system()
-        aro_rings = [x.aromatic for x in system].count(True)
-        return aro_rings
+        return _ring_system_property(child, parent.removed_ring_idx, 'num_aromatic')
+
+    def get_properties(self, child, parents, removed_rings):
+        return _ring_system_property(child, removed_rings, 'num_aromatic')
 
 
 class RSPNumHetAtoms(_MinMaxScaffoldFilterRule):
@@ -715,10 +740,10 @@ class RSPNumHetAtoms(_MinMaxScaffoldFilterRule):
         super().__init__(min_max)
 
     def get_property(self, child, parent):
-        removed_ring = child.rings[parent.removed_ring_idx]
-        system = removed_ring.get_ring_system()
-        sys_atomic_nums = [a.GetAtomicNum() for a in system.atoms]
-        return len([a for a in sys_atomic_nums if a != 1 and a != 6])
+        return _ring_system_property(child, parent.removed_ring_idx, 'num_het')
+
+    def get_properties(self, child, parents, removed_rings):
+        return _ring_system_property(child, removed_rings, 'num_het')
 
 
 class _RSPAtomicNumRule(_MinMaxScaffoldFilterRule):
@@ -728,11 +753,20 @@ class _RSPAtomicNumRule(_MinMaxScaffoldFilterRule):
         self.atomic_num = atomic_num
 
     def get_property(self, child, parent):
-        removed_ring = child.rings[parent.removed_ring_idx]
-        system = removed_ring.get_ring_system()
-        sys_atomic_nums = [a.GetAtomicNum() for a in system.atoms]
+        field = _ATOMIC_NUM_FIELDS.get(self.atomic_num)
+        if field is not None:
+            return _ring_system_property(child, parent.removed_ring_idx, field)
+        system = child.rings.system_index[parent.removed_ring_idx]
+        atomic_nums = child.ring_descriptors.atomic_nums
+        sys_atomic_nums = [atomic_nums[x] for x in child.ring_systems.atom_rings[system]]
         return sys_atomic_nums.count(self.atomic_num)
 
+    def get_properties(self, child, parents, removed_rings):
+        field = _ATOMIC_NUM_FIELDS.get(self.atomic_num)
+        if field is not None:
+            return _ring_system_property(child, removed_rings, field)
+        return super().get_properties(child, parents, removed_rings)
+
 
 class RSPNumNAtoms(_RSPAtomicNumRule):
     """Filter by the number of nitrogen atoms in the removed
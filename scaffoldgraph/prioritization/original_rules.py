@@ -5,12 +5,9 @@ Implements rules from the paper:
 'The Scaffold Tree − Visualization of the Scaffold Universe by Hierarchical Scaffold Classification'
 """
 
-from itertools import chain
-
 from rdkit.Chem import MolFromSmarts
 
 from scaffoldgraph.prioritization.prioritization_ruleset import ScaffoldRuleSet
-from scaffoldgraph.core.fragment import collect_linker_atoms
 
 from .prioritization_rules import *
 
@@ -39,10 +36,15 @@ class OriginalRule01(ScaffoldFilterRule):
     """Remove heterocycles of size 3 first."""
 
     def condition(self, child, parent):
-        removed_ring = child.rings[parent.removed_ring_idx]
-        ring_atomic_nums = [a.GetAtomicNum() for a in removed_ring.atoms]
-        ring_num_het = len([a for a in ring_atomic_nums if a != 1 and a != 6])
-        return removed_ring.size == 3 and ring_num_het == 1
+        rings, idx = child.ring_descriptors, parent.removed_ring_idx
+        return rings['size'][idx] == 3 and rings['num_het'][idx] == 1
+
+    def conditions(self, child, parents, removed_rings):
+        rings = child.ring_descriptors
+        mask = rings['size'][removed_rings] == 3
+        if mask.any():  # heteroatoms are only counted if required
+            mask &= rings['num_het'][removed_rings] == 1
+        return mask
 
     @property
     def name(self):
@@ -53,8 +55,10 @@ class OriginalRule02(ScaffoldFilterRule):
     """Do not remove rings with >= 12 atoms if there are smaller rings to remove."""
 
     def condition(self, child, parent):
-        removed_ring = child.rings[parent.removed_ring_idx]
-        return removed_ring.size < 12
+        return child.ring_descriptors['size'][parent.removed_ring_idx] < 12
+
+    def conditions(self, child, parents, removed_rings):
+        return child.ring_descriptors['size'][removed_rings] < 12
 
     @property
     def name(self):
@@ -79,10 +83,7 @@ class OriginalRule04(ScaffoldMaxFilterRule):
     """Retain bridged rings, spiro rings and nonlinear fusion patterns with preference."""
 
     def get_property(self, child, parent):
-        nr = parent.rings.count
-        rb = list(chain(*parent.rings.bond_rings))
-        nrrb = len(rb) - len(set(rb))
-        return abs(nrrb - (nr - 1))
+        return abs(parent.delta)
 
     @property
     def name(self):
@@ -94,11 +95,7 @@ class OriginalRule05(ScaffoldFilterRule):
     Rings with a positive signed delta are retained."""
 
     def condition(self, child, parent):
-        nr = parent.rings.count
-        rb = list(chain(*parent.rings.bond_rings))
-        nrrb = len(rb) - len(set(rb))
-        delta = nrrb - (nr - 1)
-        return delta >= 1
+        return parent.delta >= 1
 
     @property
     def name(self):
@@ -109,9 +106,13 @@ class OriginalRule06(ScaffoldFilterRule):
     """Remove rings of size 3, 5 and 6 first."""
 
     def condition(self, child, parent):
-        rr_size = child.rings[parent.removed_ring_idx].size
+        rr_size = child.ring_descriptors['size'][parent.removed_ring_idx]
         return rr_size == 3 or rr_size == 5 or rr_size == 6
 
+    def conditions(self, child, parents, removed_rings):
+        rr_size = child.ring_descriptors['size'][removed_rings]
+        return (rr_size == 3) | (rr_size == 5) | (rr_size == 6)
+
     @property
     def name(self):
         return 'original rule 06'
@@ -140,9 +141,10 @@ class OriginalRule08(ScaffoldMinFilterRule):
     """Remove rings with the least hetero atoms first."""
 
     def get_property(self, child, parent):
-        removed_ring = child.rings[parent.removed_ring_idx]
-        ring_atomic_nums = [a.GetAtomicNum() for a in removed_ring.atoms]
-        return len([a for a in ring_atomic_nums if a != 1 and a != 6])
+        return child.ring_descriptors['num_het'][parent.removed_ring_idx]
+
+    def get_properties(self, child, parents, removed_rings):
+        return child.ring_descriptors['num_het'][removed_rings]
 
     @property
     def name(self):
@@ -153,9 +155,10 @@ class OriginalRule09a(ScaffoldMinFilterRule):
     """Remove scaffolds with least nitrogen atoms in deleted ring."""
 
     def get_property(self, child, parent):
-        removed_ring = child.rings[parent.removed_ring_idx]
-        ring_atomic_nums = [a.GetAtomicNum() for a in removed_ring.atoms]
-        return ring_atomic_nums.count(7)
+        return child.ring_descriptors['num_n'][parent.removed_ring_idx]
+
+    def get_properties(self, child, parents, removed_rings):
+        return child.ring_descriptors['num_n'][removed_rings]
 
     @property
     def name(self):
@@ -166,9 +169,10 @@ class OriginalRule09b(ScaffoldMinFilterRule):
     """Remove scaffolds with least oxygen atoms in deleted ring."""
 
     def get_property(self, child, parent):
-        removed_ring = child.rings[parent.removed_ring_idx]
-        ring_atomic_nums = [a.GetAtomicNum() for a in removed_ring.atoms]
-        return ring_atomic_nums.count(8)
+        return child.ring_descriptors['num_o'][parent.removed_ring_idx]
+
+    def get_properties(self, child, parents, removed_rings):
+        return child.ring_descriptors['num_o'][removed_rings]
 
     @property
     def name(self):
@@ -179,9 +183,10 @@ class OriginalRule09c(ScaffoldMinFilterRule):
     """Remove scaffolds with least sulphur atoms in deleted ring."""
 
     def get_property(self, child, parent):
-        removed_ring = child.rings[parent.removed_ring_idx]
-        ring_atomic_nums = [a.GetAtomicNum() for a in removed_ring.atoms]
-        return ring_atomic_nums.count(16)
+        return child.ring_descriptors['num_s'][parent.removed_ring_idx]
+
+    def get_properties(self, child, parents, removed_rings):
+        return child.ring_descriptors['num_s'][removed_rings]
 
     @property
     def name(self):
@@ -192,7 +197,10 @@ class OriginalRule10(ScaffoldMinFilterRule):
     """Smaller rings are removed first."""
 
     def get_property(self, child, parent):
-        return child.rings[parent.removed_ring_idx].size
+        return child.ring_descriptors['size'][parent.removed_ring_idx]
+
+    def get_properties(self, child, parents, removed_rings):
+        return child.ring_descriptors['size'][removed_rings]
 
     @property
     def name(self):
@@ -203,8 +211,10 @@ class OriginalRule11(ScaffoldFilterRule):
     """Retain non-aromatic rings with preference."""
 
     def condition(self, child, parent):
-        removed_ring = child.rings[parent.removed_ring_idx]
-        return all([bond.GetIsAromatic() for bond in removed_ring.bonds])
+        return child.ring_descriptors['aromatic'][parent.removed_ring_idx]
+
+    def conditions(self, child, parents, removed_rings):
+        return child.ring_descriptors['aromatic'][removed_rings]
 
     @property
     def name(self):
@@ -215,13 +225,10 @@ class OriginalRule12(ScaffoldFilterRule):
     """Remove rings first where the linker is attached to a ring hetero atom at either end of the linker."""
 
     def condition(self, child, parent):
-        linker, ra = set(), set()  # linker atoms, ring attachments
-        removed_ring = child.rings[parent.removed_ring_idx]
-        attachments = removed_ring.get_attachment_points()
-        for attachment in attachments:
-            ra.update(collect_linker_atoms(child.mol.GetAtomWithIdx(attachment), linker, False))
-        atomic_nums = [child.atoms[x].GetAtomicNum() for x in ra]
-        return len([a for a in atomic_nums if a != 1 and a != 6]) > 0
+        return child.ring_descriptors['het_linked'][parent.removed_ring_idx]
+
+    def conditions(self, child, parents, removed_rings):
+        return child.ring_descriptors['het_linked'][removed_rings]
 
     @property
     def name(self):
@@ -5,7 +5,11 @@ Implements abstract rules for scaffold prioritization when constructing scaffold
 """
 
 from abc import ABCMeta, abstractmethod
+from functools import lru_cache
 from itertools import compress
+from types import BuiltinFunctionType
+
+import numpy as np
 
 __all__ = [
     'BaseScaffoldFilterRule',
@@ -15,6 +19,77 @@ __all__ = [
 ]
 
 
+def removed_ring_indexes(parents):
+    """Return the indexes of the rings removed from a child to form each parent.
+
+    Parameters
+    ----------
+    parents : list
+        A list of parent scaffolds generated by a fragmenter.
+
+    Returns
+    -------
+    numpy.ndarray
+        The ``removed_ring_idx`` of each parent scaffold.
+
+    """
+    return np.array([p.removed_ring_idx for p in parents])
+
+
+def extreme_mask(props, func):
+    """Return a boolean array marking the properties equal to min/max(props).
+
+    Parameters
+    ----------
+    props : numpy.ndarray or list
+        Property values for a list of parent scaffolds.
+    func : {min, max}
+        The function defining the retained property value.
+
+    Returns
+    -------
+    numpy.ndarray
+
+    """
+    if isinstance(props, np.ndarray):
+        return props == (props.min() if func is min else props.max())
+    val = func(props)
+    return np.array([p == val for p in props], dtype=bool)
+
+
+_PLAIN_TYPES = (type(None), bool, int, float, str, bytes)
+
+
+def _plain_value(value):
+    """Private: Return a string identifying a plain parameter value, or None if the value is not plain.
+
+    Plain values are None, booleans, numbers, strings, builtin functions
+    (i.e. min and max) and tuples of plain values.
+
+    """
+    if isinstance(value, _PLAIN_TYPES):
+        return str(value)
+    if isinstance(value, BuiltinFunctionType):
+        return value.__name__
+    if isinstance(value, tuple):
+        values = [_plain_value(v) for v in value]
+        if None in values:
+            return None
+        return '({})'.format(', '.join(values))
+    return None
+
+
+@lru_cache(maxsize=None)
+def _mask_implements_filter(cls):
+    """Private: Return True if a rule class defines ``filter_mask`` at or below the class defining ``filter``."""
+    mro = cls.__mro__
+
+    def _owner(name):
+        return next(i for i, c in enumerate(mro) if name in vars(c))
+
+    return _owner('filter_mask') <= _owner('filter')
+
+
 class BaseScaffoldFilterRule(metaclass=ABCMeta):
     """Abstract base class for defining rules for scaffold prioritization.
 
@@ -22,7 +97,17 @@ class BaseScaffoldFilterRule(metaclass=ABCMeta):
     All base rules should implement the ``name`` property and the
     ``filter`` function.
 
+    Rules may also support batched evaluation, where a boolean mask of
+    the retained parents is computed for all parents at once (usually
+    with array operations on ``Scaffold.ring_descriptors``). Such rules
+    should set the ``batched`` attribute to True and implement the
+    ``filter_mask`` function. A subclass of a batched rule overriding
+    only ``filter`` is evaluated through ``filter`` (see
+    ``uses_filter_mask``).
+
     """
+    batched = False
+
     @abstractmethod
     def filter(self, child, parents):
         """Filter a set of input scaffolds (parents).
@@ -53,6 +138,41 @@ class BaseScaffoldFilterRule(metaclass=ABCMeta):
         """
         raise NotImplementedError()
 
+    def filter_mask(self, child, parents, removed_rings):
+        """Return a boolean array marking the parent scaffolds retained by the rule.
+
+        By default the mask is computed from the output of the ``filter``
+        function. Batched rules override this method.
+
+        Parameters
+        ----------
+        child : scaffoldgraph.core.Scaffold
+            The child scaffold from which the parent scaffolds were obtained.
+        parents : list
+            A list of all parent scaffolds generated by a fragmenter.
+        removed_rings : numpy.ndarray
+            The index of the ring removed from the child to form each
+            parent (see ``removed_ring_indexes``).
+
+        Returns
+        -------
+        numpy.ndarray
+
+        """
+        retained = set(map(id, self.filter(child, parents)))
+        return np.array([id(p) in retained for p in parents], dtype=bool)
+
+    @property
+    def uses_filter_mask(self):
+        """bool : Return True if the rule is evaluated with ``filter_mask`` by a ruleset.
+
+        True for batched rules, unless ``filter`` is overridden in a
+        subclass of the class implementing ``filter_mask``, in which case
+        the overriding ``filter`` is used.
+
+        """
+        return self.batched and _mask_implements_filter(type(self))
+
     @property
     @abstractmethod
     def name(self):
@@ -63,6 +183,27 @@ class BaseScaffoldFilterRule(metaclass=ABCMeta):
         """
         raise NotImplementedError()
 
+    @property
+    def signature(self):
+        """str, None : Return a string identifying the rule and its parameters.
+
+        The signature is used to key fragment caches and is composed of
+        the class name and instance attributes of the rule. If an attribute
+        is not a plain value (None, a boolean, number or string, a builtin
+        function or a tuple of these), such as a lambda or another object,
+        the rule cannot be identified and None is returned, in which case
+        the results of the rule are not cached. Subclasses holding such
+        attributes may override this property.
+
+        """
+        params = []
+        for key, value in sorted(vars(self).items()):
+            value = _plain_value(value)
+            if value is None:
+                return None
+            params.append('{}={}'.format(key, value))
+        return '{}({})'.format(self.__class__.__name__, ', '.join(params))
+
     def __call__(self, child, parents):
         return self.filter(child, parents)
 
@@ -100,6 +241,8 @@ class ScaffoldFilterRule(BaseScaffoldFilterRule):
     ...       return 'my conditional rule'
 
     """
+    batched = True
+
     def filter(self, child, parents):
         """Filter a set of parent scaffolds using a defined condition.
 
@@ -111,7 +254,34 @@ class ScaffoldFilterRule(BaseScaffoldFilterRule):
             An iterable of all parent scaffolds generated by a fragmenter.
 
         """
-        return [s for s in parents if self.condition(child, s)]
+        parents = list(parents)
+        mask = self.filter_mask(child, parents, removed_ring_indexes(parents))
+        return list(compress(parents, mask))
+
+    def filter_mask(self, child, parents, removed_rings):
+        return np.asarray(self.conditions(child, parents, removed_rings), dtype=bool)
+
+    def conditions(self, child, parents, removed_rings):
+        """Return the condition for each parent scaffold.
+
+        By default ``condition`` is evaluated for each parent, subclasses
+        may override this method to evaluate all parents at once.
+
+        Parameters
+        ----------
+        child : scaffoldgraph.core.Scaffold
+            The child scaffold from which the parent scaffolds were obtained.
+        parents : list
+            A list of parent scaffolds.
+        removed_rings : numpy.ndarray
+            The index of the ring removed from the child to form each parent.
+
+        Returns
+        -------
+        numpy.ndarray or list
+
+        """
+        return [self.condition(child, s) for s in parents]
 
     @abstractmethod
     def condition(self, child, parent):
@@ -153,6 +323,8 @@ class ScaffoldMinFilterRule(BaseScaffoldFilterRule):
     ...        return 'my min conditional rule'
 
     """
+    batched = True
+
     def filter(self, child, parents):
         """Filter a set of parent scaffolds using a minimum property value.
 
@@ -164,9 +336,34 @@ class ScaffoldMinFilterRule(BaseScaffoldFilterRule):
             An iterable of all parent scaffolds generated by a fragmenter.
 
         """
-        props = [self.get_property(child, s) for s in parents]
-        min_val = min(props)
-        return list(compress(parents, [True if p == min_val else False for p in props]))
+        parents = list(parents)
+        mask = self.filter_mask(child, parents, removed_ring_indexes(parents))
+        return list(compress(parents, mask))
+
+    def filter_mask(self, child, parents, removed_rings):
+        return extreme_mask(self.get_properties(child, parents, removed_rings), min)
+
+    def get_properties(self, child, parents, removed_rings):
+        """Return the property values for each parent scaffold.
+
+        By default ``get_property`` is evaluated for each parent, subclasses
+        may override this method to evaluate all parents at once.
+
+        Parameters
+        ----------
+        child : scaffoldgraph.core.Scaffold
+            The child scaffold from which the parent scaffolds were obtained.
+        parents : list
+            A list of parent scaffolds.
+        removed_rings : numpy.ndarray
+            The index of the ring removed from the child to form each parent.
+
+        Returns
+        -------
+        numpy.ndarray or list
+
+        """
+        return [self.get_property(child, s) for s in parents]
 
     @abstractmethod
     def get_property(self, child, parent):
@@ -207,6 +404,8 @@ class ScaffoldMaxFilterRule(BaseScaffoldFilterRule):
     ...        return 'my min conditional rule'
 
     """
+    batched = True
+
     def filter(self, child, parents):
         """Filter a set of parent scaffolds using a maximum property value.
 
@@ -218,9 +417,34 @@ class ScaffoldMaxFilterRule(BaseScaffoldFilterRule):
             An iterable of all parent scaffolds generated by a fragmenter.
 
         """
-        props = [self.get_property(child, s) for s in parents]
-        max_val = max(props)
-        return list(compress(parents, [True if p == max_val else False for p in props]))
+        parents = list(parents)
+        mask = self.filter_mask(child, parents, removed_ring_indexes(parents))
+        return list(compress(parents, mask))
+
+    def filter_mask(self, child, parents, removed_rings):
+        return extreme_mask(self.get_properties(child, parents, removed_rings), max)
+
+    def get_properties(self, child, parents, removed_rings):
+        """Return the property values for each parent scaffold.
+
+        By default ``get_property`` is evaluated for each parent, subclasses
+        may override this method to evaluate all parents at once.
+
+        Parameters
+        ----------
+        child : scaffoldgraph.core.Scaffold
+            The child scaffold from which the parent scaffolds were obtained.
+        parents : list
+            A list of parent scaffolds.
+        removed_rings : numpy.ndarray
+            The index of the ring removed from the child to form each parent.
+
+        Returns
+        -------
+        numpy.ndarray or list
+
+        """
+        return [self.get_property(child, s) for s in parents]
 
     @abstractmethod
     def get_property(self, child, parent):
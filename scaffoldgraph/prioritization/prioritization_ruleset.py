@@ -4,7 +4,21 @@ scaffoldgraph.prioritization.prioritization_ruleset
 Implements a ruleset for scaffold prioritization when constructing scaffold trees.
 """
 
-from .prioritization_rules import BaseScaffoldFilterRule
+import time
+
+from collections import namedtuple
+from itertools import compress
+
+import numpy as np
+
+from .prioritization_rules import BaseScaffoldFilterRule, removed_ring_indexes
+
+__all__ = ['RuleStatistics', 'ScaffoldRuleSet']
+
+RuleStatistics = namedtuple(
+    'RuleStatistics',
+    ['rule', 'calls', 'time', 'candidates_in', 'candidates_out', 'resolved']
+)
 
 
 class ScaffoldRuleSet(object):
@@ -13,8 +27,23 @@ class ScaffoldRuleSet(object):
 
     Rules added to the rule set must subclass the BaseScaffoldFilterRule.
 
+    When profiling is enabled the rule set records, for each rule, the
+    number of calls, the cumulative time spent, the number of candidate
+    parents entering and leaving the rule and the number of decisions
+    resolved by the rule (see ``get_profile``).
+
+    Examples
+    --------
+    Profiling the rules used to construct a scaffold tree:
+
+    >>> import scaffoldgraph as sg
+    >>> from scaffoldgraph.prioritization import ScaffoldRuleSet, original_ruleset
+    >>> rules = ScaffoldRuleSet(original_ruleset, profile=True)
+    >>> tree = sg.ScaffoldTree.from_sdf('my_sdf_file.sdf', prioritization_rules=rules)
+    >>> rules.profile_to_dataframe()
+
     """
-    def __init__(self, rules=None, name=None):
+    def __init__(self, rules=None, name=None, profile=False):
         """
         Initialize a rule set with an iterable of rules and an
         optional name.
@@ -25,6 +54,9 @@ class ScaffoldRuleSet(object):
             An iterable of rules. The default is None.
         name : str, optional
             Name of rule set. The default is None.
+        profile : bool, optional
+            If True record statistics for each rule when filtering
+            scaffolds. The default is False.
 
         """
         self._rules = []
@@ -32,6 +64,9 @@ class ScaffoldRuleSet(object):
             for rule in rules:
                 self.add_rule(rule)
         self.name = name if name else 'ScaffoldRuleSet'
+        self._stats = None  # rule --> [calls, time, candidates in, candidates out, resolved]
+        self._last_remaining = 0
+        self.profile = profile
 
     def __call__(self, child, parents):
         return self.filter_scaffolds(child, parents)
@@ -41,11 +76,90 @@ class ScaffoldRuleSet(object):
         """list : Return rules as a list."""
         return self._rules
 
+    @property
+    def profile(self):
+        """bool : Return True if rule statistics are being recorded."""
+        return self._stats is not None
+
+    @profile.setter
+    def profile(self, value):
+        """Enable or disable the recording of rule statistics."""
+        if value and self._stats is None:
+            self._stats = {}
+        elif not value:
+            self._stats = None
+
+    def reset_profile(self):
+        """Reset the recorded rule statistics."""
+        if self._stats is not None:
+            self._stats = {}
+        self._last_remaining = 0
+
+    def get_profile(self):
+        """Return the statistics recorded for each rule when profiling.
+
+        The first entry records the 'last remaining' fast path, taken
+        when a single parent scaffold is supplied, followed by an entry
+        for each rule in the rule set (in order).
+
+        Returns
+        -------
+        list
+            A list of ``RuleStatistics(rule, calls, time, candidates_in,
+            candidates_out, resolved)`` named tuples, where time is the
+            cumulative time in seconds and resolved is the number of times
+            the rule left a single parent scaffold.
+
+        Notes
+        -----
+        Statistics are only recorded by the rule set in the process
+        filtering scaffolds, i.e. they are not recorded when constructing
+        graphs with multiple processes (``n_jobs`` > 1).
+
+        """
+        n = self._last_remaining
+        profile = [RuleStatistics('last remaining', n, 0.0, n, n, n)]
+        stats = self._stats if self._stats is not None else {}
+        for rule in self._rules:
+            calls, elapsed, n_in, n_out, resolved = stats.get(rule, (0, 0.0, 0, 0, 0))
+            profile.append(RuleStatistics(rule.name, calls, elapsed, n_in, n_out, resolved))
+        return profile
+
+    def profile_to_dataframe(self):
+        """Return the statistics recorded for each rule as a pandas DataFrame.
+
+        Returns
+        -------
+        pandas.DataFrame
+
+        See Also
+        --------
+        get_profile
+
+        """
+        import pandas as pd
+        return pd.DataFrame(self.get_profile(), columns=RuleStatistics._fields)
+
+    @property
+    def signature(self):
+        """str, None : Return a string identifying the rules (in order) used for prioritization.
+
+        None is returned if any rule cannot be identified (see
+        ``BaseScaffoldFilterRule.signature``).
+
+        """
+        signatures = [rule.signature for rule in self._rules]
+        if None in signatures:
+            return None
+        return '[{}]'.format(', '.join(signatures))
+
     def filter_scaffolds(self, child, parents):
         """Filter a set of parent scaffolds using the defined rules.
 
         Method is called internally by scaffold graph constructors.
-        __call__ is an alias for this function.
+        __call__ is an alias for this function. Batched rules are
+        evaluated for all remaining parents at once using their
+        ``filter_mask`` function (see ``uses_filter_mask``).
 
         Parameters
         ----------
@@ -77,14 +191,26 @@ class ScaffoldRuleSet(object):
         if len(parents) == 0:
             raise ValueError('No parent scaffolds supplied to filter')
         elif len(parents) == 1:
+            if self._stats is not None:
+                self._last_remaining += 1
             parent = parents.pop()
             parent.prioritization_rule = 'last remaining'
             return parent
         remaining = list(parents)
+        removed_rings = removed_ring_indexes(remaining)
+        stats = self._stats
         for rule in self:
-            filtered = rule.filter(child, remaining)
-            if filtered:
-                remaining = filtered
+            if stats is None:
+                remaining, removed_rings = self._apply_rule(rule, child, remaining, removed_rings)
+            else:
+                n_in, start = len(remaining), time.perf_counter()
+                remaining, removed_rings = self._apply_rule(rule, child, remaining, removed_rings)
+                rule_stats = stats.setdefault(rule, [0, 0.0, 0, 0, 0])
+                rule_stats[0] += 1
+                rule_stats[1] += time.perf_counter() - start
+                rule_stats[2] += n_in
+                rule_stats[3] += len(remaining)
+                rule_stats[4] += len(remaining) == 1
             if len(remaining) == 1:
                 parent = remaining.pop()
                 parent.prioritization_rule = rule.name
@@ -93,6 +219,21 @@ class ScaffoldRuleSet(object):
                          'after filter rules applied. Rule set may require '
                          'a tie-breaker rule')
 
+    @staticmethod
+    def _apply_rule(rule, child, remaining, removed_rings):
+        """Private: Apply a rule to the remaining parents (and their removed rings)."""
+        if rule.uses_filter_mask:
+            mask = rule.filter_mask(child, remaining, removed_rings)
+            if 0 < np.count_nonzero(mask) < len(remaining):
+                remaining = list(compress(remaining, mask.tolist()))
+                removed_rings = removed_rings[mask]
+        else:
+            filtered = rule.filter(child, remaining)
+            if filtered:
+                remaining = filtered
+                removed_rings = removed_ring_indexes(remaining)
+        return remaining, removed_rings
+
     def add_rule(self, rule):
         """Appends a rule to the ruleset.
 
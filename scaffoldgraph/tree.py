@@ -2,12 +2,15 @@
 scaffoldgraph.tree
 """
 
+from loguru import logger
 from rdkit import RDLogger
 from rdkit.Chem import rdmolops
 
 from .core import ScaffoldGraph, Scaffold, MurckoRingFragmenter
-from .core.fragment import get_murcko_scaffold
-from .prioritization import original_ruleset
+from .core.cache import FragmentCache
+from .core.fragment import get_murcko_scaffold, _as_scaffold, _iter_fragments
+from .network import ring_masks
+from .prioritization import original_ruleset, ScaffoldRuleSet
 
 rdlogger = RDLogger.logger()
 
@@ -71,7 +74,8 @@ class ScaffoldTree(ScaffoldGraph):
     HierS
 
     """
-    def __init__(self, graph=None, prioritization_rules=None, **kwargs):
+    def __init__(self, graph=None, prioritization_rules=None, fragment_cache=None, molecule_store=False,
+                 keep_candidates=False, profile_rules=False, compact_scaffolds=False, fragmenter=None, **kwargs):
         """Initialize a ScaffoldTree.
 
         Parameters
@@ -87,32 +91,380 @@ class ScaffoldTree(ScaffoldGraph):
         prioritization_rules : ScaffoldRuleSet
             Ruleset for prioritizing parent scaffolds during tree
             construction.
+        fragment_cache : {FragmentCache, SQLiteFragmentCache}, optional
+            A cache memoizing the prioritized parent of each scaffold
+            during construction. The cache is not used if the rules
+            have no signature (see ``ScaffoldRuleSet.signature``). If
+            None (default) no cache is used.
+        molecule_store : bool, optional
+            If True store molecule node properties in a columnar
+            ``MoleculeStore``. The default is False.
+        keep_candidates : bool, optional
+            If True keep the candidate parent scaffolds of each scaffold
+            so that the tree can be re-prioritized without fragmentation
+            (see ``reprioritize``). Candidates are not kept for molecules
+            processed by worker processes. The default is False.
+        profile_rules : bool, optional
+            If True record statistics for each prioritization rule during
+            construction (see ``get_rule_profile``). The rules are copied
+            into a new profiled ``ScaffoldRuleSet``. The default is False.
+        compact_scaffolds : bool, optional
+            If True hold scaffolds which are not being expanded during
+            construction as compact ``ScaffoldRecord`` objects. The
+            default is False.
+        fragmenter : scaffoldgraph.core.fragment.MurckoRingFragmenter, optional
+            The fragmenter used to produce parent scaffolds, for example an
+            ``IndexedMurckoRingFragmenter``. If None (default) a
+            ``MurckoRingFragmenter(use_scheme_4=True)`` is used.
 
         """
-        super(ScaffoldTree, self).__init__(graph, MurckoRingFragmenter(True), 'tree')
+        if fragmenter is None:
+            fragmenter = MurckoRingFragmenter(True)
+        super(ScaffoldTree, self).__init__(graph, fragmenter, 'tree', fragment_cache,
+                                           molecule_store, compact_scaffolds)
         self.rules = prioritization_rules if prioritization_rules else original_ruleset
+        if profile_rules:
+            self.rules = ScaffoldRuleSet(self.rules, self.rules.name, profile=True)
+        if fragment_cache is not None and self.rules.signature is None:
+            logger.warning('Prioritization rules have parameters which cannot be identified, '
+                           'the fragment cache will not be used')
+        self._candidates = {} if keep_candidates else None  # child --> ((parent, removed ring), ...)
+        self._network_candidates = None  # child --> [(parent, removed rings), ...] used by from_network
 
     def _recursive_constructor(self, child):
-        parents = [p for p in self.fragmenter.fragment(child) if p]
-        if not parents:
-            return
-        parent = self.rules(child, parents)
+        parent = self._select_parent(child)
         if not parent:
             return
         deletion_rule = parent.prioritization_rule
         if parent in self.nodes:
             self.add_scaffold_edge(parent, child, rule=deletion_rule)
+            self._expand_truncated(parent)
         else:
+            self._check_budget()
             self.add_scaffold_node(parent)
             self.add_scaffold_edge(parent, child, rule=deletion_rule)
-            if parent.rings.count > 1:
-                self._recursive_constructor(parent)
+            if self._is_expandable(parent):
+                self._recursive_constructor(self._restore(parent))
+
+    def _expand(self, child, parents=None):
+        if parents is None:
+            parents = self._fragment(child)
+        if not parents:
+            return []
+        parent = parents[0]
+        return [(parent, dict(rule=parent.prioritization_rule))]
+
+    def _select_parent(self, child):
+        """Private: Return the prioritized parent of a child scaffold.
+
+        Parameters
+        ----------
+        child : scaffoldgraph.core.Scaffold
+            Child scaffold to be fragmented.
+
+        Returns
+        -------
+        scaffoldgraph.core.Scaffold, scaffoldgraph.core.ScaffoldRecord, None
+            The parent scaffold retained by the prioritization rules (as
+            a record if the tree holds compact scaffolds), or None if the
+            child could not be fragmented.
+
+        """
+        selected = self._fragment(child)
+        return selected[0] if selected else None
+
+    def _fragment_many(self, children):
+        """Private: Return a list containing the prioritized parent of each child scaffold.
+
+        The fragment cache is consulted before fragmenting a child and
+        applying the prioritization rules, and updated with the result if
+        the child has not been seen. Children which have not been seen are
+        fragmented as a batch.
+
+        Parameters
+        ----------
+        children : list
+            Child scaffolds to be fragmented.
+
+        Returns
+        -------
+        list
+            For each child a list containing the parent scaffold retained
+            by the prioritization rules, or an empty list if the child
+            could not be fragmented.
+
+        """
+        cache = self.fragment_cache
+        signature = self._cache_signature() if cache is not None else None
+        if signature is None:
+            cache = None
+        results, missed = [], []
+        for child in children:
+            cached = None
+            if cache is not None:
+                cached = cache.get((signature, child.get_canonical_identifier()))
+            if cached is None:
+                missed.append(len(results))
+            results.append(cached)
+        if missed:
+            candidates = self._candidate_parents_many([children[i] for i in missed])
+            for i, parents in zip(missed, candidates):
+                child = children[i]
+                parent = self._compact(self.rules(child, parents)) if parents else None
+                results[i] = [parent] if parent else []
+                if cache is not None:
+                    cache[(signature, child.get_canonical_identifier())] = results[i]
+        return results
+
+    def _candidate_parents_many(self, children):
+        """Private: Return the candidate parent scaffolds of each child scaffold.
+
+        Kept candidates are recreated from their SMILES, else the children
+        are fragmented as a batch (and their candidates kept if required).
+
+        """
+        candidates = self._candidates
+        results, missed = [], []
+        for child in children:
+            kept = None
+            if candidates is not None and not self.fragmenter.applies_scheme_4(child):
+                key = child.get_canonical_identifier()
+                kept = candidates.get(key)
+                if kept is None and self._network_candidates is not None:
+                    kept = self._match_network_candidates(child)
+                    if kept is not None:
+                        candidates[key] = kept
+            if kept is None:
+                missed.append(len(results))
+                results.append(None)
+                continue
+            parents = []
+            for smiles, removed_ring_idx in kept:
+                parent = Scaffold.from_smiles(smiles)
+                if parent:
+                    parent.removed_ring_idx = removed_ring_idx
+                    parents.append(parent)
+            results.append(parents)
+        if missed:
+            fragments = self.fragmenter.fragment_many([children[i] for i in missed])
+            for i, parents in zip(missed, fragments):
+                child = children[i]
+                parents = [p for p in parents if p]
+                if candidates is not None and not self.fragmenter.applies_scheme_4(child):
+                    kept = tuple((p.get_canonical_identifier(), p.removed_ring_idx) for p in parents)
+                    candidates[child.get_canonical_identifier()] = kept
+                results[i] = parents
+        return results
+
+    def _match_network_candidates(self, child):
+        """Private: Return the candidate parents of a child from network edges, or None if unavailable."""
+        edges = self._network_candidates.get(child.get_canonical_identifier())
+        if not edges:
+            return None
+        ring_index = {mask: rix for rix, mask in enumerate(ring_masks(child))}
+        kept = []
+        for parent, removed_rings in edges:
+            if removed_rings is None:
+                return None
+            for mask in removed_rings:
+                rix = ring_index.get(mask)
+                if rix is None:
+                    return None
+                kept.append((parent, rix))
+        return tuple(sorted(kept, key=lambda x: x[1]))
+
+    def _cache_signature(self):
+        """Private: Return a string identifying the fragmenter and prioritization rules.
+
+        None is returned if the rules cannot be identified, in which case
+        the cache is not used.
+
+        """
+        fragmenter_signature = super(ScaffoldTree, self)._cache_signature()
+        rules_signature = self.rules.signature
+        if rules_signature is None:
+            return None
+        return '{} {}'.format(fragmenter_signature, rules_signature)
+
+    def _empty_copy(self):
+        """Private: Return an empty tree sharing the fragmenter and prioritization rules."""
+        tree = super(ScaffoldTree, self)._empty_copy()
+        tree.rules = self.rules
+        return tree
+
+    @classmethod
+    def from_network(cls, network, prioritization_rules=None, **kwargs):
+        """Construct a ScaffoldTree from an existing ScaffoldNetwork.
+
+        A scaffold tree selects a single parent for each scaffold from the
+        parents generated by the ``MurckoRingFragmenter``, which are stored
+        as edges of a scaffold network. The prioritization rules are applied
+        to the candidate parents of each scaffold recovered from the network
+        edges and the rings removed to produce them ('removed_rings'), rather
+        than fragmenting scaffolds again. The network must be constructed
+        with ``record_removed_rings=True`` to record this edge information.
+        Scaffolds for which the tree fragmentation differs from the network
+        (see scheme 4 in ``MurckoRingFragmenter``), which lack this edge
+        information or whose network hierarchy was truncated by a
+        construction budget (node attribute 'truncated') are fragmented.
+
+        The candidate parents are kept by the tree, such that it may be
+        efficiently re-prioritized (see ``reprioritize``).
+
+        Parameters
+        ----------
+        network : ScaffoldNetwork
+            A scaffold network, constructed from the molecules of interest.
+        prioritization_rules : ScaffoldRuleSet, optional
+            Ruleset for prioritizing parent scaffolds. If None the original
+            rules are used.
+        **kwargs : keyword arguments, optional
+            Arguments to pass to the ScaffoldTree initializer.
+
+        Returns
+        -------
+        ScaffoldTree
+
+        Notes
+        -----
+        The prioritization rules are evaluated on scaffolds recreated from
+        their SMILES keys, in rare cases where a fragment generated during
+        construction differs from its SMILES representation (i.e. in its
+        hydrogen count) the selected parent may differ from a tree
+        constructed from the molecules directly.
+
+        Examples
+        --------
+        >>> import scaffoldgraph as sg
+        >>> network = sg.ScaffoldNetwork.from_sdf('my_file.sdf', record_removed_rings=True)
+        >>> tree = sg.ScaffoldTree.from_network(network)
+
+        """
+        kwargs['keep_candidates'] = True
+        tree = cls(prioritization_rules=prioritization_rules, **kwargs)
+        removed = {}
+        truncated = {n for n, t in network.get_scaffold_nodes(data='truncated') if t}
+        for parent, child, data in network.edges(data=True):
+            if data.get('type') == 1 and child not in truncated:
+                removed.setdefault(child, []).append((parent, data.get('removed_rings')))
+        if any(r is None for edges in removed.values() for _, r in edges):
+            logger.warning('Network edges do not record removed rings (see ScaffoldNetwork '
+                           'record_removed_rings), scaffolds will be fragmented')
+        if truncated:
+            logger.warning(f'{len(truncated)} network hierarchies were truncated by a construction '
+                           f'budget, their scaffolds will be fragmented')
+        tree._network_candidates = removed
+        try:
+            for molecule in network.get_molecule_nodes():
+                tree._add_node_data(molecule, dict(network.get_molecule_data(molecule)))
+                for scaffold, _, data in network.in_edges(molecule, data=True):
+                    tree._add_network_scaffold(scaffold, network.nodes[scaffold].get('hierarchy'))
+                    tree.add_edge(tree._intern(scaffold), molecule, **data)
+        finally:
+            tree._network_candidates = None
+        if tree.fragment_cache is not None:
+            tree.fragment_cache.flush()
+        return tree
+
+    def _add_network_scaffold(self, scaffold, hierarchy):
+        """Private: Add a top-level scaffold and expand its hierarchy if it is new."""
+        if scaffold in self:
+            return
+        self.add_node(self._intern(scaffold), type='scaffold', hierarchy=hierarchy)
+        self._expand_top_level_scaffold(scaffold, hierarchy)
+
+    def _expand_top_level_scaffold(self, scaffold, hierarchy):
+        """Private: Expand the hierarchy of a top-level scaffold from its SMILES key."""
+        if hierarchy is None or hierarchy <= 1:
+            return
+        child = Scaffold.from_smiles(scaffold)
+        if child:
+            self._recursive_constructor(child)
+
+    def reprioritize(self, prioritization_rules):
+        """Re-select the parent of each scaffold using a new ruleset.
+
+        The molecules and their top-level scaffolds are retained while the
+        remaining hierarchy is re-constructed using the new rules. If the
+        tree keeps the candidate parents of each scaffold (i.e. a tree
+        constructed with ``from_network`` or ``keep_candidates=True``) only
+        the rules are evaluated, else the candidates of each scaffold are
+        generated by fragmentation and kept for subsequent calls.
+
+        The hierarchy of every top-level scaffold is re-constructed without
+        a construction budget, such that hierarchies previously truncated
+        by a budget (node attribute 'truncated') are completed. Candidates
+        are only recovered from network edges for scaffolds whose network
+        hierarchy was complete (see ``from_network``).
+
+        Parameters
+        ----------
+        prioritization_rules : ScaffoldRuleSet
+            Ruleset for prioritizing parent scaffolds.
+
+        Notes
+        -----
+        As in ``from_network``, kept candidates are recreated from their
+        SMILES keys, in rare cases where a fragment generated during
+        construction differs from its SMILES representation (i.e. in its
+        hydrogen count) the selected parent may differ from a tree
+        constructed from the molecules directly.
+
+        Examples
+        --------
+        >>> from scaffoldgraph.prioritization import ScaffoldRuleSet
+        >>> tree = sg.ScaffoldTree.from_network(network)
+        >>> tree.reprioritize(ScaffoldRuleSet.from_rule_file('my_rules.txt'))
+
+        """
+        counted = self._has_molecule_counts()
+        self.rules = prioritization_rules
+        if self._candidates is None:
+            self._candidates = {}
+        top_level = {}
+        for scaffold, hierarchy in self.get_scaffold_nodes(data='hierarchy'):
+            if any(self.nodes[m].get('type') == 'molecule' for m in self.successors(scaffold)):
+                top_level[scaffold] = hierarchy
+        self.remove_edges_from([(u, v) for u, v, t in self.edges(data='type') if t == 1])
+        self.remove_nodes_from([s for s in self.get_scaffold_nodes() if s not in top_level])
+        for scaffold, hierarchy in top_level.items():
+            self._expand_top_level_scaffold(scaffold, hierarchy)
+            self.nodes[scaffold].pop('truncated', None)
+        if self.fragment_cache is not None:
+            self.fragment_cache.flush()
+        if counted:
+            self.add_scaffold_molecule_count()
 
     @property
     def prioritization_rules(self):
         """ScaffoldRuleSet : Return the prioritization ruleset used."""
         return self.rules
 
+    def get_rule_profile(self):
+        """Return the statistics recorded for each prioritization rule.
+
+        Statistics are recorded when the tree is initialized with
+        ``profile_rules=True`` or the ruleset supplied is profiled.
+
+        Returns
+        -------
+        list
+            A list of ``RuleStatistics(rule, calls, time, candidates_in,
+            candidates_out, resolved)`` named tuples.
+
+        Examples
+        --------
+        >>> tree = sg.ScaffoldTree.from_sdf('my_sdf_file.sdf', profile_rules=True)
+        >>> for stats in tree.get_rule_profile():
+        ...     print(stats.rule, stats.calls, stats.time, stats.resolved)
+
+        See Also
+        --------
+        scaffoldgraph.prioritization.ScaffoldRuleSet.get_profile
+
+        """
+        return self.rules.get_profile()
+
 
 def tree_frags_from_mol(mol, prioritization_rules=None):
     """Generate a scaffold tree from a single molecule without using networkx.
@@ -140,24 +492,110 @@ def tree_frags_from_mol(mol, prioritization_rules=None):
     >>> molecule = Chem.MolFromSmiles(smiles)
     >>> frags = tree_frags_from_mol(molecule)
 
+    See Also
+    --------
+    iter_tree_frags
+
     """
     rdlogger.setLevel(4)
-    scaffold = Scaffold(get_murcko_scaffold(mol))
-    rdmolops.RemoveStereochemistry(scaffold.mol)
-    parents = [scaffold]
     fragmenter = MurckoRingFragmenter(use_scheme_4=True)
     rules = prioritization_rules if prioritization_rules else original_ruleset
+    try:
+        parents = _tree_frags(mol, fragmenter, rules)
+    finally:
+        rdlogger.setLevel(3)
+    return [p.mol for p in parents]
 
-    def _next_scaffold(child):
-        next_parents = [p for p in fragmenter.fragment(child) if p]
-        if not next_parents:
-            return
-        next_parent = rules(child, next_parents)
-        parents.append(next_parent)
-        if next_parent.rings.count > 1:
-            _next_scaffold(next_parent)
 
-    _next_scaffold(scaffold)
-    rdlogger.setLevel(3)
+def iter_tree_frags(mols, prioritization_rules=None, fragment_cache=None, n_jobs=1, output='smiles',
+                    chunksize=64, cache_size=10000):
+    """Generate the scaffold tree fragments of each molecule in an iterable.
 
-    return [p.mol for p in parents]
+    A batched version of ``tree_frags_from_mol``. A single fragmenter and
+    fragment cache (memoizing the prioritized parent of each scaffold) are
+    shared by all molecules, such that scaffolds common to many molecules
+    are only fragmented and prioritized once, and results are streamed in
+    input order.
+
+    Parameters
+    ----------
+    mols : iterable
+        An iterable of rdkit molecules (i.e. a supplier).
+    prioritization_rules : ScaffoldRuleSet, optional
+        rules for prioritizing parent scaffolds. If not supplied the
+        original rules are used. The default is None.
+    fragment_cache : scaffoldgraph.core.FragmentCache, optional
+        A cache memoizing the prioritized parent of each scaffold, which
+        may be shared with a ``ScaffoldTree`` using the same rules. If
+        None (default) an in-memory ``FragmentCache`` of `cache_size` is
+        used. Each worker process uses a fork of the cache.
+    n_jobs : int, None, optional
+        Number of worker processes. If None or < 1 all available CPUs are
+        used. The default is 1 (no multiprocessing).
+    output : {'smiles', 'binary', 'mol'}, optional
+        The format of the returned fragments, canonical SMILES (default),
+        rdkit molecules in binary format or rdkit molecules.
+    chunksize : int, optional
+        Number of molecules sent to a worker at a time. The default is 64.
+    cache_size : int, None, optional
+        The maximum size of the fragment cache created if `fragment_cache`
+        is None. The default is 10000.
+
+    Yields
+    ------
+    list, None
+        An ordered list of fragments representing the scaffold tree of
+        each input molecule, or None if the molecule is None.
+
+    Examples
+    --------
+    >>> from rdkit import Chem
+    >>> supplier = Chem.SmilesMolSupplier('my_file.smi')
+    >>> for frags in iter_tree_frags(supplier, n_jobs=4):
+    ...     print(frags)
+
+    """
+    if fragment_cache is None:
+        fragment_cache = FragmentCache(cache_size)
+    fragmenter = MurckoRingFragmenter(use_scheme_4=True)
+    rules = prioritization_rules if prioritization_rules else original_ruleset
+    args = (fragmenter, rules, fragment_cache)
+    return _iter_fragments(_tree_frags, args, mols, n_jobs, output, chunksize)
+
+
+def _tree_frags(mol, fragmenter, rules, fragment_cache=None):
+    """Private: Return the scaffold tree fragments of a molecule as Scaffolds.
+
+    The fragment cache memoizes the prioritized parent of each scaffold,
+    keyed as in a ``ScaffoldTree`` using the same fragmenter and rules.
+
+    """
+    scaffold = Scaffold(get_murcko_scaffold(mol))
+    rdmolops.RemoveStereochemistry(scaffold.mol)
+    parents = [scaffold]
+    signature = None
+    if fragment_cache is not None and rules.signature is not None:
+        signature = '{} {}'.format(fragmenter.signature, rules.signature)
+    else:
+        fragment_cache = None
+    child = scaffold
+    while True:
+        parent, cached = None, None
+        if fragment_cache is not None:
+            key = (signature, child.get_canonical_identifier())
+            cached = fragment_cache.get(key)
+        if cached is not None:
+            parent = _as_scaffold(cached[0]) if cached else None
+        else:
+            next_parents = [p for p in fragmenter.fragment(child) if p]
+            if next_parents:
+                parent = rules(child, next_parents)
+            if fragment_cache is not None:
+                fragment_cache[key] = [parent] if parent else []
+        if not parent:
+            break
+        parents.append(parent)
+        if parent.rings.count <= 1:
+            break
+        child = parent
+    return parents
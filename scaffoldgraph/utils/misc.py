@@ -71,7 +71,7 @@ def summary(graph, n=None):
         if graph.molecule_in_graph(n):
             info += f"Node {n} has the following properties:\n"
             info += "Type: molecule\n"
-            info += f"SMILES: {graph.nodes[n].get('smiles')}\n"
+            info += f"SMILES: {graph.get_molecule_data(n, 'smiles')}\n"
             info += f"Degree: {graph.degree(n)}\n"
             info += "Parent scaffolds: "
             info += " ".join(str(s) for s in graph.predecessors(n))
@@ -0,0 +1,110 @@
+"""
+scaffoldgraph.utils.parallel
+
+Defines utilities for multi-process computation within scaffoldgraph.
+"""
+
+import multiprocessing
+import os
+
+from collections import deque
+from itertools import islice
+
+
+def get_n_jobs(n_jobs):
+    """Return the number of worker processes to use.
+
+    Parameters
+    ----------
+    n_jobs : int, None
+        The requested number of processes. If None or < 1
+        the number of available CPUs is used.
+
+    Returns
+    -------
+    int
+        The number of worker processes.
+
+    """
+    if n_jobs is None or n_jobs < 1:
+        return os.cpu_count() or 1
+    return int(n_jobs)
+
+
+def chunked(iterable, size):
+    """Split an iterable into lists of length `size`.
+
+    Parameters
+    ----------
+    iterable : iterable
+        The iterable to split.
+    size : int
+        Size of each chunk. The last chunk may be smaller.
+
+    Yields
+    ------
+    list
+        A chunk of the input iterable.
+
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ordered_imap(func, chunks, n_jobs, initializer=None, initargs=(), max_pending=None, pool=None):
+    """Apply a function to chunks of work in a process pool, preserving order.
+
+    Unlike ``multiprocessing.Pool.imap`` the number of chunks submitted
+    to the pool is bounded, so that large inputs (i.e. molecule files) are
+    not read into memory ahead of the workers. Chunks are dispatched to
+    workers in input order, so a worker always processes its chunks in
+    ascending order.
+
+    Parameters
+    ----------
+    func : callable
+        A picklable (module level) function applied to each chunk.
+    chunks : iterable
+        An iterable of work chunks.
+    n_jobs : int
+        The number of worker processes.
+    initializer : callable, optional
+        Called in each worker process on startup as ``initializer(*initargs)``.
+    initargs : tuple, optional
+        Arguments supplied to the initializer.
+    max_pending : int, optional
+        Maximum number of chunks submitted to the pool at any one time.
+        If None, 4 * n_jobs is used.
+    pool : multiprocessing.Pool, optional
+        An existing pool of `n_jobs` workers to use. If None (default) a
+        pool is created and closed once all chunks are processed. The
+        initializer is ignored if a pool is supplied.
+
+    Yields
+    ------
+    object
+        The result of ``func(chunk)`` for each chunk in input order.
+
+    """
+    if max_pending is None:
+        max_pending = 4 * n_jobs
+    if pool is None:
+        with multiprocessing.Pool(n_jobs, initializer, initargs) as pool:
+            yield from _ordered_imap(func, chunks, pool, max_pending)
+    else:
+        yield from _ordered_imap(func, chunks, pool, max_pending)
+
+
+def _ordered_imap(func, chunks, pool, max_pending):
+    """Private: Apply a function to chunks of work in a pool, preserving order."""
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.apply_async(func, (chunk, )))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
@@ -103,10 +103,10 @@ class Visualizer(ABC):
         if traversal == 'parent':
             nodes = G.get_parent_scaffolds(query)
         elif traversal == 'child':
-            nodes = list(nx.descendants(G, query))
+            nodes = G.get_child_scaffolds(query) + G.get_molecules_for_scaffold(query)
         elif traversal == 'bidirectional':
             nodes = G.get_parent_scaffolds(query)
-            nodes += list(nx.descendants(G, query))
+            nodes += G.get_child_scaffolds(query) + G.get_molecules_for_scaffold(query)
         else:
             msg = 'traversal must be one of {child, parent, bidirectional}'
             raise ValueError(msg)
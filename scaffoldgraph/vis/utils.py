@@ -99,7 +99,7 @@ def embed_node_mol_images(graph, size=(350, 300), draw_options=None, skip_existi
         elif data.get('type', None) == 'scaffold':
             data['img'] = smiles_to_image(node, size, draw_options)
         elif data.get('type', None) == 'molecule':
-            data['img'] = smiles_to_image(data['smiles'], size, draw_options)
+            data['img'] = smiles_to_image(graph.get_molecule_data(node, 'smiles'), size, draw_options)
         else:
             data['img'] = ''
 
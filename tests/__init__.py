@@ -57,3 +57,10 @@ def mock_smiles_file(tmp_path):
 def canon(smiles):
     """Canonicalize SMILES for safety. If canonicalization ever changes this should remain consistent"""
     return Chem.MolToSmiles(Chem.MolFromSmiles(smiles))
+
+
+def graph_data(graph):
+    """Return the nodes and edges (with attributes) of a graph as dicts for comparison"""
+    nodes = {n: d for n, d in graph.nodes(data=True)}
+    edges = {(u, v): d for u, v, d in graph.edges(data=True)}
+    return nodes, edges
@@ -7,7 +7,7 @@ import networkx as nx
 import random
 
 from scaffoldgraph.analysis import calc_scaffold_enrichment, compound_set_enrichment
-from ..test_network import long_test_network
+from ..test_network import long_test_network, long_smiles_file
 
 
 def test_enrichment(network):
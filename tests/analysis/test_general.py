@@ -3,7 +3,7 @@ scaffoldgraph tests.analysis.test_general
 """
 
 from scaffoldgraph.analysis import get_singleton_scaffolds, get_virtual_scaffolds
-from ..test_network import long_test_network
+from ..test_network import long_test_network, long_smiles_file
 
 
 def test_get_virtual_scaffolds(network):
@@ -3,7 +3,7 @@ scaffoldgraph tests.analysis.test_representation
 """
 
 from scaffoldgraph.analysis import calc_average_pairwise_similarity, get_over_represented_scaffold_classes
-from ..test_network import long_test_network
+from ..test_network import long_test_network, long_smiles_file
 
 
 def test_representation(network):
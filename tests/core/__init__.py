@@ -0,0 +1,3 @@
+"""
+scaffoldgraph tests.core
+"""
@@ -0,0 +1,77 @@
+"""
+scaffoldgraph tests.core.test_budget
+"""
+
+import pytest
+import time
+
+from pathlib import Path
+
+import scaffoldgraph as sg
+
+from scaffoldgraph.core.budget import *
+
+TEST_DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
+
+
+def test_budget():
+    budget = ConstructionBudget(max_scaffolds=2)
+    budget.start()
+    budget.check()
+    budget.check()
+    with pytest.raises(BudgetExceeded) as e:
+        budget.check()
+    assert e.value.reason == 'max_scaffolds'
+    assert e.value.n_scaffolds == 2
+    budget.start()
+    budget.check()
+    budget = ConstructionBudget(timeout=0)
+    budget.start()
+    time.sleep(0.01)
+    with pytest.raises(BudgetExceeded) as e:
+        budget.check()
+    assert e.value.reason == 'timeout'
+    with pytest.raises(ValueError):
+        ConstructionBudget(policy='unknown')
+
+
+@pytest.mark.parametrize('graph_cls', [sg.ScaffoldNetwork, sg.HierS, sg.ScaffoldTree])
+def test_budget_policy(graph_cls):
+    smiles_file = str(TEST_DATA_DIR / 'test_smiles.smi')
+    full = graph_cls.from_smiles_file(smiles_file)
+    keep = graph_cls.from_smiles_file(smiles_file, budget=ConstructionBudget(max_scaffolds=1))
+    skip = graph_cls.from_smiles_file(smiles_file, budget=ConstructionBudget(max_scaffolds=1, policy='skip'))
+    report = keep.get_budget_report()
+    assert report
+    assert set(report) <= set(skip.get_budget_report())
+    assert all(r.reason == 'max_scaffolds' for r in report)
+    assert all(keep.nodes[r.scaffold]['budget_exceeded'] == 'max_scaffolds' for r in report)
+    assert set(keep.get_molecule_nodes()) == set(full.get_molecule_nodes())
+    assert set(skip.get_molecule_nodes()) == set(full.get_molecule_nodes())
+    assert set(skip.nodes) <= set(keep.nodes) <= set(full.nodes)
+    for r in skip.get_budget_report():
+        assert skip.in_degree(r.scaffold) == 0
+    parallel = graph_cls.from_smiles_file(smiles_file, n_jobs=2, budget=ConstructionBudget(max_scaffolds=1))
+    assert set(parallel.get_budget_report()) == set(report)
+    unlimited = graph_cls.from_smiles_file(smiles_file, budget=ConstructionBudget())
+    assert not unlimited.get_budget_report()
+    assert set(unlimited.edges) == set(full.edges)
+    with pytest.raises(ValueError):
+        graph_cls.from_smiles_file(smiles_file, engine='level', budget=ConstructionBudget())
+
+
+@pytest.mark.parametrize('graph_cls', [sg.ScaffoldNetwork, sg.HierS, sg.ScaffoldTree])
+@pytest.mark.parametrize('kwargs', [{}, {'n_jobs': 2}, {'engine': 'level'}])
+def test_truncated_expansion(graph_cls, kwargs):
+    from scaffoldgraph.io.smiles import read_smiles_file
+    smiles_file = str(TEST_DATA_DIR / 'test_smiles.smi')
+    molecules = list(read_smiles_file(smiles_file, ' ', 0, 1, False))
+    full = graph_cls.from_supplier(molecules)
+    keep = graph_cls.from_supplier(molecules, budget=ConstructionBudget(max_scaffolds=1))
+    truncated = {n for n, t in keep.nodes(data='truncated') if t}
+    assert truncated and set(keep.edges) < set(full.edges)
+    keep.add_molecules(molecules, **kwargs)  # truncated hierarchies are expanded without a budget
+    assert not any(t for _, t in keep.nodes(data='truncated'))
+    assert set(keep.edges) == set(full.edges)
+    skip = graph_cls.from_supplier(molecules, budget=ConstructionBudget(max_scaffolds=1, policy='skip'))
+    assert not any(t for _, t in skip.nodes(data='truncated'))
@@ -0,0 +1,108 @@
+"""
+scaffoldgraph tests.core.test_cache
+"""
+
+import pickle
+
+import pytest
+
+from pathlib import Path
+
+import scaffoldgraph as sg
+
+from scaffoldgraph.core.cache import *
+
+TEST_DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
+
+
+def test_fragment_cache():
+    cache = FragmentCache(maxsize=2)
+    assert cache.get('a') is None
+    cache['a'] = 1
+    cache['b'] = 2
+    assert cache.get('a') == 1
+    cache['c'] = 3  # evicts least recently used (b)
+    assert 'b' not in cache
+    assert cache.info() == CacheInfo(hits=1, misses=1, maxsize=2, currsize=2)
+    cache.clear()
+    assert cache.info() == CacheInfo(hits=0, misses=0, maxsize=2, currsize=0)
+
+
+def test_fragment_cache_pickle():
+    cache = FragmentCache(maxsize=10)
+    cache['a'] = 1
+    cache.get('a')
+    loaded = pickle.loads(pickle.dumps(cache))
+    assert loaded.info() == cache.info()
+    assert loaded['a'] == 1
+
+
+@pytest.mark.parametrize('graph_cls', [sg.ScaffoldNetwork, sg.HierS, sg.ScaffoldTree])
+def test_graph_fragment_cache(graph_cls):
+    smiles_file = str(TEST_DATA_DIR / 'test_smiles.smi')
+    graph = graph_cls.from_smiles_file(smiles_file)
+    assert graph.cache_info() is None
+    cached = graph_cls.from_smiles_file(smiles_file, fragment_cache=FragmentCache(maxsize=4))
+    info = cached.cache_info()
+    assert info.misses > 0 and info.currsize <= 4
+    assert dict(cached.nodes(data=True)) == dict(graph.nodes(data=True))
+    assert set(cached.edges) == set(graph.edges)
+
+
+@pytest.mark.parametrize('graph_cls', [sg.ScaffoldNetwork, sg.HierS, sg.ScaffoldTree])
+def test_sqlite_fragment_cache(graph_cls, tmp_path):
+    smiles_file = str(TEST_DATA_DIR / 'test_smiles.smi')
+    db = tmp_path / 'fragments.db'
+    graph = graph_cls.from_smiles_file(smiles_file)
+    cold = graph_cls.from_smiles_file(smiles_file, fragment_cache=SQLiteFragmentCache(db))
+    assert cold.cache_info().hits == 0
+    warm = graph_cls.from_smiles_file(smiles_file, fragment_cache=SQLiteFragmentCache(db))
+    info = warm.cache_info()
+    assert info.misses == 0 and info.hits > 0 and info.currsize == cold.cache_info().currsize
+    for g in (cold, warm):
+        assert dict(g.nodes(data=True)) == dict(graph.nodes(data=True))
+        assert dict(((u, v), d) for u, v, d in g.edges(data=True)) == \
+               dict(((u, v), d) for u, v, d in graph.edges(data=True))
+    warm.fragment_cache.close()
+
+
+def test_sqlite_fragment_cache_shared(tmp_path):
+    smiles_file = str(TEST_DATA_DIR / 'test_smiles.smi')
+    with SQLiteFragmentCache(tmp_path / 'fragments.db') as cache:
+        sg.ScaffoldNetwork.from_smiles_file(smiles_file, fragment_cache=cache)
+        tree = sg.ScaffoldTree.from_smiles_file(smiles_file, fragment_cache=cache)
+        assert set(tree.edges) == set(sg.ScaffoldTree.from_smiles_file(smiles_file).edges)
+        query = 'SELECT COUNT(DISTINCT namespace) FROM scaffolds'
+        assert cache._connection().execute(query).fetchone()[0] == 2
+
+
+def test_sqlite_fragment_cache_version(tmp_path, monkeypatch):
+    db = tmp_path / 'fragments.db'
+    with SQLiteFragmentCache(db) as cache:
+        cache[('sig', 'C1CC1')] = []
+        assert ('sig', 'C1CC1') in cache
+    monkeypatch.setattr(SQLiteFragmentCache, 'schema_version', 2)
+    with SQLiteFragmentCache(db) as cache:
+        assert len(cache) == 0
+        assert cache.get(('sig', 'C1CC1')) is None
+
+
+def test_sqlite_fragment_cache_pickle(tmp_path):
+    cache = SQLiteFragmentCache(tmp_path / 'fragments.db')
+    cache[('sig', 'C1CC1')] = []
+    cache.flush()
+    loaded = pickle.loads(pickle.dumps(cache))
+    assert loaded.get(('sig', 'C1CC1')) == []
+    cache.close()
+    loaded.close()
+
+
+def test_get_all_murcko_fragments_cache(tmp_path):
+    from rdkit import Chem
+    mol = Chem.MolFromSmiles('Cc1[nH]cnc1Cn1cccc(-c2ccccc2O)c1=O')
+    expected = {Chem.MolToSmiles(m) for m in sg.get_all_murcko_fragments(mol)}
+    with SQLiteFragmentCache(tmp_path / 'fragments.db') as cache:
+        for _ in range(2):
+            frags = sg.get_all_murcko_fragments(mol, fragment_cache=cache)
+            assert {Chem.MolToSmiles(m) for m in frags} == expected
+        assert cache.info().hits > 0
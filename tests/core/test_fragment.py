@@ -41,6 +41,21 @@ def test_murcko_all(mol):
     assert len(frags) == 3
 
 
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_iter_murcko_all(mol, n_jobs):
+    mols = [mol, None, Chem.MolFromSmiles('c1ccc(Cc2ccccc2)cc1'), mol]
+    expected = [{Chem.MolToSmiles(f) for f in get_all_murcko_fragments(m)} for m in mols if m]
+    result = list(iter_all_murcko_fragments(mols, n_jobs=n_jobs, chunksize=1))
+    assert result[1] is None
+    assert [set(frags) for frags in result if frags is not None] == expected
+    binary = list(iter_all_murcko_fragments(mols[:1], n_jobs=n_jobs, output='binary'))
+    assert {Chem.MolToSmiles(Chem.Mol(b)) for b in binary[0]} == expected[0]
+    frags = next(iter_all_murcko_fragments(mols, break_fused_rings=False, n_jobs=n_jobs, output='mol'))
+    assert len(frags) == 3 and all(isinstance(f, Chem.Mol) for f in frags)
+    with pytest.raises(ValueError):
+        next(iter_all_murcko_fragments(mols, output='sdf'))
+
+
 def test_murcko_next(mol):
     scf = get_murcko_scaffold(mol)
     frags_1 = get_next_murcko_fragments(scf, break_fused_rings=True)
@@ -62,3 +77,59 @@ def test_collect_linker_atoms():
     a = collect_linker_atoms(mol.GetAtomWithIdx(0), remove_atoms, False)
     assert len(a) == 1
     assert len(remove_atoms) == 8
+
+
+@pytest.mark.parametrize('use_scheme_4', [False, True])
+def test_indexed_fragmenter(use_scheme_4):
+    from scaffoldgraph.core import Scaffold
+    fragmenter = MurckoRingFragmenter(use_scheme_4)
+    indexed = IndexedMurckoRingFragmenter(use_scheme_4)
+    assert indexed.signature == fragmenter.signature
+    smiles = [
+        'O=C(Nc1ccccc1)Nc1cc2c(s1)CNCC2',
+        'c1ccc(CC2CCN(Cc3ccccc3)CC2)cc1',
+        'c1ccc(C2CN3CCC2CC3)cc1',  # bridged (symmetrized SSSR)
+        'O=C1c2ccccc2C(=O)C2OC12',  # epoxide (scheme 4)
+        'c1ccc2c(c1)-c1cccc3cccc-2c13',
+        '[CH2]1[C]2=[C]3[CH-]4->[Fe+2]1235678([CH2]4)[C]1=[C]5[C-]6[C]7=[C]18',  # dative bonds
+    ]
+    queue = [Scaffold(Chem.MolFromSmiles(s)) for s in smiles]
+    seen = set()
+    while queue:
+        child = queue.pop()
+        expected = fragmenter.fragment(child)
+        parents = indexed.fragment(Scaffold(Chem.Mol(child.mol)))
+        key = lambda p: (p.smiles, p.removed_ring_idx, p.rings.atom_rings)
+        assert sorted(map(key, parents)) == sorted(map(key, expected))
+        queue.extend(p for p in expected if p.rings.count > 1 and p not in seen)
+        seen.update(expected)
+
+
+@pytest.mark.parametrize('fragmenter_cls', [MurckoRingFragmenter, IndexedMurckoRingFragmenter])
+def test_aromatic_dissection_precheck(fragmenter_cls):
+    from scaffoldgraph.core import Scaffold
+
+    class Unchecked(fragmenter_cls):
+        def _dissects_aromatic_system(self, scaffold, ring, rings):
+            return False
+
+    fragmenter, unchecked = fragmenter_cls(), Unchecked()
+    assert fragmenter.skipped == 0
+    for smiles, skipped in [
+        ('c1cc2ccc3cccc4ccc(c1)c2c34', 2),  # pyrene
+        ('c1ccc2c(c1)-c1cccc3cccc-2c13', 4),  # fluoranthene
+        ('c1ccc2c(c1)[nH]c1ccccc12', 4),  # carbazole
+    ]:
+        scaffold = Scaffold(Chem.MolFromSmiles(smiles))
+        parents = fragmenter.fragment(scaffold)
+        expected = unchecked.fragment(Scaffold(Chem.Mol(scaffold.mol)))
+        assert sorted(p.smiles for p in parents) == sorted(p.smiles for p in expected)
+        assert fragmenter.skipped == skipped
+
+
+def test_collect_long_linker():
+    mol = Chem.MolFromSmiles('c1ccccc1' + 'C' * 2000 + 'c1ccccc1')
+    remove_atoms = set()
+    attachments = collect_linker_atoms(mol.GetAtomWithIdx(5), remove_atoms)
+    assert attachments == {5, 2006}
+    assert len(remove_atoms) == 2001
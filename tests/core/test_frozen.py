@@ -0,0 +1,74 @@
+"""
+scaffoldgraph tests.core.test_frozen
+"""
+
+import pickle
+
+import networkx as nx
+import pytest
+
+from pathlib import Path
+
+import scaffoldgraph as sg
+
+from scaffoldgraph.core import FrozenScaffoldGraph
+
+from .. import graph_data
+
+TEST_DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
+
+
+@pytest.fixture(name='graphs', params=[sg.ScaffoldNetwork, sg.HierS, sg.ScaffoldTree])
+def frozen_graphs(request):
+    graph = request.param.from_smiles_file(str(TEST_DATA_DIR / 'test_smiles.smi'))
+    graph.add_scaffold_molecule_count()
+    return graph, graph.freeze()
+
+
+def test_freeze(graphs):
+    graph, frozen = graphs
+    assert isinstance(frozen, FrozenScaffoldGraph)
+    assert len(frozen) == len(graph)
+    assert frozen.number_of_edges() == graph.number_of_edges()
+    assert graph_data(frozen) == graph_data(graph)
+    assert frozen.num_scaffold_nodes == graph.num_scaffold_nodes
+    assert frozen.num_molecule_nodes == graph.num_molecule_nodes
+    assert frozen.get_scaffold_nodes(data='hierarchy') == list(graph.get_scaffold_nodes(data='hierarchy'))
+    assert frozen.get_molecule_nodes() == list(graph.get_molecule_nodes())
+    assert frozen.get_hierarchy_sizes() == graph.get_hierarchy_sizes()
+    assert frozen.max_hierarchy() == graph.max_hierarchy()
+    assert frozen.get_scaffolds_in_hierarchy(2) == list(graph.get_scaffolds_in_hierarchy(2))
+    assert frozen.graph == graph.graph
+
+
+def test_frozen_queries(graphs):
+    graph, frozen = graphs
+    for scaffold in graph.get_scaffold_nodes():
+        assert frozen.scaffold_in_graph(scaffold)
+        assert frozen.get_molecules_for_scaffold(scaffold) == graph.get_molecules_for_scaffold(scaffold)
+        assert frozen.get_parent_scaffolds(scaffold, data='count') == \
+            graph.get_parent_scaffolds(scaffold, data='count')
+        assert frozen.get_child_scaffolds(scaffold, max_levels=1) == \
+            graph.get_child_scaffolds(scaffold, max_levels=1)
+        assert frozen.predecessors(scaffold) == list(graph.predecessors(scaffold))
+    for molecule in graph.get_molecule_nodes():
+        assert frozen.molecule_in_graph(molecule)
+        assert frozen.get_scaffolds_for_molecule(molecule, data=True) == \
+            graph.get_scaffolds_for_molecule(molecule, data=True)
+    u, v = next(iter(graph.edges))
+    assert frozen.get_edge_data(u, v) == graph.get_edge_data(u, v)
+    assert frozen.get_edge_data(v, u) is None
+    assert not frozen.scaffold_in_graph('CCCC')
+    assert frozen.get_molecules_for_scaffold('CCCC') == []
+
+
+def test_thaw(graphs):
+    graph, frozen = graphs
+    thawed = pickle.loads(pickle.dumps(frozen)).thaw()
+    assert type(thawed) is type(graph)
+    assert graph_data(thawed) == graph_data(graph)
+    assert list(thawed.nodes) == list(graph.nodes)
+    for node in graph:
+        assert list(thawed.predecessors(node)) == list(graph.predecessors(node))
+        assert list(thawed.successors(node)) == list(graph.successors(node))
+    assert nx.is_isomorphic(thawed, graph)
@@ -38,6 +38,25 @@ def test_smiles(scaffold):
     assert scaffold.get_canonical_identifier() == scaffold.smiles
     assert scaffold == Scaffold(Chem.MolFromSmiles(scaffold.smiles))
     assert scaffold == scaffold.smiles
+    assert scaffold != Scaffold(Chem.MolFromSmiles('c1ccccc1'))
+
+
+def test_canonical_identifier(scaffold):
+    calls = []
+
+    def hash_func(mol):
+        calls.append(mol)
+        return Chem.MolToInchiKey(mol)
+
+    scaffold.hash_func = hash_func
+    identifier = scaffold.get_canonical_identifier()
+    assert hash(scaffold) == hash(identifier)
+    assert scaffold.get_canonical_identifier() is identifier
+    assert len(calls) == 1
+    scaffold.hash_func = None
+    assert scaffold.get_canonical_identifier() == scaffold.smiles
+    s = pickle.loads(pickle.dumps(scaffold))
+    assert s.get_canonical_identifier() == scaffold.smiles
     assert str(scaffold) == scaffold.smiles
     assert hash(scaffold) == hash(scaffold.smiles)
 
@@ -124,3 +143,95 @@ def test_ring_systems(scaffold):
     assert isinstance(subset[0][0], Ring)
     assert len(subset[0][0:2]) == 2
 
+
+def test_ring_descriptors(scaffold):
+    rings = scaffold.ring_descriptors
+    assert len(rings) == scaffold.rings.count
+    assert 'size' in rings and 'foo' not in rings
+    assert rings['size'].tolist() == [r.size for r in scaffold.rings]
+    assert rings['aromatic'].tolist() == [r.aromatic for r in scaffold.rings]
+    assert rings['num_het'].tolist() == [0, 1, 1]
+    assert rings['num_n'].tolist() == [0, 0, 1]
+    assert rings['num_s'].tolist() == [0, 1, 0]
+    assert rings['ring_system'].tolist() == [0, 1, 1]
+    assert rings['linker_length'].tolist() == [4, 4, 0]
+    assert rings['het_linked'].tolist() == [False, False, False]
+    assert scaffold.ring_descriptors is rings
+    assert rings.to_array()['size'].tolist() == rings['size'].tolist()
+    with pytest.raises(KeyError):
+        _ = rings['foo']
+    systems = scaffold.ring_system_descriptors
+    assert len(systems) == scaffold.ring_systems.count
+    assert systems['num_rings'].tolist() == [1, 2]
+    assert systems['num_aromatic'].tolist() == [1, 1]
+    assert systems['num_het'].tolist() == [0, 2]
+    assert systems['delta'].tolist() == [0, 0]
+    assert scaffold.delta == -1
+    # collecting linkers must not modify the scaffold
+    stereo = Scaffold(Chem.MolFromSmiles('c1ccc(C[C@@H]2CCCN(Cc3ccccc3)C2)cc1'))
+    smiles = Chem.MolToSmiles(stereo.mol)
+    assert stereo.ring_descriptors['linker_length'].tolist() == [1, 2, 1]
+    assert Chem.MolToSmiles(stereo.mol) == smiles
+
+
+def test_linker_map(scaffold):
+    linkers = scaffold.linkers
+    assert linkers is scaffold.linkers
+    assert [len(linkers.ring_linkers(i).atoms) for i in range(scaffold.rings.count)] == [4, 4, 0]
+    assert not any(linkers.ring_linkers(i).het_linked for i in range(scaffold.rings.count))
+    assert [len(linkers.ring_system_linkers(i).atoms) for i in range(scaffold.ring_systems.count)] == [4, 4]
+    scaffold = Scaffold.from_smiles('c1ccc(CCN2CCCCC2)cc1')
+    ring = scaffold.linkers.ring_linkers(0)
+    assert ring.atoms == {4, 5} and ring.attachments == {3, 6} and ring.het_linked
+    linker = scaffold.linkers.collect(3)
+    assert linker.atoms == {3, 4, 5} and linker.corrected == {6}
+    assert scaffold.linkers.collect(3) is linker
+    # linkers are collected iteratively (no recursion limit)
+    scaffold = Scaffold.from_smiles('c1ccccc1' + 'C' * 2000 + 'c1ccccc1')
+    assert len(scaffold.linkers.ring_linkers(0).atoms) == 2000
+    assert scaffold.ring_descriptors['linker_length'].tolist() == [2000, 2000]
+
+
+def test_ring_masks(scaffold):
+    rings = scaffold.rings
+    assert rings.atom_masks == tuple(sum(1 << x for x in r) for r in rings.atom_rings)
+    assert rings.bond_masks == tuple(sum(1 << x for x in r) for r in rings.bond_rings)
+    assert rings[1].atom_mask == rings.atom_masks[1]
+    assert rings.shared_atom_mask == rings.atom_masks[1] & rings.atom_masks[2]
+    assert rings.system_index == (0, 1, 1)
+    assert scaffold.ring_systems.atom_masks[1] == rings.atom_masks[1] | rings.atom_masks[2]
+    # ring systems are found with a union-find (steroid + spiro + isolated ring)
+    scaffold = Scaffold.from_smiles('C1CCC2C(C1)CCC1C2CCC2CCC3(CCCC3)C12.C1CCCCC1')
+    rings, systems = scaffold.rings, scaffold.ring_systems
+    assert systems.count == 2
+    assert sorted(map(len, systems.ring_indexes)) == [1, 5]
+    for ring in rings:
+        system = ring.get_ring_system()
+        assert ring.index in system.rix and system.contains(ring)
+        assert systems[rings.system_index[ring.index]].rix == system.rix
+        assert set(ring.aix) <= set(system.aix)
+    # rings joined through an earlier ring are merged into one system
+    scaffold = Scaffold.from_smiles('C1CC2CC1CC1CCC(C2)C1')
+    assert scaffold.ring_systems.count == 1
+    assert scaffold.rings.system_index == (0,) * scaffold.rings.count
+    with pytest.raises(ValueError):
+        scaffold.rings[0].is_exocyclic_attachment(scaffold.atoms[6])
+
+
+def test_scaffold_record(scaffold):
+    scaffold.removed_ring_idx = 1
+    record = scaffold.to_record(scaffold_id=3)
+    assert isinstance(record, ScaffoldRecord)
+    assert record.scaffold_id == 3 and record.smiles == scaffold.smiles
+    assert record.num_rings == 3 and record.num_ring_systems == 2
+    assert record.removed_ring_idx == 1 and record.prioritization_rule is None
+    assert record == scaffold and scaffold == record and record == scaffold.smiles
+    assert hash(record) == hash(scaffold) and str(record) == scaffold.smiles
+    assert not hasattr(record, '__dict__')
+    rebuilt = record.to_scaffold()
+    assert rebuilt == scaffold and rebuilt.removed_ring_idx == 1
+    loaded = pickle.loads(pickle.dumps(record))
+    assert loaded == record and loaded.binary == record.binary
+    record = scaffold.to_record(keep_binary=False)
+    assert record.binary is None and record.to_binary()
+    assert record.to_scaffold().removed_ring_idx == 1
@@ -0,0 +1,93 @@
+"""
+scaffoldgraph tests.core.test_store
+"""
+
+import pickle
+
+import numpy as np
+import pytest
+
+from pathlib import Path
+from rdkit import Chem
+
+import scaffoldgraph as sg
+
+from scaffoldgraph.core.store import *
+
+TEST_DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
+
+
+def test_molecule_store():
+    store = MoleculeStore(capacity=2)
+    store.update('a', {'activity': 1.5, 'count': 2, 'active': True, 'label': 'x'})
+    store.update('b', {'activity': 3.0})
+    store.update('c', {'count': 1.5, 'label': 7})  # promoted
+    assert store.get('a', 'activity') == 1.5 and isinstance(store.get('a', 'activity'), float)
+    assert store.get('a', 'active') is True
+    assert store.get('a', 'count') == 2.0
+    assert store.get('c', 'label') == 7
+    assert store.get('b', 'count', 'missing') == 'missing'
+    assert store.get('d', 'count') is None
+    assert store.row('b') == {'activity': 3.0}
+    assert set(store.columns) == {'activity', 'count', 'active', 'label'}
+    store.remove('b')
+    assert 'b' not in store and len(store) == 2
+    assert store.row('b') == {}
+    subset = pickle.loads(pickle.dumps(store.subset(['c'])))
+    assert subset.row('c') == store.row('c')
+
+
+def test_molecule_store_columns():
+    store = MoleculeStore()
+    ids = ['m{}'.format(i) for i in range(5000)]
+    store.update_columns(ids, {'pIC50': np.linspace(0, 1, 5000), 'name': np.array(ids)})
+    assert store._columns['pIC50'].values.dtype == np.float64
+    assert store.get('m4999', 'pIC50') == 1.0
+    assert store.get('m10', 'name') == 'm10'
+
+
+def _mols_with_props():
+    mols = []
+    for i, line in enumerate(open(TEST_DATA_DIR / 'test_smiles.smi')):
+        mol = Chem.MolFromSmiles(line.split()[0])
+        mol.SetProp('_Name', str(i))
+        mol.SetDoubleProp('activity', i / 2)
+        mols.append(mol)
+    return mols
+
+
+@pytest.mark.parametrize('graph_cls', [sg.ScaffoldNetwork, sg.HierS, sg.ScaffoldTree])
+def test_graph_molecule_store(graph_cls):
+    graph = graph_cls.from_supplier(_mols_with_props())
+    stored = graph_cls.from_supplier(_mols_with_props(), molecule_store=True)
+    assert len(stored.molecule_store) == stored.num_molecule_nodes
+    assert stored.nodes['0'] == {'type': 'molecule'}
+    assert list(stored.get_molecule_nodes(data=True)) == list(graph.get_molecule_nodes(data=True))
+    assert list(stored.get_molecule_nodes(data='activity')) == list(graph.get_molecule_nodes(data='activity'))
+    for scaffold in graph.get_scaffold_nodes():
+        assert stored.get_molecules_for_scaffold(scaffold, data='activity') == \
+            graph.get_molecules_for_scaffold(scaffold, data='activity')
+    subgraph = stored.subgraph(['0'] + list(stored.predecessors('0'))).copy()
+    assert subgraph.get_molecule_data('0') == graph.nodes['0']
+    assert len(subgraph.molecule_store) == 1
+    assert stored.freeze().thaw().get_molecule_data('1') == graph.nodes['1']
+    stored.remove_molecules(['0'])
+    assert '0' not in stored.molecule_store
+
+
+def test_graph_molecule_store_parallel():
+    graph = sg.ScaffoldNetwork.from_supplier(_mols_with_props())
+    stored = sg.ScaffoldNetwork.from_supplier(_mols_with_props(), molecule_store=True, n_jobs=2)
+    assert list(stored.get_molecule_nodes(data=True)) == list(graph.get_molecule_nodes(data=True))
+
+
+def test_graph_molecule_store_dataframe():
+    pd = pytest.importorskip('pandas')
+    df = pd.read_csv(TEST_DATA_DIR / 'test_smiles.smi', sep=' ', header=None, names=['Smiles', 'Name'])
+    df['pIC50'] = np.arange(len(df), dtype=float)
+    df['n'] = np.arange(len(df))
+    network = sg.ScaffoldNetwork.from_dataframe(df, data_columns=['pIC50', 'n'], molecule_store=True)
+    name = str(df['Name'].iloc[3])
+    assert network.get_molecule_data(name, 'pIC50') == 3.0
+    assert isinstance(network.get_molecule_data(name, 'n'), int)
+    assert network.molecule_store.to_dataframe().loc[name, 'pIC50'] == 3.0
@@ -6,8 +6,14 @@ import tempfile
 import pytest
 import os
 
+from rdkit import Chem
+
+from scaffoldgraph import ScaffoldTree
+from scaffoldgraph.core import Scaffold, MurckoRingFragmenter, FragmentCache
 from scaffoldgraph.prioritization import ScaffoldRuleSet, BaseScaffoldFilterRule
+from scaffoldgraph.prioritization.generic_rules import SCPNumHetAtoms, RRPRingSizeX
 from scaffoldgraph.prioritization.original_rules import original_ruleset, OriginalRule10
+from scaffoldgraph.prioritization.prioritization_rules import removed_ring_indexes
 
 
 @pytest.fixture(name='null_set')
@@ -68,3 +74,117 @@ def test_errors(null_set):
         null_set.add_rule('')
         null_set.insert_rule('', 0)
         null_set[0] = ''
+
+
+class _UnbatchedRule(BaseScaffoldFilterRule):
+    """Wraps a rule evaluating it through ``filter`` only."""
+
+    def __init__(self, rule):
+        self.rule = rule
+
+    def filter(self, child, parents):
+        return self.rule.filter(child, parents)
+
+    @property
+    def name(self):
+        return self.rule.name
+
+
+def test_batched_filter():
+    smiles = [
+        'O=C(c1c2ccccc2cc2ccccc12)N1CCC(N2CCCC(C(=O)N3CCOCC3)C2)CC1',
+        'c1ccc(CC2CCN(Cc3cccnc3)CC2)cc1',
+        'O=C1C=C2CCC3C4CCC(C5CCC6(OC5)OCC5CCCCC56)C4CCC3C2CC1',
+    ]
+    unbatched = ScaffoldRuleSet([_UnbatchedRule(r) for r in original_ruleset])
+    assert [r.batched for r in original_ruleset].count(False) == 2  # rules 07 and 13
+    assert not any([r.batched for r in unbatched])
+    fragmenter = MurckoRingFragmenter()
+    for smi in smiles:
+        child = Scaffold(Chem.MolFromSmiles(smi))
+        parents = fragmenter.fragment(child)
+        removed = removed_ring_indexes(parents)
+        for rule in original_ruleset:
+            mask = rule.filter_mask(child, parents, removed)
+            expected = [p in rule.filter(child, parents) for p in parents]
+            assert mask.tolist() == expected
+        batched = original_ruleset(child, list(parents))
+        expected = unbatched(child, list(parents))
+        assert batched.smiles == expected.smiles
+        assert batched.prioritization_rule == expected.prioritization_rule
+
+
+class _LastParentRule(SCPNumHetAtoms):
+    """Overrides ``filter`` of a batched rule."""
+
+    def filter(self, child, parents):
+        return list(parents)[-1:]
+
+
+def test_overridden_filter():
+    rule = _LastParentRule('min')
+    assert rule.batched and not rule.uses_filter_mask
+    assert all(r.uses_filter_mask == r.batched for r in original_ruleset)
+    child = Scaffold(Chem.MolFromSmiles('c1ccc(CC2CCN(Cc3cccnc3)CC2)cc1'))
+    parents = MurckoRingFragmenter().fragment(child)
+    parent = ScaffoldRuleSet([rule])(child, list(parents))
+    assert parent.smiles == parents[-1].smiles
+
+
+class _FuncRule(SCPNumHetAtoms):
+    """Holds a function parameter which cannot be identified."""
+
+    def __init__(self, key):
+        super(_FuncRule, self).__init__('min')
+        self.key = key
+
+
+def test_signature():
+    assert RRPRingSizeX('max', 6).signature == 'RRPRingSizeX(func=max, size=6)'
+    assert _FuncRule(lambda p: 1).signature is None
+    assert _FuncRule(len).signature is not None  # builtin
+    assert original_ruleset.signature is not None
+    assert ScaffoldRuleSet([_UnbatchedRule(r) for r in original_ruleset]).signature is None
+    cache = FragmentCache()
+    rules = ScaffoldRuleSet([_FuncRule(lambda p: 1)] + original_ruleset.rules)
+    mols = [Chem.MolFromSmiles(s) for s in ('c1ccc(CC2CCN(Cc3cccnc3)CC2)cc1', 'O=C(Nc1ccccc1)Nc1cc2c(s1)CNCC2')]
+    for i, mol in enumerate(mols):
+        mol.SetProp('_Name', str(i))
+    tree = ScaffoldTree.from_supplier(mols, prioritization_rules=rules, fragment_cache=cache)
+    assert tree.num_scaffold_nodes > 0 and len(cache) == 0
+
+
+def test_profile():
+    ruleset = ScaffoldRuleSet(original_ruleset, profile=True)
+    assert original_ruleset.profile is False
+    frag = MurckoRingFragmenter()
+    scaffolds = [Scaffold(Chem.MolFromSmiles(s)) for s in (
+        'O=C(Nc1ccccc1)Nc1cc2c(s1)CNCC2', 'c1ccc(CC2CCNCC2)cc1', 'c1ccc2[nH]ccc2c1')]
+    decisions = 0
+    for child in scaffolds:
+        parents = frag.fragment(child)
+        if parents:
+            assert ruleset(child, parents) is not None
+            decisions += 1
+    stats = ruleset.get_profile()
+    assert len(stats) == len(ruleset) + 1
+    assert stats[0].rule == 'last remaining'
+    assert [s.rule for s in stats[1:]] == [r.name for r in ruleset]
+    assert sum(s.resolved for s in stats) == decisions
+    for s in stats[1:]:
+        assert s.candidates_out <= s.candidates_in
+        assert s.time >= 0
+    assert stats[1].calls == decisions - stats[0].calls
+    ruleset.reset_profile()
+    assert all(s.calls == 0 for s in ruleset.get_profile())
+    ruleset.profile = False
+    ruleset(scaffolds[0], frag.fragment(scaffolds[0]))
+    assert all(s.calls == 0 for s in ruleset.get_profile())
+
+
+def test_profile_to_dataframe():
+    pd = pytest.importorskip('pandas')
+    ruleset = ScaffoldRuleSet(original_ruleset, profile=True)
+    df = ruleset.profile_to_dataframe()
+    assert isinstance(df, pd.DataFrame)
+    assert len(df) == len(ruleset) + 1
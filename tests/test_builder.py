@@ -0,0 +1,60 @@
+"""
+scaffoldgraph tests.test_builder
+"""
+
+import pytest
+
+from pathlib import Path
+from rdkit import Chem
+
+import scaffoldgraph as sg
+
+from scaffoldgraph.io.smiles import read_smiles_file
+
+from . import graph_data
+
+TEST_DATA_DIR = Path(__file__).resolve().parent / 'data'
+
+
+def _molecules():
+    smiles_file = str(TEST_DATA_DIR / 'test_smiles.smi')
+    molecules = list(read_smiles_file(smiles_file, ' ', 0, 1, False))
+    epoxide = Chem.MolFromSmiles('O=C1CC2OC2c2ccccc2N1Cc1ccccc1')  # scheme 4 applies
+    epoxide.SetProp('_Name', 'epoxide')
+    return molecules + [epoxide]
+
+
+@pytest.mark.parametrize('share_fragments', [True, False])
+def test_build_graphs(share_fragments):
+    network, hiers, tree = sg.build_graphs(_molecules(), share_fragments=share_fragments)
+    assert graph_data(network) == graph_data(sg.ScaffoldNetwork.from_supplier(_molecules()))
+    assert graph_data(hiers) == graph_data(sg.HierS.from_supplier(_molecules()))
+    assert graph_data(tree) == graph_data(sg.ScaffoldTree.from_supplier(_molecules()))
+    assert type(network.fragmenter) is sg.core.MurckoRingFragmenter
+    assert type(tree.fragmenter) is sg.core.MurckoRingFragmenter
+
+
+def test_build_graphs_existing():
+    molecules = _molecules()
+    network = sg.ScaffoldNetwork.from_supplier(molecules[:5])
+    tree = sg.ScaffoldTree()
+    graphs = sg.build_graphs(molecules[5:], graphs=[network, tree])
+    assert graphs[0] is network
+    assert graph_data(network) == graph_data(sg.ScaffoldNetwork.from_supplier(_molecules()))
+    assert graph_data(tree) == graph_data(sg.ScaffoldTree.from_supplier(_molecules()[5:]))
+
+
+class _NoFragmenter(sg.core.MurckoRingFragmenter):
+    def fragment(self, scaffold):
+        return []
+
+
+def test_build_graphs_fragmenter_subclass():
+    network = sg.ScaffoldNetwork(fragmenter=_NoFragmenter())
+    network, tree = sg.build_graphs(_molecules(), graphs=[network, sg.ScaffoldTree()])
+    assert not any(t == 1 for _, _, t in network.edges(data='type'))
+    assert graph_data(tree) == graph_data(sg.ScaffoldTree.from_supplier(_molecules()))
+    indexed = sg.ScaffoldNetwork(fragmenter=sg.core.IndexedMurckoRingFragmenter())
+    indexed, tree = sg.build_graphs(_molecules(), graphs=[indexed, sg.ScaffoldTree()])
+    assert graph_data(indexed) == graph_data(sg.ScaffoldNetwork.from_supplier(_molecules()))
+    assert graph_data(tree) == graph_data(sg.ScaffoldTree.from_supplier(_molecules()))
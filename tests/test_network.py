@@ -2,14 +2,17 @@
 scaffoldgraph tests.test_network
 """
 
+import networkx as nx
 import pytest
 import os
 
+from collections import Counter
 from pathlib import Path
+from rdkit import Chem
 
 import scaffoldgraph as sg
 
-from . import mock_sdf, mock_smiles_file
+from . import graph_data, mock_sdf, mock_smiles_file
 
 
 TEST_DATA_DIR = Path(__file__).resolve().parent / 'data'
@@ -21,12 +24,30 @@ def test_network(sdf_file):
     return network
 
 
+@pytest.fixture(name='test_smiles_file')
+def long_smiles_file():
+    return str(TEST_DATA_DIR / 'test_smiles.smi')
+
+
 @pytest.fixture(name='network')
-def long_test_network():
-    network = sg.ScaffoldNetwork.from_smiles_file(str(TEST_DATA_DIR / 'test_smiles.smi'))
+def long_test_network(test_smiles_file):
+    network = sg.ScaffoldNetwork.from_smiles_file(test_smiles_file)
     return network
 
 
+@pytest.fixture(name='baseline')
+def long_test_graph(request, test_smiles_file):
+    """A graph of the class given by (indirect) parametrization, built serially with default options"""
+    graph = request.param.from_smiles_file(test_smiles_file)
+    return graph
+
+
+@pytest.fixture(name='test_molecules')
+def long_test_molecules(test_smiles_file):
+    from scaffoldgraph.io.smiles import read_smiles_file
+    return list(read_smiles_file(test_smiles_file, ' ', 0, 1, False))
+
+
 def test_network_from_sdf(sdf_file):
     network = sg.ScaffoldNetwork.from_sdf(sdf_file)
     assert network.num_scaffold_nodes == 8
@@ -89,3 +110,286 @@ def test_separate_disconnected(network):
 
 def test_repr(test_net):
     assert repr(test_net) == '<ScaffoldNetwork at {}>'.format(hex(id(test_net)))
+
+
+@pytest.mark.parametrize('baseline', [sg.ScaffoldNetwork, sg.HierS], indirect=True)
+def test_parallel_construction(baseline, test_smiles_file):
+    parallel = type(baseline).from_smiles_file(test_smiles_file, n_jobs=2)
+    assert graph_data(parallel) == graph_data(baseline)
+
+
+@pytest.mark.parametrize('baseline', [sg.ScaffoldNetwork, sg.HierS], indirect=True)
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_level_construction(baseline, test_smiles_file, n_jobs):
+    level = type(baseline).from_smiles_file(test_smiles_file, n_jobs=n_jobs, engine='level')
+    assert graph_data(level) == graph_data(baseline)
+    with pytest.raises(ValueError):
+        type(baseline).from_smiles_file(test_smiles_file, engine='unknown')
+
+
+@pytest.mark.parametrize('baseline', [sg.ScaffoldNetwork, sg.HierS, sg.ScaffoldTree], indirect=True)
+@pytest.mark.parametrize('engine', ['recursive', 'level'])
+def test_compact_construction(baseline, test_smiles_file, engine):
+    cache = sg.core.FragmentCache()
+    compact = type(baseline).from_smiles_file(test_smiles_file, engine=engine, compact_scaffolds=True,
+                                              fragment_cache=cache)
+    assert compact.compact_scaffolds and compact.copy().compact_scaffolds
+    assert graph_data(compact) == graph_data(baseline)
+    assert all(isinstance(p, sg.core.ScaffoldRecord) for v in cache.values() for p in v)
+
+
+@pytest.mark.parametrize('baseline,use_scheme_4', [(sg.ScaffoldNetwork, False), (sg.ScaffoldTree, True)],
+                         indirect=['baseline'])
+@pytest.mark.parametrize('engine', ['recursive', 'level'])
+def test_indexed_fragmenter(baseline, test_smiles_file, use_scheme_4, engine):
+    fragmenter = sg.core.IndexedMurckoRingFragmenter(use_scheme_4)
+    indexed = type(baseline).from_smiles_file(test_smiles_file, engine=engine, fragmenter=fragmenter)
+    assert indexed.fragmenter is fragmenter and indexed.copy().fragmenter is fragmenter
+    assert graph_data(indexed) == graph_data(baseline)
+
+
+class _BatchNetwork(sg.ScaffoldNetwork):
+    def __init__(self, graph=None, **kwargs):
+        super(_BatchNetwork, self).__init__(graph, **kwargs)
+        self.batches = batches = []
+        fragment_many = self.fragmenter.fragment_many
+
+        def record(scaffolds):
+            batches.append(len(scaffolds))
+            return fragment_many(scaffolds)
+
+        self.fragmenter.fragment_many = record
+
+
+def test_batched_fragmenter(network, test_smiles_file):
+    batched = _BatchNetwork.from_smiles_file(test_smiles_file, engine='level')
+    assert graph_data(batched) == graph_data(network)
+    assert max(batched.batches) > 1
+    fragmenter = network.fragmenter
+    scaffolds = [sg.core.Scaffold(Chem.MolFromSmiles(s)) for s in network.get_scaffold_nodes()]
+    assert fragmenter.fragment_many(scaffolds) == [fragmenter.fragment(s) for s in scaffolds]
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_scaffold_ids(test_smiles_file, n_jobs):
+    network = sg.ScaffoldNetwork.from_smiles_file(test_smiles_file, n_jobs=n_jobs)
+    scaffolds = list(network.get_scaffold_nodes())
+    ids = [network.get_scaffold_id(s) for s in scaffolds]
+    assert sorted(ids) == list(range(len(scaffolds)))
+    assert [network.get_scaffold_from_id(i) for i in ids] == scaffolds
+    assert network.get_scaffold_id('not a scaffold') is None
+    keys = {id(k) for k in scaffolds}
+    assert all(id(u) in keys for u, _ in network.edges())
+    assert all(id(v) in keys for _, v, t in network.edges(data='type') if t == 1)
+    copy = network.copy()
+    assert all(copy.get_scaffold_id(s) == i for s, i in zip(scaffolds, ids))
+
+
+@pytest.mark.parametrize('graph_cls', [sg.ScaffoldNetwork, sg.HierS])
+def test_incremental_update(graph_cls, test_molecules):
+    molecules = test_molecules
+    full = graph_cls.from_supplier(molecules)
+    full.add_scaffold_molecule_count()
+    graph = graph_cls.from_supplier(molecules[:5])
+    graph.add_scaffold_molecule_count()
+    graph.add_molecules(molecules[5:])
+    assert graph_data(graph) == graph_data(full)
+    graph.remove_molecules([m.GetProp('_Name') for m in molecules[5:]])
+    partial = graph_cls.from_supplier(molecules[:5])
+    partial.add_scaffold_molecule_count()
+    assert graph_data(graph) == graph_data(partial)
+
+
+@pytest.mark.parametrize('graph_cls', [sg.ScaffoldNetwork, sg.HierS])
+def test_incremental_update_counts(graph_cls, test_molecules):
+    molecules = test_molecules
+    full = graph_cls.from_supplier(molecules)
+    full.add_scaffold_molecule_count()
+    graph = graph_cls.from_supplier(molecules[:5])
+    graph.add_scaffold_molecule_count()
+    assert graph.copy().graph['molecule_counts'] is True
+    first = next(iter(graph.get_scaffold_nodes()))
+    del graph.nodes[first]['count']  # counts tracked by the graph, not the first scaffold
+    graph.add_molecules(molecules[5:])
+    assert all(graph.nodes[s]['count'] == full.nodes[s]['count'] for s in graph.get_scaffold_nodes() if s != first)
+    uncounted = graph_cls.from_supplier(molecules[:5])
+    for _, data in uncounted.get_scaffold_nodes(data=True):
+        data['count'] = 0  # user attribute, not a molecule count
+        break
+    uncounted.add_molecules(molecules[5:])
+    assert sum('count' in d for _, d in uncounted.nodes(data=True)) == 1
+
+
+@pytest.mark.parametrize('graph_cls', [sg.ScaffoldNetwork, sg.HierS])
+def test_parallel_incremental_update(graph_cls, test_molecules):
+    molecules = test_molecules
+    update = molecules[5:] + molecules[2:4] + molecules[5:7]  # existing and repeated IDs
+    serial = graph_cls.from_supplier(molecules[:5])
+    serial.add_scaffold_molecule_count()
+    serial.add_molecules(update)
+    parallel = graph_cls.from_supplier(molecules[:5])
+    parallel.add_scaffold_molecule_count()
+    parallel.add_molecules(update, n_jobs=2)
+    assert graph_data(parallel) == graph_data(serial)
+    assert parallel.num_molecule_nodes == len(molecules)
+
+
+@pytest.mark.parametrize('baseline', [sg.ScaffoldNetwork, sg.ScaffoldTree], indirect=True)
+def test_membership_index(baseline):
+    graph = baseline
+    expected = {s: sorted(graph.get_molecules_for_scaffold(s)) for s in graph.get_scaffold_nodes()}
+    assert graph.membership_index is None
+    index = graph.build_membership_index()
+    assert len(index) == graph.num_scaffold_nodes
+    assert {s: sorted(graph.get_molecules_for_scaffold(s)) for s in expected} == expected
+    assert all(index.count(s) == len(m) for s, m in expected.items())
+    scaffold = next(iter(expected))
+    with_data = graph.get_molecules_for_scaffold(scaffold, data='smiles')
+    assert sorted(with_data) == [(m, graph.nodes[m]['smiles']) for m in expected[scaffold]]
+    graph.add_scaffold_molecule_count()
+    assert all(graph.nodes[s]['count'] == len(m) for s, m in expected.items())
+    molecule = expected[scaffold][0]
+    graph.remove_molecules(molecule)
+    assert graph.membership_index is not index
+    assert molecule not in graph.get_molecules_for_scaffold(scaffold)
+    graph.drop_membership_index()
+    assert graph.membership_index is None
+
+
+def _scan_nodes(graph, node_type):
+    return [n for n, t in graph.nodes(data='type') if t == node_type]
+
+
+@pytest.mark.parametrize('baseline', [sg.ScaffoldNetwork, sg.ScaffoldTree], indirect=True)
+def test_node_registries(baseline):
+    graph = baseline
+    molecules = _scan_nodes(graph, 'molecule')
+    graph.remove_molecules(molecules[:3])
+    for g in (graph, graph.copy(), graph.subgraph(list(graph)[::2]), graph.copy(as_view=True)):
+        assert list(g.get_scaffold_nodes()) == _scan_nodes(g, 'scaffold')
+        assert list(g.get_molecule_nodes()) == _scan_nodes(g, 'molecule')
+        assert g.num_scaffold_nodes == len(_scan_nodes(g, 'scaffold'))
+        assert g.num_molecule_nodes == len(_scan_nodes(g, 'molecule'))
+    graph.add_nodes_from([(molecules[0], {'type': 'scaffold'})])
+    assert molecules[0] in list(graph.get_scaffold_nodes())
+    assert molecules[0] not in list(graph.get_molecule_nodes())
+    for g in (nx.relabel_nodes(graph, {molecules[-1]: 'relabeled'}), nx.convert_node_labels_to_integers(graph)):
+        assert list(g.get_scaffold_nodes()) == _scan_nodes(g, 'scaffold')  # nodes written directly
+        assert g.num_molecule_nodes == len(_scan_nodes(g, 'molecule'))
+    graph.add_node('untyped')
+    graph.nodes['untyped']['type'] = 'scaffold'
+    assert graph.num_scaffold_nodes == len(_scan_nodes(graph, 'scaffold'))
+    assert list(graph.get_scaffold_nodes())[-1] == 'untyped'
+    graph.clear()
+    assert graph.num_scaffold_nodes == graph.num_molecule_nodes == 0
+
+
+@pytest.mark.parametrize('baseline', [sg.ScaffoldNetwork, sg.ScaffoldTree], indirect=True)
+def test_hierarchy_buckets(baseline, tmp_path):
+    graph = baseline
+    graph.remove_molecules(list(graph.get_molecule_nodes())[:3])
+    for g in (graph, graph.copy(), graph.subgraph(list(graph)[::2]), graph.freeze()):
+        levels = dict(g.get_scaffold_nodes(data='hierarchy'))
+        ordered = sorted(levels, key=levels.get)
+        assert list(g.get_scaffolds_by_hierarchy()) == ordered
+        assert list(g.get_scaffolds_by_hierarchy(reverse=True)) == sorted(levels, key=levels.get, reverse=True)
+        assert [h for _, h in g.get_scaffolds_by_hierarchy(data='hierarchy')] == sorted(levels.values())
+        sizes = g.get_hierarchy_sizes()
+        assert sizes == Counter(levels.values())
+        assert g.max_hierarchy() == max(sizes) and g.min_hierarchy() == min(sizes)
+        for h in sizes:
+            assert list(g.get_scaffolds_in_hierarchy(h)) == [s for s in ordered if levels[s] == h]
+    scaffold = next(iter(graph.get_scaffolds_in_hierarchy(graph.max_hierarchy())))
+    graph.add_node(scaffold, hierarchy=100)
+    assert graph.max_hierarchy() == 100
+    assert list(graph.get_scaffolds_in_hierarchy(100)) == [scaffold]
+    graph.remove_node(scaffold)
+    assert 100 not in graph.get_hierarchy_sizes()
+    scaffold = next(iter(graph.get_scaffolds_in_hierarchy(graph.min_hierarchy())))
+    level = graph.nodes[scaffold]['hierarchy']
+    graph.nodes[scaffold]['hierarchy'] = level + 50  # written directly
+    assert scaffold not in list(graph.get_scaffolds_in_hierarchy(level))
+    assert list(graph.get_scaffolds_in_hierarchy(level + 50)) == [scaffold]
+    nx.set_node_attributes(graph, {scaffold: level + 60}, 'hierarchy')
+    assert graph.max_hierarchy() == level + 60
+    relabeled = nx.relabel_nodes(graph, {scaffold: 'relabeled'})
+    assert list(relabeled.get_scaffolds_in_hierarchy(level + 60)) == ['relabeled']
+    assert relabeled.get_hierarchy_sizes() == Counter(h for _, h in relabeled.get_scaffold_nodes(data='hierarchy'))
+    from scaffoldgraph.io.tsv import write_tsv
+    write_tsv(relabeled, str(tmp_path / 'relabeled.tsv'))
+    rows = (tmp_path / 'relabeled.tsv').read_text().splitlines()[1:]
+    assert len(rows) == relabeled.num_scaffold_nodes
+    assert rows[-1].split('\t')[:2] == [str(level + 60), 'relabeled']
+
+
+@pytest.mark.parametrize('baseline', [sg.ScaffoldNetwork, sg.ScaffoldTree], indirect=True)
+def test_reachability_index(baseline):
+    graph = baseline
+    queries = [(s, m) for s in graph.get_scaffold_nodes() for m in (-1, 0, 1, 2)]
+    parents = {(s, m): graph.get_parent_scaffolds(s, max_levels=m) for s, m in queries}
+    children = {(s, m): graph.get_child_scaffolds(s, max_levels=m) for s, m in queries}
+    for (s, m), nodes in children.items():  # max_levels limits child scaffolds too
+        level = graph.nodes[s]['hierarchy']
+        assert m < 0 or all(graph.nodes[c]['hierarchy'] - level <= m for c in nodes)
+    index = graph.build_reachability_index()
+    assert len(index) == graph.num_scaffold_nodes
+    assert all(sorted(graph.get_parent_scaffolds(s, max_levels=m)) == sorted(p) for (s, m), p in parents.items())
+    assert all(sorted(graph.get_child_scaffolds(s, max_levels=m)) == sorted(c) for (s, m), c in children.items())
+    scaffold, _ = max(parents, key=lambda q: len(parents[q]))
+    levels = [graph.nodes[p]['hierarchy'] for p in graph.get_parent_scaffolds(scaffold)]
+    assert levels == sorted(levels)
+    for parent in parents[(scaffold, -1)]:
+        assert graph.is_parent_scaffold(parent, scaffold)
+        assert not graph.is_parent_scaffold(scaffold, parent)
+    assert not graph.is_parent_scaffold(scaffold, scaffold)
+    assert not graph.is_parent_scaffold('not a scaffold', scaffold)
+    graph.remove_node(parents[(scaffold, -1)][-1])
+    assert graph.reachability_index is not index
+    graph.drop_reachability_index()
+    assert graph.reachability_index is None
+
+
+@pytest.mark.parametrize('baseline', [sg.ScaffoldNetwork, sg.ScaffoldTree], indirect=True)
+def test_aggregate_molecule_property(baseline):
+    import numpy as np
+    graph = baseline
+    for i, molecule in enumerate(graph.get_molecule_nodes()):
+        if i % 7:
+            graph.nodes[molecule]['value'] = float((i * 37) % 11)
+    funcs = ['count', 'sum', 'mean', 'median', 'min', 'max', 'std', 'var', np.ptp]
+    graph.aggregate_molecule_property('value', funcs)
+    for scaffold, data in graph.get_scaffold_nodes(data=True):
+        values = [v for _, v in graph.get_molecules_for_scaffold(scaffold, 'value') if v is not None]
+        assert data['value_count'] == len(values)
+        assert data['value_sum'] == pytest.approx(sum(values))
+        if not values:
+            assert np.isnan(data['value_mean']) and np.isnan(data['value_ptp'])
+            continue
+        for name in ('mean', 'median', 'min', 'max', 'std', 'var', 'ptp'):
+            assert data['value_' + name] == pytest.approx(getattr(np, name)(values))
+    with pytest.raises(ValueError):
+        graph.aggregate_molecule_property('value', ['mode'])
+
+
+def test_aggregate_molecule_property_dataframe(network):
+    pytest.importorskip('pandas')
+    for molecule in network.get_molecule_nodes():
+        network.nodes[molecule]['value'] = 1.0
+    df = network.aggregate_molecule_property('value', ['count', 'sum'], as_dataframe=True)
+    assert list(df.index) == list(network.get_scaffold_nodes())
+    assert list(df.columns) == ['value_count', 'value_sum']
+    assert (df['value_count'] == df['value_sum']).all()
+    assert all('value_count' not in data for _, data in network.get_scaffold_nodes(data=True))
+
+
+def test_graphml_round_trip(network, test_smiles_file, tmp_path):
+    assert all('removed_rings' not in d for _, _, d in network.edges(data=True))
+    path = str(tmp_path / 'network.graphml')
+    nx.write_graphml(network, path)
+    loaded = nx.read_graphml(path)
+    assert set(loaded.nodes) == set(network.nodes)
+    assert set(loaded.edges) == set(network.edges)
+    assert network.copy().record_removed_rings is False
+    recorded = sg.ScaffoldNetwork.from_smiles_file(test_smiles_file, record_removed_rings=True, engine='level')
+    assert set(recorded.edges) == set(network.edges)
+    assert all(d.get('removed_rings') for _, _, d in recorded.edges(data=True) if d.get('type') == 1)
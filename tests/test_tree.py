@@ -5,11 +5,16 @@ scaffoldgraph tests.test_tree
 import networkx as nx
 import pytest
 
+from pathlib import Path
+
 import scaffoldgraph as sg
 
 from . import mock_sdf, mock_smiles_file
 
 
+TEST_DATA_DIR = Path(__file__).resolve().parent / 'data'
+
+
 @pytest.fixture(name='test_tree')
 def test_tree_graph(sdf_file):
     tree = sg.ScaffoldTree.from_sdf(sdf_file)
@@ -32,3 +37,108 @@ def test_tree_from_smiles(smiles_file):
 
 def test_repr(test_tree):
     assert repr(test_tree) == '<ScaffoldTree at {}>'.format(hex(id(test_tree)))
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_iter_tree_frags(n_jobs):
+    from rdkit import Chem
+    with open(TEST_DATA_DIR / 'test_smiles.smi') as f:
+        mols = [Chem.MolFromSmiles(line.split()[0]) for line in f if line.strip()]
+    expected = [[Chem.MolToSmiles(m) for m in sg.tree_frags_from_mol(mol)] for mol in mols]
+    assert list(sg.iter_tree_frags(mols, n_jobs=n_jobs, chunksize=2)) == expected
+    cache = sg.core.FragmentCache()
+    frags = list(sg.iter_tree_frags(mols + mols, fragment_cache=cache, n_jobs=n_jobs, output='mol'))
+    assert [[Chem.MolToSmiles(m) for m in x] for x in frags] == expected + expected
+    if n_jobs == 1:
+        assert cache.info().hits > 0
+
+
+def test_parallel_construction():
+    smiles_file = str(TEST_DATA_DIR / 'test_smiles.smi')
+    serial = sg.ScaffoldTree.from_smiles_file(smiles_file)
+    parallel = sg.ScaffoldTree.from_smiles_file(smiles_file, n_jobs=2)
+    assert dict(parallel.nodes(data=True)) == dict(serial.nodes(data=True))
+    assert {(u, v): d for u, v, d in parallel.edges(data=True)} == \
+        {(u, v): d for u, v, d in serial.edges(data=True)}
+    assert nx.is_forest(parallel)
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_level_construction(n_jobs):
+    smiles_file = str(TEST_DATA_DIR / 'test_smiles.smi')
+    recursive = sg.ScaffoldTree.from_smiles_file(smiles_file)
+    level = sg.ScaffoldTree.from_smiles_file(smiles_file, n_jobs=n_jobs, engine='level')
+    assert dict(level.nodes(data=True)) == dict(recursive.nodes(data=True))
+    assert {(u, v): d for u, v, d in level.edges(data=True)} == \
+        {(u, v): d for u, v, d in recursive.edges(data=True)}
+    assert nx.is_forest(level)
+
+
+def test_incremental_update():
+    from scaffoldgraph.io.smiles import read_smiles_file
+    smiles_file = str(TEST_DATA_DIR / 'test_smiles.smi')
+    molecules = list(read_smiles_file(smiles_file, ' ', 0, 1, False))
+    names = [m.GetProp('_Name') for m in molecules]
+    tree = sg.ScaffoldTree.from_supplier(molecules[::2])
+    tree.add_molecules(molecules[1::2])
+    full = sg.ScaffoldTree.from_supplier(molecules)
+    assert dict(tree.nodes(data=True)) == dict(full.nodes(data=True))
+    assert set(tree.edges) == set(full.edges)
+    tree.remove_molecules(names[1:])
+    assert tree.num_molecule_nodes == 1
+    assert set(tree.nodes) == {names[0]} | nx.ancestors(tree, names[0])
+    assert nx.is_forest(tree)
+
+
+def _edge_records(network):
+    return [(u, v, d.get('type'), d.get('removed_rings')) for u, v, d in network.edges(data=True)]
+
+
+def test_from_network():
+    from scaffoldgraph.prioritization import ScaffoldRuleSet
+    from scaffoldgraph.prioritization.generic_rules import SCPNumAromaticRings, RSPNumHetAtoms, Tiebreaker
+    smiles_file = str(TEST_DATA_DIR / 'test_smiles.smi')
+    network = sg.ScaffoldNetwork.from_smiles_file(smiles_file, record_removed_rings=True)
+    assert all(t != 1 or r for _, _, t, r in _edge_records(network))
+    tree = sg.ScaffoldTree.from_network(network)
+    direct = sg.ScaffoldTree.from_smiles_file(smiles_file)
+    assert dict(tree.nodes(data=True)) == dict(direct.nodes(data=True))
+    assert {(u, v): d for u, v, d in tree.edges(data=True)} == \
+        {(u, v): d for u, v, d in direct.edges(data=True)}
+    rules = ScaffoldRuleSet([SCPNumAromaticRings('max'), RSPNumHetAtoms('min'), Tiebreaker()])
+    expected = sg.ScaffoldTree.from_smiles_file(smiles_file, prioritization_rules=rules)
+    for t in (tree, direct):
+        t.reprioritize(rules)
+        assert t.prioritization_rules is rules
+        assert dict(t.nodes(data=True)) == dict(expected.nodes(data=True))
+        assert {(u, v): d for u, v, d in t.edges(data=True)} == \
+            {(u, v): d for u, v, d in expected.edges(data=True)}
+        assert nx.is_forest(t)
+
+
+def test_truncated_network():
+    from scaffoldgraph.core import ConstructionBudget
+    smiles_file = str(TEST_DATA_DIR / 'test_smiles.smi')
+    budget = ConstructionBudget(max_scaffolds=1)
+    network = sg.ScaffoldNetwork.from_smiles_file(smiles_file, record_removed_rings=True, budget=budget)
+    assert any(t for _, t in network.nodes(data='truncated'))
+    tree = sg.ScaffoldTree.from_network(network)
+    direct = sg.ScaffoldTree.from_smiles_file(smiles_file)
+    assert set(tree.edges) == set(direct.edges)
+    truncated = sg.ScaffoldTree.from_smiles_file(smiles_file, keep_candidates=True, budget=budget)
+    assert set(truncated.edges) < set(direct.edges)
+    truncated.reprioritize(direct.prioritization_rules)
+    assert set(truncated.edges) == set(direct.edges)
+    assert not any(t for _, t in truncated.nodes(data='truncated'))
+
+
+def test_rule_profile():
+    from scaffoldgraph.prioritization import original_ruleset
+    smiles_file = str(TEST_DATA_DIR / 'test_smiles.smi')
+    tree = sg.ScaffoldTree.from_smiles_file(smiles_file, profile_rules=True)
+    stats = tree.get_rule_profile()
+    assert len(stats) == len(tree.prioritization_rules) + 1
+    assert tree.prioritization_rules is not original_ruleset
+    assert original_ruleset.profile is False
+    decisions = sum(1 for u, v in tree.edges if tree.nodes[v].get('type') == 'scaffold')
+    assert sum(s.resolved for s in stats) == decisions